@@ -3,18 +3,28 @@ import yaml
 import os
 from dotenv import load_dotenv
 import logging
-from src.processing import ContentProcessor
-from src.utils import save_results, create_output_directory, load_config
-from src.search import get_search_engine
-from src.llm import LLMHandler
+from logging.handlers import RotatingFileHandler
+from src.utils import create_output_directory, load_config
+from src.jobs import JobManager
 import io
 import zipfile
-from config import OUTPUT_FOLDER, LLM_PROVIDER, LLM_MODEL, LLM_MAX_TOKENS
+from config import (
+    OUTPUT_FOLDER,
+    APP_MAX_JOBS,
+    APP_STREAMING_PIPELINE,
+    APP_REFRESH_SECONDS,
+    APP_LOG_MAX_MB,
+)
+from main import create_resources, run_search
 
 load_dotenv()
 LOG_FILE = "app.log"
+# Every job logs here as well as to its own run.log, so the shared file is rotated
+# to stay bounded on a long-lived server.
 logging.basicConfig(
-    filename=LOG_FILE,
+    handlers=[
+        RotatingFileHandler(LOG_FILE, maxBytes=APP_LOG_MAX_MB * 1024 * 1024, backupCount=3)
+    ],
     level=logging.INFO,
     format="%(asctime)s %(levelname)s:%(message)s",
 )
@@ -77,58 +87,86 @@ def main():
         mime="application/x-yaml",
     )
 
+    jobs = job_manager()
     if st.button("Run Wide Search"):
-        try:
-            clear_logs()
-
-            st.info("Starting wide search...")
-            logging.info("Wide search started.")
-
-            results = run_wide_search(input_user)
-
-            st.success("Wide search completed.")
-            st.json(results)
-
-            zip_bytes = create_zip_file(results, input_user)
-            st.download_button(
-                "Download ZIP file",
-                data=zip_bytes.getvalue(),
-                file_name="wide_search_results.zip",
-                mime="application/zip",
-            )
-
-            clear_logs()
-        except Exception as e:
-            st.error(f"An error occurred: {e}")
-            logging.exception("Error during wide search.")
-
-
-def run_wide_search(input_user):
-    queries = input_user.get("SEARCH_QUERIES")
-    max_sources = input_user.get("MAX_SOURCES_PER_SEARCH_QUERY")
-    time_horizon = input_user.get("TIME_HORIZON_DAYS")
-    content_questions = input_user.get("CONTENT_QUESTIONS")
-    max_top_sources = input_user.get("MAX_TOP_SOURCES")
-    platform = input_user.get("PLATFORM")
-
-    search_engine = get_search_engine(platform)
-    llm_handler = LLMHandler(LLM_PROVIDER, LLM_MODEL)
-    content_processor = ContentProcessor(llm_handler, LLM_MAX_TOKENS)
-
-    urls = search_engine.fetch_urls(queries, max_sources, time_horizon)
-    source_items = search_engine.load_source_content(urls)
-
-    processed_items = content_processor.process_content(
-        source_items, content_questions, max_top_sources
-    )
-
-    output_dir = create_output_directory(OUTPUT_FOLDER)
-    save_results(processed_items, output_dir)
-
-    return processed_items
-
-
-def create_zip_file(results, config):
+        resources = shared_resources()
+        job = jobs.submit(
+            lambda job: run_wide_search(job.input_user, job.output_dir, resources, job.tracer),
+            input_user,
+        )
+        st.query_params["job"] = job.id
+
+    job_id = st.query_params.get("job")
+    if job_id:
+        job = jobs.get(job_id)
+        if job is None:
+            st.warning(f"Job {job_id} is not available anymore.")
+        else:
+            show_job(job)
+
+
+@st.cache_resource
+def shared_resources():
+    """Caches, LLM handler and embeddings shared by every session and job of the server."""
+    return create_resources()
+
+
+@st.cache_resource
+def job_manager():
+    """Process-wide job manager, so searches of several users run side by side."""
+    return JobManager(OUTPUT_FOLDER, APP_MAX_JOBS)
+
+
+def show_job(job):
+    """Show a job's progress, refreshed every APP_REFRESH_SECONDS until it is done."""
+    run_every = None if job.done else APP_REFRESH_SECONDS
+    st.fragment(run_every=run_every)(show_job_status)(job)
+
+
+def show_job_status(job):
+    if job.status == "queued":
+        st.info(f"Job {job.id} is waiting for a free worker.")
+    elif job.status == "running":
+        stages = ", ".join(job.progress()["stages"]) or "searching and loading"
+        st.info(f"Job {job.id} running for {job.elapsed():.0f}s: {stages}.")
+
+    counts = job.progress()["counts"]
+    for column, (label, count) in zip(st.columns(len(counts)), counts.items()):
+        column.metric(label, count)
+
+    if job.status == "running":
+        partial_results = job.partial_results()
+        if partial_results:
+            st.subheader(f"Partial results ({len(partial_results)} sources)")
+            st.json(partial_results, expanded=False)
+    elif job.status == "done":
+        st.success(f"Wide search completed in {job.elapsed():.0f}s.")
+        st.json(job.result)
+        zip_bytes = create_zip_file(job.result, job.input_user, job.log_path)
+        st.download_button(
+            "Download ZIP file",
+            data=zip_bytes.getvalue(),
+            file_name="wide_search_results.zip",
+            mime="application/zip",
+        )
+    elif job.status == "failed":
+        st.error(f"An error occurred: {job.error}")
+
+    if job.done and st.session_state.get("shown_job") != job.id:
+        # Rerun the whole page once, so the fragment stops refreshing.
+        st.session_state["shown_job"] = job.id
+        st.rerun()
+
+
+def run_wide_search(
+    input_user, output_dir=None, resources=None, tracer=None, streaming=APP_STREAMING_PIPELINE
+):
+    """Run one wide search and save its results in `output_dir`, see main.run_search."""
+    output_dir = output_dir or create_output_directory(OUTPUT_FOLDER)
+    return run_search(input_user, output_dir, resources, tracer, streaming)
+
+
+def create_zip_file(results, config, log_path=LOG_FILE):
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED) as zf:
         results_yaml = yaml.dump(results, allow_unicode=True)
@@ -137,19 +175,13 @@ def create_zip_file(results, config):
         config_yaml = yaml.dump(config, allow_unicode=True)
         zf.writestr("config.yaml", config_yaml)
 
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r") as log_file:
-                zf.writestr("app.log", log_file.read())
+        if os.path.exists(log_path):
+            with open(log_path, "r") as log_file:
+                zf.writestr(os.path.basename(log_path), log_file.read())
 
     zip_buffer.seek(0)
     return zip_buffer
 
 
-def clear_logs():
-    """Clear the log file by overwriting it with an empty string."""
-    with open(LOG_FILE, "w"):
-        pass
-
-
 if __name__ == "__main__":
     main()
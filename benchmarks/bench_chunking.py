@@ -0,0 +1,96 @@
+"""Chunking cost of large transcripts: per-stage splitters against TokenChunker.
+
+The baseline builds a RecursiveCharacterTextSplitter per stage, as
+from_tiktoken_encoder does, so each transcript is tokenized for the
+retrieval chunks, again for the summary windows, and the windows once more
+to count their tokens. TokenChunker tokenizes each transcript once and
+serves all three from its offsets. Uses the gpt2 tiktoken encoding, or
+word tokens with --word-tokens when it cannot be downloaded.
+Run with: python -m benchmarks.bench_chunking [--words 100000] [--transcripts 5]
+"""
+
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.fakes import WordEncoding
+from src.chunking import TokenChunker, get_encoding
+
+
+class CountingEncoding:
+    """Wraps an encoding and counts the characters it encodes."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.characters = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.characters += len(text)
+        return self.encoding.encode(text, disallowed_special=disallowed_special)
+
+    def decode_with_offsets(self, tokens):
+        return self.encoding.decode_with_offsets(tokens)
+
+
+def make_transcripts(count, words):
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    transcripts = []
+    for _ in range(count):
+        sentences = []
+        while sum(len(sentence) for sentence in sentences) < words:
+            sentences.append(rng.choices(vocabulary, k=rng.randint(5, 25)))
+        text = ". ".join(" ".join(sentence) for sentence in sentences) + "."
+        transcripts.append(Document(page_content=text, metadata={"title": "Transcript"}))
+    return transcripts
+
+
+def baseline(documents, encoding, args):
+    def length(text):
+        return len(encoding.encode(text))
+
+    retrieval = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, length_function=length
+    ).split_documents(documents)
+    windows = RecursiveCharacterTextSplitter(
+        chunk_size=args.window, chunk_overlap=args.window // 10, length_function=length
+    ).split_documents(documents)
+    tokens = [length(window.page_content) for window in windows]
+    return len(retrieval), len(windows), sum(tokens)
+
+
+def chunker_run(documents, encoding, args):
+    chunker = TokenChunker(encoding, window_size=args.window, window_overlap=args.window // 10)
+    retrieval = chunker.retrieval_chunks(documents)
+    windows = chunker.summary_windows(documents)
+    tokens = [chunker.count_tokens(window.page_content) for window in windows]
+    return len(retrieval), len(windows), sum(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=100000, help="words per transcript")
+    parser.add_argument("--transcripts", type=int, default=5)
+    parser.add_argument("--window", type=int, default=7500, help="summary window tokens")
+    parser.add_argument("--word-tokens", action="store_true")
+    args = parser.parse_args()
+
+    documents = make_transcripts(args.transcripts, args.words)
+    characters = sum(len(document.page_content) for document in documents)
+    print(f"{args.transcripts} transcripts of {args.words} words ({characters} characters)")
+    for label, function in (("per-stage splitters", baseline), ("TokenChunker", chunker_run)):
+        encoding = CountingEncoding(WordEncoding() if args.word_tokens else get_encoding())
+        start = time.perf_counter()
+        chunks, windows, window_tokens = function(documents, encoding, args)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<20} {elapsed:7.2f}s  encoded {encoding.characters / characters:5.2f}x "
+            f"the text  chunks {chunks:5d}  windows {windows:3d}  window tokens {window_tokens}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Offline end-to-end benchmark of process_content and the full main flow.
+
+Every backend is a local stand-in:
+- Search results come from LocalSearchEngine. Consecutive queries share
+  some results.
+- Pages are generated job offers plus the saved HTML fixtures, served by a
+  local HTTP server with `--fetch-latency` seconds per request.
+- The LLM is a FakeChatModel answering by keyword. Each call takes
+  `--llm-latency` seconds and each summary has `--summary-words` words.
+- Embeddings are HashEmbeddings, and tokens are words.
+
+The 'process' flow runs ContentProcessor.process_content on the parsed
+corpus. The 'main' flow runs main.main, covering search, fetching, caching,
+processing and saving. Each (flow, scale) runs in a fresh subprocess, so
+the reported peak RSS is its own.
+
+--save writes the results as JSON. --baseline compares them to a saved
+run; the exit status is 1 when wall time or peak RSS grow by more than
+--tolerance, or when LLM calls increase.
+
+Run with: python -m benchmarks.bench_e2e [--scales 10,50,200] [--flows process,main]
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import yaml
+
+from benchmarks.fakes import (
+    SKILLS,
+    FakeChatModel,
+    HashEmbeddings,
+    LocalSearchEngine,
+    WordEncoding,
+    keyword_responder,
+    make_offer_page,
+    serve_pages,
+)
+from src.cache import LLMCache
+from src.chunking import TokenChunker
+from src.embeddings import CachedEmbeddings
+from src.fetching import html_to_documents
+from src.llm import LLMHandler
+from src.processing import ContentProcessor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+QUESTIONS = [f"Is {skill} required?" for skill in SKILLS[:8]] + ["Is this a remote job offer?"]
+MAX_TOP_SOURCES = 10
+RESULTS_PER_QUERY = 10
+QUERY_STRIDE = 8
+
+
+def make_corpus(size):
+    """Return {path: html} with the HTML fixtures followed by generated offers."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html")))[:size]:
+        with open(path, encoding="utf-8") as file:
+            pages[f"/fixture/{os.path.basename(path)}"] = file.read()
+    for index in range(size - len(pages)):
+        pages[f"/offer/{index}"] = make_offer_page(index)
+    return pages
+
+
+def plan_results(urls):
+    """Map search queries to overlapping result lists covering every URL."""
+    results = {}
+    for query_index in range(max(1, -(-len(urls) // QUERY_STRIDE))):
+        start = query_index * QUERY_STRIDE
+        results[f"engineer offers {query_index}"] = [
+            urls[(start + i) % len(urls)] for i in range(min(RESULTS_PER_QUERY, len(urls)))
+        ]
+    return results
+
+
+def sized_responder(summary_words):
+    """keyword_responder whose summaries are the first `summary_words` words of their input."""
+
+    def respond(messages):
+        prompt = str(messages[-1].content)
+        if "summar" in prompt and "JSON" not in prompt:
+            return " ".join(prompt.split()[:summary_words])
+        return keyword_responder(messages)
+
+    return respond
+
+
+def fake_model(args):
+    return FakeChatModel(responder=sized_responder(args.summary_words), latency=args.llm_latency)
+
+
+def hash_embeddings(*args, **kwargs):
+    return CachedEmbeddings(HashEmbeddings(), "hash-embeddings")
+
+
+def run_process(size, args, workdir):
+    """process_content on the parsed corpus; return (LLM calls, sources with answers)."""
+    source_items = {}
+    for path, html in make_corpus(size).items():
+        documents = html_to_documents(html, f"https://jobs.example{path}")
+        source_items[documents[0].metadata["title"]] = {
+            "url": f"https://jobs.example{path}",
+            "documents": documents,
+            "qa": {},
+        }
+    llm = fake_model(args)
+    handler = LLMHandler("ollama", "fake-model", LLMCache(), args.llm_concurrency)
+    handler.llm = handler.llm_json = llm
+    processor = ContentProcessor(
+        handler, args.max_tokens, hash_embeddings(), chunker=TokenChunker(WordEncoding())
+    )
+    results = processor.process_content(source_items, QUESTIONS, MAX_TOP_SOURCES)
+    return llm.calls, sum(len(items) for items in results.values())
+
+
+def run_main(size, args, workdir):
+    """main.main against the local search API and page server; return (LLM calls, sources)."""
+    main_module = importlib.import_module("main")
+    llm = fake_model(args)
+
+    class FakeLLMHandler(LLMHandler):
+        def get_llm(self, llm_name, llm_model):
+            return llm
+
+        get_llm_json_mode = get_llm
+
+    pages = make_corpus(size)
+    with serve_pages(pages, delay=args.fetch_latency) as base_url:
+        results = plan_results([base_url + path for path in pages])
+        config_path = os.path.join(workdir, "config.yaml")
+        with open(config_path, "w") as file:
+            yaml.dump(
+                {
+                    "SEARCH_QUERIES": list(results),
+                    "CONTENT_QUESTIONS": QUESTIONS,
+                    "TIME_HORIZON_DAYS": 30,
+                    "MAX_TOP_SOURCES": MAX_TOP_SOURCES,
+                    "PLATFORM": "google",
+                    "MAX_SOURCES_PER_SEARCH_QUERY": RESULTS_PER_QUERY,
+                },
+                file,
+            )
+
+        def get_search_engine(platform, transcript_workers=None, **kwargs):
+            return LocalSearchEngine(results, args.query_latency, **kwargs)
+
+        with patch.multiple(
+            main_module,
+            OUTPUT_FOLDER=os.path.join(workdir, "runs"),
+            CACHE_DIR=os.path.join(workdir, "cache"),
+            LLMHandler=FakeLLMHandler,
+            get_search_engine=get_search_engine,
+            get_embeddings=hash_embeddings,
+        ), patch("src.chunking.get_encoding", WordEncoding):
+            main_module.main(config_path)
+
+    run_dir = glob.glob(os.path.join(workdir, "runs", "*"))[0]
+    sources = 0
+    for name in ("top_items.yaml", "less_relevant_items.yaml"):
+        with open(os.path.join(run_dir, name)) as file:
+            sources += len(yaml.safe_load(file) or {})
+    return llm.calls, sources
+
+
+FLOWS = {"process": run_process, "main": run_main}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def worker(flow, size, args):
+    """Run one flow at one scale in this process and return its measurements."""
+    with tempfile.TemporaryDirectory() as workdir:
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        llm_calls, sources = FLOWS[flow](size, args, workdir)
+        wall = time.perf_counter() - start
+    return {
+        "flow": flow,
+        "scale": size,
+        "wall_s": round(wall, 3),
+        "llm_calls": llm_calls,
+        "sources": sources,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Return messages for results worse than the matching baseline entries."""
+    previous = {(entry["flow"], entry["scale"]): entry for entry in baseline}
+    messages = []
+    for result in results:
+        before = previous.get((result["flow"], result["scale"]))
+        if before is None:
+            continue
+        label = f"{result['flow']} x{result['scale']}"
+        for key in ("wall_s", "peak_rss_mb"):
+            if result[key] > before[key] * (1 + tolerance):
+                messages.append(f"{label}: {key} {before[key]} -> {result[key]}")
+        if result["llm_calls"] > before["llm_calls"]:
+            messages.append(f"{label}: llm_calls {before['llm_calls']} -> {result['llm_calls']}")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scales", default="10,50,200", help="comma-separated source counts")
+    parser.add_argument("--flows", default="process,main", help="comma-separated: process, main")
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--summary-words", type=int, default=150)
+    parser.add_argument("--fetch-latency", type=float, default=0.01)
+    parser.add_argument("--query-latency", type=float, default=0.05)
+    parser.add_argument("--max-tokens", type=int, default=7500)
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--worker", nargs=2, metavar=("FLOW", "SCALE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker[0], int(args.worker[1]), args)))
+        return
+
+    options = [
+        f"--{name.replace('_', '-')}={getattr(args, name)}"
+        for name in ("llm_latency", "llm_concurrency", "summary_words", "fetch_latency",
+                     "query_latency", "max_tokens")
+    ]
+    print(f"{'flow':<8} {'scale':>6} {'wall s':>8} {'LLM calls':>10} {'sources':>8} "
+          f"{'peak RSS MB':>12} {'growth MB':>10}")
+    results = []
+    for flow in args.flows.split(","):
+        for scale in args.scales.split(","):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_e2e", "--worker", flow, scale, *options],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(
+                f"{flow:<8} {result['scale']:>6} {result['wall_s']:>8.2f} "
+                f"{result['llm_calls']:>10} {result['sources']:>8} "
+                f"{result['peak_rss_mb']:>12.1f} {result['rss_growth_mb']:>10.1f}"
+            )
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            messages = regressions(results, json.load(file), args.tolerance)
+        for message in messages:
+            print(f"REGRESSION {message}")
+        if messages:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
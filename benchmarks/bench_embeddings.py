@@ -0,0 +1,71 @@
+"""Measure embedding throughput and cache hit rate of CachedEmbeddings.
+
+Compares embedding each source separately with one batched pass over all
+sources, then repeats the batched pass against the persistent cache as a
+second run would. Run with: python -m benchmarks.bench_embeddings
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import HashEmbeddings
+from src.embeddings import CachedEmbeddings, EmbeddingCache
+
+
+def make_sources(sources, chunks_per_source):
+    return [
+        [
+            f"Source {s} chunk {c}: Python, Docker, SQL and remote work details {s * c}"
+            for c in range(chunks_per_source)
+        ]
+        for s in range(sources)
+    ]
+
+
+def report(label, embeddings, elapsed, total):
+    print(
+        f"{label:<28} {elapsed:6.2f}s  {total / elapsed:8.1f} chunks/s  "
+        f"embedder calls {embeddings.embedder.calls:4d}  hit rate {embeddings.hit_rate():.0%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sources", type=int, default=70)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per embedder call")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    sources = make_sources(args.sources, args.chunks)
+    total = sum(len(chunks) for chunks in sources)
+    all_chunks = [chunk for chunks in sources for chunk in chunks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "embeddings.sqlite")
+
+        embeddings = CachedEmbeddings(HashEmbeddings(latency=args.latency), "fake", None, args.batch_size)
+        start = time.perf_counter()
+        for chunks in sources:
+            embeddings.embed_documents(chunks)
+        report("per-source, no cache", embeddings, time.perf_counter() - start, total)
+
+        embeddings = CachedEmbeddings(
+            HashEmbeddings(latency=args.latency), "fake", EmbeddingCache(cache_path), args.batch_size
+        )
+        start = time.perf_counter()
+        embeddings.embed_documents(all_chunks)
+        report("batched, cold cache", embeddings, time.perf_counter() - start, total)
+
+        embeddings = CachedEmbeddings(
+            HashEmbeddings(latency=args.latency), "fake", EmbeddingCache(cache_path), args.batch_size
+        )
+        start = time.perf_counter()
+        embeddings.embed_documents(all_chunks)
+        report("batched, warm cache", embeddings, time.perf_counter() - start, total)
+
+
+if __name__ == "__main__":
+    main()
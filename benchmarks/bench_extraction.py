@@ -0,0 +1,72 @@
+"""Token counts of raw page text against extracted main content.
+
+Converts every saved page of a corpus (benchmarks/fixtures/html by default)
+with html_to_documents, once keeping the full page text and once keeping the
+main content only, and reports per page the estimated tokens, the extraction
+time and the number of retrieval chunks and summary windows. Chunks are cut
+with the estimate_tokens length so the benchmark runs without a tokenizer
+download.
+Run with: python -m benchmarks.bench_extraction [--corpus DIR] [--chunk-size 1000]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.extraction import estimate_tokens
+from src.fetching import html_to_documents
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def count_chunks(documents, chunk_size):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_size // 5, length_function=estimate_tokens
+    )
+    return len(splitter.split_documents(documents))
+
+
+def measure(path, args):
+    with open(path, encoding="utf-8") as file:
+        html = file.read()
+    raw = html_to_documents(html, path, extract_content=False)
+    start = time.perf_counter()
+    extracted = html_to_documents(html, path, extract_content=True)
+    elapsed = time.perf_counter() - start
+    return {
+        "tokens": [estimate_tokens(raw[0].page_content), estimate_tokens(extracted[0].page_content)],
+        "chunks": [count_chunks(documents, args.chunk_size) for documents in (raw, extracted)],
+        "windows": [count_chunks(documents, args.window_size) for documents in (raw, extracted)],
+        "ms": elapsed * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS, help="directory of saved .html pages")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--window-size", type=int, default=7500)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+    print(f"{'page':<28} {'tokens before':>13} {'after':>6} {'saved':>6} {'ms':>6} {'chunks':>7} {'windows':>8}")
+    totals = [0, 0]
+    for path in paths:
+        result = measure(path, args)
+        before, after = result["tokens"]
+        totals[0] += before
+        totals[1] += after
+        print(
+            f"{os.path.basename(path):<28} {before:>13d} {after:>6d} "
+            f"{1 - after / before:>6.0%} {result['ms']:>6.1f} "
+            f"{'%d->%d' % tuple(result['chunks']):>7} {'%d->%d' % tuple(result['windows']):>8}"
+        )
+    if paths:
+        print(f"{'total':<28} {totals[0]:>13d} {totals[1]:>6d} {1 - totals[1] / totals[0]:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
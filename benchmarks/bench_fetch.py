@@ -0,0 +1,40 @@
+"""Compare sequential WebBaseLoader fetching with the pooled async loader.
+
+Run with: python -m benchmarks.bench_fetch [--pages 70] [--delay 0.1]
+"""
+
+import argparse
+import time
+
+from benchmarks.fakes import make_page, serve_pages
+from src.search import GoogleSearchEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=70)
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    pages = {f"/offer/{i}": make_page(i) for i in range(args.pages)}
+    with serve_pages(pages, delay=args.delay) as base_url:
+        urls = [base_url + path for path in pages]
+        engine = GoogleSearchEngine(max_concurrency=args.concurrency, max_per_host=args.concurrency)
+
+        start = time.perf_counter()
+        for url in urls:
+            engine.load_documents(url)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        items = engine.load_source_content(urls)
+        concurrent = time.perf_counter() - start
+
+    print(f"pages: {len(urls)}, simulated latency: {args.delay * 1000:.0f} ms")
+    print(f"sequential WebBaseLoader: {sequential:.2f}s ({len(urls) / sequential:.1f} pages/s)")
+    print(f"pooled async loader:      {concurrent:.2f}s ({len(items) / concurrent:.1f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Memory and latency of the global VectorIndex against per-source SKLearnVectorStores.
+
+Uses random 768-dimensional vectors, 20 chunks per source and 21 questions,
+as in user_input.yaml. The per-source baseline is skipped above
+--baseline-max chunks because it takes minutes at 100k.
+Run with: python -m benchmarks.bench_index
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from langchain_community.vectorstores import SKLearnVectorStore
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.index import VectorIndex
+
+
+class LookupEmbeddings(Embeddings):
+    """Return precomputed vectors so only indexing and search are measured."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def measure(function):
+    """Return (seconds, peak MB); memory is traced in a second run to keep timings clean."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--chunks-per-source", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=21)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--baseline-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'index s':>9} {'index MB':>9} {'per-source s':>13} {'per-source MB':>14}")
+    for size in args.sizes:
+        texts = [f"chunk {i}" for i in range(size)]
+        questions = [f"question {i}" for i in range(args.questions)]
+        matrix = rng.standard_normal((size + args.questions, args.dimensions)).astype(np.float32)
+        vectors = dict(zip(texts + questions, matrix.tolist()))
+        embeddings = LookupEmbeddings(vectors)
+        source_chunks = {
+            f"source {s}": [Document(text) for text in texts[s : s + args.chunks_per_source]]
+            for s in range(0, size, args.chunks_per_source)
+        }
+        question_vectors = [vectors[q] for q in questions]
+
+        def global_index():
+            index = VectorIndex.from_sources(source_chunks, embeddings)
+            return index.search(question_vectors, k=3)
+
+        index_seconds, index_mb = measure(global_index)
+
+        def per_source():
+            for chunks in source_chunks.values():
+                retriever = SKLearnVectorStore.from_documents(chunks, embeddings).as_retriever(
+                    search_kwargs={"k": min(len(chunks), 3)}
+                )
+                for question in questions:
+                    retriever.invoke(question)
+
+        if size <= args.baseline_max:
+            baseline_seconds, baseline_mb = measure(per_source)
+            baseline = f"{baseline_seconds:13.2f} {baseline_mb:14.1f}"
+        else:
+            baseline = f"{'skipped':>13} {'':>14}"
+        print(f"{size:>8} {index_seconds:9.2f} {index_mb:9.1f} {baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark summarize_documents_map_reduce with a fixed-latency fake LLM.
+
+Runs a YouTube-transcript-sized input through the serial path (one call in
+flight, like the original implementation), the concurrent tree and the
+streaming variant. Tokens are words (WordEncoding) so only the LLM
+orchestration is measured.
+Run with: python -m benchmarks.bench_summary [--words 60000] [--latency 0.2]
+"""
+
+import argparse
+import time
+
+from langchain_core.documents import Document
+
+from benchmarks.fakes import FakeChatModel, WordEncoding
+from src.chunking import TokenChunker
+from src.llm import LLMHandler
+from src.processing import ContentProcessor
+
+
+def summary_responder(summary_words):
+    def respond(messages):
+        words = str(messages[-1].content).split()
+        return " ".join(words[-summary_words:])
+
+    return respond
+
+
+def run(label, documents, args, concurrency, stream):
+    llm = FakeChatModel(responder=summary_responder(args.summary_words), latency=args.latency)
+    handler = LLMHandler("ollama", "fake-model", max_concurrency=concurrency)
+    handler.llm = handler.llm_json = llm
+    encoding = WordEncoding()
+    chunker = TokenChunker(encoding, window_size=args.max_tokens, window_overlap=0)
+    processor = ContentProcessor(handler, args.max_tokens, stream_summary=stream, chunker=chunker)
+
+    start = time.perf_counter()
+    processor.summarize_documents_map_reduce(documents)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {elapsed:7.2f}s  LLM calls {llm.calls:3d}  "
+        f"tokenizer calls {encoding.encodes:4d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=60000)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--summary-words", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    transcript = " ".join(f"word{i % 5000}" for i in range(args.words))
+    documents = [Document(transcript)]
+    print(f"transcript: {args.words} words, window {args.max_tokens}, latency {args.latency}s")
+    run("serial", documents, args, 1, False)
+    run("concurrent tree", documents, args, args.concurrency, False)
+    run("concurrent streaming", documents, args, args.concurrency, True)
+
+
+if __name__ == "__main__":
+    main()
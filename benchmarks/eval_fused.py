@@ -0,0 +1,87 @@
+"""Compare the fused answer-and-verify call with the three-call chain.
+
+Both answer modes run over the fixed cases in benchmarks/fixtures/qa_fixtures.yaml
+with the chunks given as already graded relevant. The report shows how often the
+fused mode keeps or rejects an answer exactly like the chain, how often each
+mode matches the expected outcome, and their latency and LLM call counts.
+By default the LLM configured in config.py is used; --fake swaps in a
+deterministic keyword-matching model with a fixed latency.
+Run with: python -m benchmarks.eval_fused [--fake] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import yaml
+from langchain_core.documents import Document
+
+from benchmarks.fakes import FakeChatModel, keyword_responder
+from src.llm import LLMHandler
+from src.processing import ContentProcessor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "qa_fixtures.yaml")
+
+
+def make_handler(args):
+    if args.fake:
+        handler = LLMHandler("ollama", "fake-model")
+        handler.llm = handler.llm_json = FakeChatModel(
+            responder=keyword_responder, latency=args.latency
+        )
+        return handler
+    from config import LLM_PROVIDER, LLM_MODEL
+
+    return LLMHandler(LLM_PROVIDER, LLM_MODEL)
+
+
+async def run_mode(processor, cases):
+    """Answer every case one after the other; return the answers and per-case latencies."""
+    answer = processor.aanswer_fused if processor.answer_mode == "fused" else processor.aanswer_chain
+    answers, latencies = [], []
+    for case in cases:
+        chunks = [Document(page_content=text) for text in case["context"]]
+        start = time.perf_counter()
+        answers.append(await answer(case["question"], chunks))
+        latencies.append(time.perf_counter() - start)
+    return answers, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--fake", action="store_true", help="use the keyword-matching fake LLM")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(args.fixtures, "r") as file:
+        cases = yaml.safe_load(file)
+
+    results = {}
+    for mode in ("chain", "fused"):
+        handler = make_handler(args)
+        processor = ContentProcessor(handler, args.max_tokens, answer_mode=mode)
+        answers, latencies = asyncio.run(run_mode(processor, cases))
+        results[mode] = answers
+        correct = sum((a is not None) == case["expected"] for a, case in zip(answers, cases))
+        print(
+            f"{mode:<6} answered {sum(a is not None for a in answers):2d}/{len(cases)}  "
+            f"matches expected {correct:2d}/{len(cases)}  "
+            f"mean latency {sum(latencies) / len(latencies):6.2f}s  "
+            f"total {sum(latencies):6.2f}s  LLM calls {handler.calls:3d}"
+        )
+
+    agreeing = sum(
+        (chain is None) == (fused is None)
+        for chain, fused in zip(results["chain"], results["fused"])
+    )
+    print(f"keep/reject agreement between modes: {agreeing}/{len(cases)} ({agreeing / len(cases):.0%})")
+    for case, chain, fused in zip(cases, results["chain"], results["fused"]):
+        if (chain is None) != (fused is None):
+            print(f"  disagreement on {case['question']!r}: chain={chain!r} fused={fused!r}")
+
+
+if __name__ == "__main__":
+    main()
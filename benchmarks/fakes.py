@@ -0,0 +1,338 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from src.search import BaseSearchEngine, GoogleSearchEngine
+
+
+def make_page(index, paragraphs=20):
+    """Return a synthetic job-offer-like HTML page."""
+    body = "\n".join(
+        f"<p>Paragraph {i} of offer {index}: Python, Docker and SQL experience.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        f"<html lang='en'><head><title>Offer {index}</title></head>"
+        f"<body><h1>Offer {index}</h1>{body}</body></html>"
+    )
+
+
+SKILLS = [
+    "Python", "PyTorch", "TensorFlow", "Docker", "GitHub Actions", "CI/CD", "FastAPI",
+    "Streamlit", "Pandas", "Numpy", "SQL", "LangChain", "Matplotlib", "Plotly", "Git",
+]
+
+
+def make_offer_page(index, paragraphs=8):
+    """Return a job-offer page with navigation, a cookie banner and a footer.
+
+    Each offer asks for a different, deterministic subset of SKILLS, and
+    every third offer is remote, so questions get varied answers.
+    """
+    rng = random.Random(index)
+    skills = rng.sample(SKILLS, rng.randint(3, 8))
+    location = "This is a remote job." if index % 3 == 0 else "The job is on site in Berlin."
+    body = "\n".join(
+        f"<p>Offer {index}, part {i}: you will work with {skills[i % len(skills)]} "
+        f"on project {rng.randint(1, 10**6)}, together with team {rng.choice('ABCDEFGH')}.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        f"<html lang='en'><head><title>Engineer offer {index}</title></head><body>"
+        "<div class='cookie-banner'><p>We use cookies to improve your experience.</p></div>"
+        "<nav><a href='/'>Jobs</a> <a href='/companies'>Companies</a></nav>"
+        f"<main><h1>Engineer offer {index}</h1>"
+        f"<p>{location} Required skills: {', '.join(skills)}.</p>{body}</main>"
+        "<footer><a href='/privacy'>Privacy</a> <a href='/terms'>Terms</a></footer></body></html>"
+    )
+
+
+@contextmanager
+def serve_pages(pages, delay=0.0, failures=None, request_log=None):
+    """Serve a {path: html} mapping from a local HTTP server.
+
+    Each request sleeps for `delay` seconds to stand in for network latency.
+    `failures` maps a path to the number of 503 responses returned before
+    the page is served, to exercise retry logic. Pages carry an ETag and
+    answer matching conditional requests with 304. When `request_log` is a
+    list, (path, status) is appended for every request. Yields the base URL.
+    """
+    failures = dict(failures or {})
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def respond(self, status):
+            self.send_response(status)
+            if request_log is not None:
+                request_log.append((self.path, status))
+
+        def do_GET(self):
+            time.sleep(delay)
+            with lock:
+                remaining = failures.get(self.path, 0)
+                if remaining:
+                    failures[self.path] = remaining - 1
+            if remaining:
+                self.respond(503)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            html = pages.get(self.path)
+            if html is None:
+                self.respond(404)
+                self.end_headers()
+                return
+            body = html.encode("utf-8")
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.respond(304)
+                self.end_headers()
+                return
+            self.respond(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic CPU stand-in for the Nomic embedder.
+
+    Vectors are derived from hashed word counts, so texts sharing words are
+    close in cosine space. `latency` seconds are slept per embedder call and
+    `calls` counts those calls.
+    """
+
+    def __init__(self, dimensions=256, latency=0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+
+    def vector(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.strip(".,?!:;").encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class WordEncoding:
+    """Download-free stand-in for a tiktoken encoding: one token per word.
+
+    A token is a word with its following whitespace, so decoding the tokens
+    gives back the text. `encodes` counts encode calls.
+    """
+
+    def __init__(self):
+        self.encodes = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.encodes += 1
+        return re.findall(r"\s+\S*\s*|\S+\s*", text)
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token)
+        return "".join(tokens), offsets
+
+
+def default_responder(messages):
+    """Answer JSON-mode prompts with a positive grade and text prompts with a short answer."""
+    prompt = "\n".join(str(message.content) for message in messages)
+    if "JSON" in prompt:
+        return '{"binary_score": "yes"}'
+    return "Yes, the context mentions it."
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model with a fixed per-call latency.
+
+    `responder` maps the list of input messages to the response text. Sync
+    calls sleep and async calls await `latency` seconds; `calls` counts
+    invocations. Token counts are whitespace word counts.
+    """
+
+    responder: Callable = default_responder
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def respond(self, messages):
+        self.calls += 1
+        content = self.responder(messages)
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(content.split())
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self.respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.respond(messages)
+
+    def get_num_tokens(self, text):
+        return len(text.split())
+
+
+STOP_WORDS = {"is", "are", "this", "a", "an", "the", "there", "it"}
+
+
+def question_keyword(question):
+    """Return the technology a yes/no question asks about ('Is Docker required?' -> 'docker')."""
+    words = [word.strip("?.,").lower() for word in question.split()]
+    return next((word for word in words if word not in STOP_WORDS), "")
+
+
+def between(text, start, end=None):
+    text = text.split(start, 1)[1] if start in text else text
+    return text.split(end, 1)[0] if end and end in text else text
+
+
+def keyword_answer(question, context):
+    keyword = question_keyword(question)
+    if keyword and keyword in context.lower():
+        return f"Yes, the offer mentions {keyword}."
+    return f"The context does not mention {keyword}."
+
+
+def keyword_responder(messages):
+    """Deterministic stand-in for the LLM that 'reads' prompts by keyword matching.
+
+    It recognises every prompt ContentProcessor sends: a chunk is relevant
+    when it contains the question's keyword, answers say whether the keyword
+    is mentioned, verifiers accept answers that found it, and summaries
+    echo the first words of their input.
+    """
+    prompt = "\n".join(str(message.content) for message in messages)
+    if "'answers'" in prompt:
+        context = between(prompt, "Context:", "Questions:")
+        questions = [
+            line.split(".", 1)[1].strip()
+            for line in between(prompt, "Questions:", "Return JSON").splitlines()
+            if line.strip()[:1].isdigit()
+        ]
+        answers = {}
+        for number, question in enumerate(questions, 1):
+            answer = keyword_answer(question, context)
+            answers[str(number)] = None if "does not mention" in answer else answer
+        return json.dumps({"answers": answers})
+    if "'grounded'" in prompt:
+        context = between(prompt, "Context:", "Question:")
+        question = between(prompt, "Question:", "Answer the question").strip()
+        answer = keyword_answer(question, context)
+        found = "does not mention" not in answer
+        return json.dumps(
+            {"answer": answer, "meaningful": "yes" if found else "no", "grounded": "yes"}
+        )
+    if "'scores'" in prompt:
+        question = between(prompt, "Question:", "For each document").strip()
+        documents = between(prompt, "Document 1:", "Question:").split("Document ")
+        keyword = question_keyword(question)
+        return json.dumps(
+            {"scores": ["yes" if keyword in doc.lower() else "no" for doc in documents]}
+        )
+    if "'binary_score' with value 'yes' or 'no'." in prompt and "Document:" in prompt:
+        document = between(prompt, "Document:", "Question:")
+        question = between(prompt, "Question:", "Does the document").strip()
+        keyword = question_keyword(question)
+        relevant = bool(keyword) and keyword in document.lower()
+        return json.dumps({"binary_score": "yes" if relevant else "no"})
+    if "You are an assistant for answering questions." in prompt:
+        context = between(prompt, "Context:", "Question:")
+        question = between(prompt, "Question:", "Provide a concise").strip()
+        return keyword_answer(question, context)
+    if "Student's Answer" in prompt:
+        return json.dumps({"binary_score": "yes", "explanation": "Grounded."})
+    if "meaningful information" in prompt:
+        answer = between(prompt, "Answer:", "Does the answer")
+        meaningful = "does not mention" not in answer
+        return json.dumps({"binary_score": "yes" if meaningful else "no"})
+    return " ".join(prompt.split()[-40:])
+
+
+class FakeSearchEngine(BaseSearchEngine):
+    """Search engine serving the documents of source_items, loading each page after `delay` seconds."""
+
+    def __init__(self, source_items, delay=0.0, max_concurrency=2, checkpoint=None):
+        super().__init__(max_concurrency=max_concurrency, checkpoint=checkpoint)
+        self.pages = {item["url"]: item["documents"] for item in source_items.values()}
+        self.delay = delay
+        self.loaded = 0
+
+    def search_query(self, query, max_sources, time_horizon):
+        return list(self.pages)[:max_sources]
+
+    def load_documents(self, url):
+        time.sleep(self.delay)
+        self.loaded += 1
+        return self.pages[url]
+
+
+class LocalSearchEngine(GoogleSearchEngine):
+    """GoogleSearchEngine whose search API answers from a {query: [url, ...]} mapping.
+
+    Each query takes `query_latency` seconds and unknown queries return
+    nothing. Result pages are fetched over HTTP like real results, so they
+    can be served locally with serve_pages.
+    """
+
+    def __init__(self, results, query_latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.results = results
+        self.query_latency = query_latency
+
+    def search_query(self, query, max_sources, time_horizon):
+        time.sleep(self.query_latency)
+        return self.results.get(query, [])[:max_sources]
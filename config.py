@@ -10,3 +10,52 @@ LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", 7500))
 OUTPUT_FOLDER = os.getenv(
     "OUTPUT_FOLDER", "./runs"
 )
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", 16))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", 4))
+FETCH_TIMEOUT = int(os.getenv("FETCH_TIMEOUT", 20))
+FETCH_MAX_RETRIES = int(os.getenv("FETCH_MAX_RETRIES", 3))
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", 4))
+SEARCH_RATE_LIMIT = float(os.getenv("SEARCH_RATE_LIMIT", 5))
+CACHE_DIR = os.getenv("CACHE_DIR", "./.cache")
+DOCUMENT_CACHE_TTL_HOURS = float(os.getenv("DOCUMENT_CACHE_TTL_HOURS", 24))
+DOCUMENT_CACHE_MAX_MB = int(os.getenv("DOCUMENT_CACHE_MAX_MB", 512))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text-v1.5")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 1024))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", 168))
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "true").lower() == "true"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+BATCH_GRADING = os.getenv("BATCH_GRADING", "false").lower() == "true"
+PREFILTER_LOWER = os.getenv("PREFILTER_LOWER")
+PREFILTER_UPPER = os.getenv("PREFILTER_UPPER")
+PREFILTER = (
+    (float(PREFILTER_LOWER), float(PREFILTER_UPPER))
+    if PREFILTER_LOWER and PREFILTER_UPPER
+    else None
+)
+PREFILTER_CALIBRATE = os.getenv("PREFILTER_CALIBRATE", "false").lower() == "true"
+SUMMARY_STREAMING = os.getenv("SUMMARY_STREAMING", "false").lower() == "true"
+# "all" or "extractive" (LLM summaries for the top sources only).
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "all")
+EARLY_TERMINATION = os.getenv("EARLY_TERMINATION", "false").lower() == "true"
+MAX_CONCURRENT_SOURCES = int(os.getenv("MAX_CONCURRENT_SOURCES", 4))
+ANSWER_MODE = os.getenv("ANSWER_MODE", "chain")
+STREAMING_PIPELINE = os.getenv("STREAMING_PIPELINE", "false").lower() == "true"
+CHECKPOINTS = os.getenv("CHECKPOINTS", "true").lower() == "true"
+BATCH_MAX_CONFIGS = int(os.getenv("BATCH_MAX_CONFIGS", 4))
+INCREMENTAL = os.getenv("INCREMENTAL", "false").lower() == "true"
+NEAR_DUPLICATE_DISTANCE = int(os.getenv("NEAR_DUPLICATE_DISTANCE", 3))
+CONTENT_EXTRACTION = os.getenv("CONTENT_EXTRACTION", "true").lower() == "true"
+# Extracted and full-page documents are cached apart so switching modes never mixes them.
+DOCUMENT_CACHE_FILE = "documents.sqlite" if CONTENT_EXTRACTION else "documents_raw.sqlite"
+YOUTUBE_TRANSCRIPT_WORKERS = int(os.getenv("YOUTUBE_TRANSCRIPT_WORKERS", 8))
+TRACING = os.getenv("TRACING", "true").lower() == "true"
+TRACE_CHROME = os.getenv("TRACE_CHROME", "false").lower() == "true"
+APP_MAX_JOBS = int(os.getenv("APP_MAX_JOBS", 2))
+# The app shows partial results from results.jsonl, written by the streaming pipeline
+# (not used for INCREMENTAL runs, which it does not support).
+APP_STREAMING_PIPELINE = os.getenv("APP_STREAMING_PIPELINE", "true").lower() == "true"
+APP_REFRESH_SECONDS = float(os.getenv("APP_REFRESH_SECONDS", 1.0))
+APP_LOG_MAX_MB = int(os.getenv("APP_LOG_MAX_MB", 10))
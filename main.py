@@ -1,12 +1,144 @@
+import argparse
+import logging
+import os
 from src.processing import ContentProcessor
-from src.utils import save_results, create_output_directory, load_config
+from src.pipeline import StreamingPipeline
+from src.utils import save_results, save_yaml, create_output_directory, load_config
 from src.search import get_search_engine
-from config import OUTPUT_FOLDER, LLM_PROVIDER, LLM_MODEL, LLM_MAX_TOKENS
+from src.cache import DocumentCache, LLMCache
+from src.checkpoint import Checkpoint
+from src.incremental import SeenIndex
+from src.tracing import Tracer, tracing
+from src.embeddings import get_embeddings
+from config import (
+    OUTPUT_FOLDER,
+    LLM_PROVIDER,
+    LLM_MODEL,
+    LLM_MAX_TOKENS,
+    FETCH_MAX_CONCURRENCY,
+    FETCH_MAX_PER_HOST,
+    FETCH_TIMEOUT,
+    FETCH_MAX_RETRIES,
+    SEARCH_MAX_WORKERS,
+    SEARCH_RATE_LIMIT,
+    CACHE_DIR,
+    DOCUMENT_CACHE_TTL_HOURS,
+    DOCUMENT_CACHE_MAX_MB,
+    EMBEDDING_MODEL,
+    EMBEDDING_DEVICE,
+    EMBEDDING_BATCH_SIZE,
+    LLM_CACHE_SIZE,
+    LLM_CACHE_TTL_HOURS,
+    LLM_CACHE_PERSIST,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    BATCH_GRADING,
+    PREFILTER,
+    PREFILTER_CALIBRATE,
+    SUMMARY_STREAMING,
+    SUMMARY_MODE,
+    EARLY_TERMINATION,
+    MAX_CONCURRENT_SOURCES,
+    ANSWER_MODE,
+    STREAMING_PIPELINE,
+    CHECKPOINTS,
+    INCREMENTAL,
+    NEAR_DUPLICATE_DISTANCE,
+    CONTENT_EXTRACTION,
+    DOCUMENT_CACHE_FILE,
+    YOUTUBE_TRANSCRIPT_WORKERS,
+    TRACING,
+    TRACE_CHROME,
+)
 from src.llm import LLMHandler
 
 
-def main(config_file_name):
-    input_user = load_config(config_file_name)
+def create_resources():
+    """Build the objects runs can share: document cache, LLM handler and embeddings."""
+    document_cache = DocumentCache(
+        os.path.join(CACHE_DIR, DOCUMENT_CACHE_FILE),
+        ttl=DOCUMENT_CACHE_TTL_HOURS * 3600,
+        max_bytes=DOCUMENT_CACHE_MAX_MB * 1024 * 1024,
+    )
+    llm_cache = LLMCache(
+        os.path.join(CACHE_DIR, "llm.sqlite") if LLM_CACHE_PERSIST else None,
+        max_entries=LLM_CACHE_SIZE,
+        ttl=LLM_CACHE_TTL_HOURS * 3600,
+    )
+    llm_handler = LLMHandler(
+        LLM_PROVIDER, LLM_MODEL, llm_cache, LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES
+    )
+    embeddings = get_embeddings(
+        EMBEDDING_MODEL,
+        EMBEDDING_DEVICE,
+        os.path.join(CACHE_DIR, "embeddings.sqlite"),
+        EMBEDDING_BATCH_SIZE,
+    )
+    return {
+        "document_cache": document_cache,
+        "llm_handler": llm_handler,
+        "embeddings": embeddings,
+    }
+
+
+def build_search_engine(platform, document_cache, checkpoint=None):
+    return get_search_engine(
+        platform,
+        max_concurrency=FETCH_MAX_CONCURRENCY,
+        max_per_host=FETCH_MAX_PER_HOST,
+        timeout=FETCH_TIMEOUT,
+        max_retries=FETCH_MAX_RETRIES,
+        query_workers=SEARCH_MAX_WORKERS,
+        query_rate=SEARCH_RATE_LIMIT,
+        cache=document_cache,
+        checkpoint=checkpoint,
+        near_duplicate_distance=NEAR_DUPLICATE_DISTANCE,
+        extract_content=CONTENT_EXTRACTION,
+        transcript_workers=YOUTUBE_TRANSCRIPT_WORKERS,
+    )
+
+
+def build_content_processor(llm_handler, embeddings, checkpoint=None):
+    return ContentProcessor(
+        llm_handler,
+        LLM_MAX_TOKENS,
+        embeddings,
+        batch_grading=BATCH_GRADING,
+        prefilter=PREFILTER,
+        calibrate_prefilter=PREFILTER_CALIBRATE,
+        stream_summary=SUMMARY_STREAMING,
+        summary_mode=SUMMARY_MODE,
+        early_termination=EARLY_TERMINATION,
+        max_concurrent_sources=MAX_CONCURRENT_SOURCES,
+        answer_mode=ANSWER_MODE,
+        checkpoint=checkpoint,
+    )
+
+
+def save_run(processed_items, output_dir, content_processor, tracer=None):
+    """Write the results, the prefilter calibration and the trace of a run."""
+    save_results(processed_items, output_dir)
+    if PREFILTER_CALIBRATE:
+        save_yaml(
+            content_processor.prefilter_calibration_report(),
+            output_dir,
+            "prefilter_calibration.yaml",
+        )
+    if tracer is not None:
+        tracer.save(output_dir, TRACE_CHROME)
+
+
+def run_search(
+    input_user, output_dir, resources=None, tracer=None, streaming=STREAMING_PIPELINE
+):
+    """Run one search configuration in `output_dir` and return its processed items.
+
+    `resources` are the shared objects of create_resources, built for this
+    run when not given. The search engine and content processor hold the
+    state of one run, such as its checkpoint, so they are always built here.
+    The run is traced on `tracer`, or on a new Tracer when TRACING is on.
+    INCREMENTAL runs always take the non-streaming path.
+    """
     queries = input_user.get("SEARCH_QUERIES")
     max_sources = input_user.get("MAX_SOURCES_PER_SEARCH_QUERY")
     time_horizon = input_user.get("TIME_HORIZON_DAYS")
@@ -14,21 +146,65 @@ def main(config_file_name):
     max_top_sources = input_user.get("MAX_TOP_SOURCES")
     platform = input_user.get("PLATFORM")
 
-    search_engine = get_search_engine(platform)
-    llm_handler = LLMHandler(LLM_PROVIDER, LLM_MODEL)
-    content_processor = ContentProcessor(llm_handler, LLM_MAX_TOKENS)
+    save_yaml(input_user, output_dir, "config.yaml")
+    resources = resources or create_resources()
+    checkpoint = Checkpoint(output_dir) if CHECKPOINTS else None
+    search_engine = build_search_engine(platform, resources["document_cache"], checkpoint)
+    content_processor = build_content_processor(
+        resources["llm_handler"], resources["embeddings"], checkpoint
+    )
+
+    if streaming and INCREMENTAL:
+        logging.warning(
+            "The streaming pipeline does not support incremental runs, "
+            "processing the sources in one batch instead"
+        )
+        streaming = False
+    if tracer is None and TRACING:
+        tracer = Tracer()
+    with tracing(tracer):
+        if streaming:
+            pipeline = StreamingPipeline(
+                search_engine, content_processor, output_dir, MAX_CONCURRENT_SOURCES
+            )
+            processed_items = pipeline.run(
+                queries, max_sources, time_horizon, content_questions, max_top_sources
+            )
+        else:
+            urls = search_engine.iter_urls(queries, max_sources, time_horizon)
+            source_items = search_engine.load_source_content(urls)
 
-    urls = search_engine.fetch_urls(queries, max_sources, time_horizon)
-    source_items = search_engine.load_source_content(urls)
+            if INCREMENTAL:
+                processed_items = content_processor.process_incremental(
+                    source_items,
+                    content_questions,
+                    max_top_sources,
+                    SeenIndex(os.path.join(CACHE_DIR, "seen.sqlite")),
+                )
+            else:
+                processed_items = content_processor.process_content(
+                    source_items, content_questions, max_top_sources
+                )
 
-    processed_items = content_processor.process_content(
-        source_items, content_questions, max_top_sources
-    )
+    save_run(processed_items, output_dir, content_processor, tracer if TRACING else None)
+    return processed_items
 
-    output_dir = create_output_directory(OUTPUT_FOLDER)
-    save_results(processed_items, output_dir)
+
+def main(config_file_name, output_dir=None):
+    """Run one search configuration; resume the run in `output_dir` when given."""
+    if output_dir is not None and os.path.exists(os.path.join(output_dir, "config.yaml")):
+        config_file_name = os.path.join(output_dir, "config.yaml")
+    input_user = load_config(config_file_name)
+    run_search(input_user, output_dir or create_output_directory(OUTPUT_FOLDER))
 
 
 if __name__ == "__main__":
-    config_file_name ="user_input.yaml"
-    main(config_file_name)
+    parser = argparse.ArgumentParser(description="Run a wide search.")
+    parser.add_argument("config_file_name", nargs="?", default="user_input.yaml")
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_DIR",
+        help="resume an interrupted run, skipping work recorded in its checkpoint",
+    )
+    args = parser.parse_args()
+    main(args.config_file_name, args.resume)
@@ -1,40 +1,132 @@
+import argparse
+import asyncio
+import logging
 import os
 import glob
-from src.processing import ContentProcessor
-from src.utils import save_results, create_output_directory, load_config
-from src.search import get_search_engine
-from config import OUTPUT_FOLDER, LLM_PROVIDER, LLM_MODEL, LLM_MAX_TOKENS
-from src.llm import LLMHandler
-
-
-def main(config_file_name):
-    input_user = load_config(config_file_name)
-    queries = input_user.get("SEARCH_QUERIES")
-    max_sources = input_user.get("MAX_SOURCES_PER_SEARCH_QUERY")
-    time_horizon = input_user.get("TIME_HORIZON_DAYS")
-    content_questions = input_user.get("CONTENT_QUESTIONS")
-    max_top_sources = input_user.get("MAX_TOP_SOURCES")
-    platform = input_user.get("PLATFORM")
-
-    search_engine = get_search_engine(platform)
-    llm_handler = LLMHandler(LLM_PROVIDER, LLM_MODEL)
-    content_processor = ContentProcessor(llm_handler, LLM_MAX_TOKENS)
-
-    urls = search_engine.fetch_urls(queries, max_sources, time_horizon)
-    source_items = search_engine.load_source_content(urls)
-
-    processed_items = content_processor.process_content(
-        source_items, content_questions, max_top_sources
+from contextlib import AsyncExitStack
+from src.utils import save_yaml, create_output_directory, load_config
+from src.checkpoint import Checkpoint
+from src.incremental import SeenIndex
+from src.tracing import Tracer, tracing
+from config import (
+    OUTPUT_FOLDER,
+    CACHE_DIR,
+    CHECKPOINTS,
+    INCREMENTAL,
+    TRACING,
+    BATCH_MAX_CONFIGS,
+)
+from main import (
+    main,
+    create_resources,
+    build_search_engine,
+    build_content_processor,
+    save_run,
+)
+
+
+def run_batch(config_files):
+    """Run all configurations together, sharing engines, caches and the LLM budget.
+
+    Each configuration gets a subdirectory of one batch output directory,
+    named after its file.
+    """
+    configs = {
+        os.path.splitext(os.path.basename(config_file))[0]: load_config(config_file)
+        for config_file in config_files
+    }
+    batch_dir = create_output_directory(OUTPUT_FOLDER)
+    resources = create_resources()
+    search_engines = {
+        platform: build_search_engine(platform, resources["document_cache"])
+        for platform in {config.get("PLATFORM") for config in configs.values()}
+    }
+
+    def make_processor(checkpoint):
+        return build_content_processor(
+            resources["llm_handler"], resources["embeddings"], checkpoint
+        )
+
+    seen_index = SeenIndex(os.path.join(CACHE_DIR, "seen.sqlite")) if INCREMENTAL else None
+    asyncio.run(
+        arun_batch(
+            configs, batch_dir, search_engines, make_processor, BATCH_MAX_CONFIGS, seen_index
+        )
     )
+    return batch_dir
+
 
-    output_dir = create_output_directory(OUTPUT_FOLDER)
-    save_results(processed_items, output_dir)
+async def arun_batch(
+    configs, batch_dir, search_engines, make_processor, max_parallel=4, seen_index=None
+):
+    """Run {name: config} with at most `max_parallel` configurations in flight.
+
+    All runs share the event loop and the LLM handler's process-wide
+    per-provider concurrency limit. Inside the engines' shared_work
+    blocks, queries and page loads common to several configurations happen
+    once. Identical LLM prompts are answered once by the shared cache and
+    in-flight deduplication. With a `seen_index`, runs are incremental.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(name, input_user):
+        async with semaphore:
+            print(f"Processing configuration: {name}")
+            output_dir = os.path.join(batch_dir, name)
+            os.makedirs(output_dir, exist_ok=True)
+            save_yaml(input_user, output_dir, "config.yaml")
+            content_processor = make_processor(Checkpoint(output_dir) if CHECKPOINTS else None)
+            search_engine = search_engines[input_user.get("PLATFORM")]
+            tracer = Tracer() if TRACING else None
+            with tracing(tracer):
+                urls = await asyncio.to_thread(
+                    search_engine.fetch_urls,
+                    input_user.get("SEARCH_QUERIES"),
+                    input_user.get("MAX_SOURCES_PER_SEARCH_QUERY"),
+                    input_user.get("TIME_HORIZON_DAYS"),
+                )
+                source_items = await search_engine.aload_source_content(urls)
+                if seen_index is not None:
+                    processed_items = await content_processor.aprocess_incremental(
+                        source_items,
+                        input_user.get("CONTENT_QUESTIONS"),
+                        input_user.get("MAX_TOP_SOURCES"),
+                        seen_index,
+                    )
+                else:
+                    processed_items = await content_processor.aprocess_content(
+                        source_items,
+                        input_user.get("CONTENT_QUESTIONS"),
+                        input_user.get("MAX_TOP_SOURCES"),
+                    )
+            save_run(processed_items, output_dir, content_processor, tracer)
+
+    async def run_safely(name, input_user):
+        try:
+            await run(name, input_user)
+        except Exception:
+            logging.exception(f"Error processing configuration {name}")
+
+    async with AsyncExitStack() as stack:
+        for search_engine in search_engines.values():
+            await stack.enter_async_context(search_engine.shared_work())
+        await asyncio.gather(*(run_safely(name, config) for name, config in configs.items()))
 
 
 if __name__ == "__main__":
-    config_folder = "user_input_job_offers"
-    config_files = glob.glob(os.path.join(config_folder, "*.yaml"))
+    parser = argparse.ArgumentParser(description="Run every configuration in a folder.")
+    parser.add_argument("config_folder", nargs="?", default="user_input_job_offers")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="run all configurations together on shared engines, caches and LLM budget",
+    )
+    args = parser.parse_args()
+    config_files = glob.glob(os.path.join(args.config_folder, "*.yaml"))
     config_files.sort()
-    for config_file_name in config_files:
-        print(f"Processing configuration file: {config_file_name}")
-        main(config_file_name)
+    if args.batch:
+        run_batch(config_files)
+    else:
+        for config_file_name in config_files:
+            print(f"Processing configuration file: {config_file_name}")
+            main(config_file_name)
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.documents import Document
+from src.utils import normalize_url
+
+
+class CacheEntry:
+    """Cached documents for one URL together with their HTTP validators."""
+
+    def __init__(self, documents, etag, last_modified, stored_at, fresh):
+        self.documents = documents
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.fresh = fresh
+
+
+class DocumentCache:
+    """On-disk cache of loaded documents keyed by a hash of the normalized URL.
+
+    Entries older than `ttl` seconds are reported as stale so the caller can
+    revalidate them; the least recently used entries are evicted once the
+    stored payloads exceed `max_bytes`.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, max_bytes=512 * 1024 * 1024):
+        """Open (and create if needed) the SQLite cache file at `path`."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                payload TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )"""
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(url):
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """Return the CacheEntry for a URL, or None when it was never stored."""
+        key = self.make_key(url)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT payload, etag, last_modified, stored_at FROM documents WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.connection.execute(
+                "UPDATE documents SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.connection.commit()
+        payload, etag, last_modified, stored_at = row
+        fresh = time.time() - stored_at < self.ttl
+        self.stats["hits" if fresh else "stale"] += 1
+        documents = [Document(**document) for document in json.loads(payload)]
+        return CacheEntry(documents, etag, last_modified, stored_at, fresh)
+
+    def put(self, url, documents, etag=None, last_modified=None):
+        """Store documents for a URL and evict old entries beyond the size limit."""
+        payload = json.dumps(
+            [
+                {"page_content": document.page_content, "metadata": document.metadata}
+                for document in documents
+            ]
+        )
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(url),
+                    url,
+                    payload,
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                    len(payload.encode("utf-8")),
+                ),
+            )
+            self.evict()
+            self.connection.commit()
+
+    def refresh(self, url):
+        """Mark a stale entry as fresh again after the server confirmed it is unchanged."""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE documents SET stored_at = ? WHERE key = ?",
+                (time.time(), self.make_key(url)),
+            )
+            self.connection.commit()
+        self.stats["revalidated"] += 1
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM documents"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT key, size FROM documents ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM documents WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def log_stats(self):
+        logging.info(f"Document cache stats: {self.stats}")
+
+
+class LLMCache:
+    """Two-level cache of LLM responses: an in-memory LRU and an optional SQLite file.
+
+    Values must be JSON-serializable. Entries older than `ttl` seconds are
+    ignored; the memory level keeps at most `max_entries` items and the disk
+    level at most `max_disk_entries`, dropping the oldest first.
+    """
+
+    def __init__(self, path=None, max_entries=1024, ttl=7 * 24 * 3600, max_disk_entries=100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.memory = OrderedDict()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.connection = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)"
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def make_key(provider, model, mode, messages):
+        """Hash the provider, model, mode and message contents into a cache key."""
+        if isinstance(messages, str):
+            messages = [messages]
+        serialized = [
+            [getattr(message, "type", "human"), getattr(message, "content", message)]
+            for message in messages
+        ]
+        payload = json.dumps([provider, model, mode, serialized], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss."""
+        now = time.time()
+        with self.lock:
+            if key in self.memory:
+                value, stored_at = self.memory[key]
+                if now - stored_at < self.ttl:
+                    self.memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self.memory[key]
+            if self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    value = json.loads(row[0])
+                    self.remember(key, value, row[1])
+                    self.stats["disk_hits"] += 1
+                    return value
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        """Store a value in memory and, when configured, on disk."""
+        now = time.time()
+        with self.lock:
+            self.remember(key, value, now)
+            if self.connection is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now),
+                )
+                self.puts += 1
+                if self.puts % 100 == 0:
+                    self.connection.execute(
+                        """DELETE FROM responses WHERE key IN (
+                            SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                        )""",
+                        (self.max_disk_entries,),
+                    )
+                self.connection.commit()
+
+    def remember(self, key, value, stored_at):
+        self.memory[key] = (value, stored_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def log_stats(self):
+        logging.info(f"LLM cache stats: {self.stats}")
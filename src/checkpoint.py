@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from langchain_core.documents import Document
+
+
+class Checkpoint:
+    """Per-run record of finished work, stored as checkpoint.sqlite in the run directory.
+
+    It keeps the searched URLs, the documents loaded per URL, the answer (or
+    absence of one) per (URL, question) and the summary per URL. Each item is
+    committed as soon as it is produced, so a crashed run can be resumed from
+    its run directory and only redo the work that was not finished.
+    """
+
+    def __init__(self, run_dir):
+        os.makedirs(run_dir, exist_ok=True)
+        self.path = os.path.join(run_dir, "checkpoint.sqlite")
+        self.stats = {"replayed": 0, "recorded": 0}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.connection.executescript(
+            """CREATE TABLE IF NOT EXISTS urls (position INTEGER PRIMARY KEY, url TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS documents (url TEXT PRIMARY KEY, payload TEXT);
+            CREATE TABLE IF NOT EXISTS answers (
+                url TEXT, question TEXT, answer TEXT, PRIMARY KEY (url, question)
+            );
+            CREATE TABLE IF NOT EXISTS summaries (url TEXT PRIMARY KEY, summary TEXT);"""
+        )
+        self.connection.commit()
+
+    def write(self, statement, parameters):
+        with self.lock:
+            self.connection.execute(statement, parameters)
+            self.connection.commit()
+        self.stats["recorded"] += 1
+
+    def read(self, statement, parameters=()):
+        with self.lock:
+            return self.connection.execute(statement, parameters).fetchall()
+
+    def urls(self):
+        """Return the URLs of a completed search, or None if the search did not finish."""
+        if not self.read("SELECT value FROM meta WHERE key = 'urls_complete'"):
+            return None
+        urls = [url for (url,) in self.read("SELECT url FROM urls ORDER BY position")]
+        self.stats["replayed"] += 1
+        return urls
+
+    def record_urls(self, urls):
+        """Yield URLs from a search stream while recording them."""
+        with self.lock:
+            self.connection.execute("DELETE FROM urls")
+            self.connection.commit()
+        for position, url in enumerate(urls):
+            self.write("INSERT INTO urls VALUES (?, ?)", (position, url))
+            yield url
+        self.write("INSERT OR REPLACE INTO meta VALUES ('urls_complete', '1')", ())
+
+    def get_documents(self, url):
+        """Return the recorded documents of a URL, or None."""
+        rows = self.read("SELECT payload FROM documents WHERE url = ?", (url,))
+        if not rows:
+            return None
+        self.stats["replayed"] += 1
+        return [Document(**document) for document in json.loads(rows[0][0])]
+
+    def put_documents(self, url, documents):
+        payload = json.dumps(
+            [
+                {"page_content": document.page_content, "metadata": document.metadata}
+                for document in documents
+            ]
+        )
+        self.write("INSERT OR REPLACE INTO documents VALUES (?, ?)", (url, payload))
+
+    def get_answer(self, url, question):
+        """Return (found, answer); answer is None for questions that produced no answer."""
+        rows = self.read(
+            "SELECT answer FROM answers WHERE url = ? AND question = ?", (url, question)
+        )
+        if not rows:
+            return False, None
+        self.stats["replayed"] += 1
+        return True, rows[0][0]
+
+    def put_answer(self, url, question, answer):
+        self.write("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", (url, question, answer))
+
+    def get_summary(self, url):
+        rows = self.read("SELECT summary FROM summaries WHERE url = ?", (url,))
+        if not rows:
+            return None
+        self.stats["replayed"] += 1
+        return rows[0][0]
+
+    def put_summary(self, url, summary):
+        self.write("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (url, summary))
+
+    def log_stats(self):
+        logging.info(f"Checkpoint stats: {self.stats}")
@@ -0,0 +1,151 @@
+import logging
+import threading
+from collections import OrderedDict
+import tiktoken
+from langchain_core.documents import Document
+
+# Encoding of RecursiveCharacterTextSplitter.from_tiktoken_encoder and of the
+# default get_num_tokens of LangChain models.
+ENCODING_NAME = "gpt2"
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(name=ENCODING_NAME):
+    """Return the process-wide tiktoken encoding of a name, loading it once."""
+    with _encodings_lock:
+        if name not in _encodings:
+            _encodings[name] = tiktoken.get_encoding(name)
+        return _encodings[name]
+
+
+class TokenChunker:
+    """Cuts retrieval chunks and summary windows from one tokenization per text.
+
+    The character offsets of the tokens of a text are computed once and kept
+    for the `max_cached` most recently used texts, so chunking a document for
+    retrieval and later for summarization encodes it only once. Chunks end at
+    the last line or sentence break in the second half of their token budget
+    when there is one. count_tokens memoizes token counts and knows those of
+    the chunks cut without encoding them again. `encoding` is any object with
+    tiktoken's encode and decode_with_offsets, the shared gpt2 encoding by
+    default.
+
+    `stats` counts the texts encoded and reused, and the tokens cut into
+    retrieval chunks and summary windows and counted by count_tokens.
+    """
+
+    def __init__(
+        self,
+        encoding=None,
+        chunk_size=1000,
+        chunk_overlap=200,
+        window_size=7500,
+        window_overlap=750,
+        max_cached=64,
+    ):
+        self._encoding = encoding
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.max_cached = max_cached
+        self.offsets_cache = OrderedDict()
+        self.counts_cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            "encoded": 0,
+            "reused": 0,
+            "retrieval_tokens": 0,
+            "summary_tokens": 0,
+            "counted_tokens": 0,
+        }
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = get_encoding()
+        return self._encoding
+
+    def token_offsets(self, text):
+        """Return the start character offset of every token of a text."""
+        with self.lock:
+            offsets = self.offsets_cache.get(text)
+            if offsets is not None:
+                self.offsets_cache.move_to_end(text)
+                self.stats["reused"] += 1
+                return offsets
+        tokens = self.encoding.encode(text, disallowed_special=())
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        with self.lock:
+            self.stats["encoded"] += 1
+            self.offsets_cache[text] = offsets
+            if len(self.offsets_cache) > self.max_cached:
+                self.offsets_cache.popitem(last=False)
+        return offsets
+
+    def count_tokens(self, text):
+        """Token count of a text, memoized."""
+        with self.lock:
+            count = self.counts_cache.get(text)
+            if count is None and text in self.offsets_cache:
+                count = len(self.offsets_cache[text])
+            if count is not None:
+                self.remember_count(text, count)
+                return count
+        count = len(self.encoding.encode(text, disallowed_special=()))
+        with self.lock:
+            self.stats["counted_tokens"] += count
+            self.remember_count(text, count)
+        return count
+
+    def remember_count(self, text, count):
+        """Store a token count; the caller holds the lock."""
+        self.counts_cache[text] = count
+        self.counts_cache.move_to_end(text)
+        if len(self.counts_cache) > 16 * self.max_cached:
+            self.counts_cache.popitem(last=False)
+
+    @staticmethod
+    def chunk_end(text, offsets, start, end):
+        """Move a chunk end back to the last line, else sentence, break after its middle."""
+        if end >= len(offsets):
+            return len(offsets)
+        sentence_end = None
+        for i in range(end, start + (end - start) // 2, -1):
+            previous = text[offsets[i] - 1]
+            if previous == "\n" or text[offsets[i]] == "\n":
+                return i
+            if sentence_end is None and previous in ".!?":
+                sentence_end = i
+        return sentence_end or end
+
+    def split(self, documents, size, overlap, stage):
+        """Cut documents into chunks of at most `size` tokens overlapping by `overlap`."""
+        chunks = []
+        for document in documents:
+            text = document.page_content
+            offsets = self.token_offsets(text)
+            bounds = offsets + [len(text)]
+            start = 0
+            while start < len(offsets):
+                end = self.chunk_end(text, offsets, start, start + size)
+                chunk = text[bounds[start] : bounds[end]].strip()
+                if chunk:
+                    chunks.append(Document(page_content=chunk, metadata=dict(document.metadata)))
+                    self.stats[stage] += end - start
+                    with self.lock:
+                        self.remember_count(chunk, end - start)
+                if end == len(offsets):
+                    break
+                start = max(end - overlap, start + 1)
+        return chunks
+
+    def retrieval_chunks(self, documents):
+        return self.split(documents, self.chunk_size, self.chunk_overlap, "retrieval_tokens")
+
+    def summary_windows(self, documents):
+        return self.split(documents, self.window_size, self.window_overlap, "summary_tokens")
+
+    def log_stats(self):
+        logging.info(f"Chunker stats: {self.stats}")
@@ -0,0 +1,103 @@
+import hashlib
+import re
+
+# Texts with fewer 3-word shingles are too short for their SimHash to tell pages apart.
+MIN_SHINGLES = 20
+
+
+def shingles(text):
+    """3-word shingles of a text; a single one for texts of fewer than 3 words."""
+    words = re.findall(r"\w+", text.lower())
+    return [" ".join(words[i : i + 3]) for i in range(max(len(words) - 2, 1))]
+
+
+def simhash(text, bits=64):
+    """64-bit SimHash of a text over its 3-word shingles.
+
+    Texts sharing most shingles get fingerprints a few bits apart, so near
+    duplicates can be found by Hamming distance.
+    """
+    return shingle_hash(shingles(text), bits)
+
+
+def shingle_hash(text_shingles, bits=64):
+    weights = [0] * bits
+    for shingle in text_shingles:
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big"
+        )
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """Finds earlier fingerprints within `max_distance` bits of a new one.
+
+    Fingerprints are split into max_distance + 1 bands, so any two within the
+    distance share at least one identical band and only those are compared.
+    """
+
+    def __init__(self, max_distance=3, bits=64):
+        self.max_distance = max_distance
+        self.bits = bits
+        self.band_count = max_distance + 1
+        self.bands = [{} for _ in range(self.band_count)]
+
+    def band_keys(self, fingerprint):
+        width = -(-self.bits // self.band_count)
+        mask = (1 << width) - 1
+        return [fingerprint >> (band * width) & mask for band in range(self.band_count)]
+
+    def find(self, fingerprint):
+        """Return the key of an indexed near duplicate of a fingerprint, or None."""
+        for band, band_key in zip(self.bands, self.band_keys(fingerprint)):
+            for key, other in band.get(band_key, []):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, key, fingerprint):
+        for band, band_key in zip(self.bands, self.band_keys(fingerprint)):
+            band.setdefault(band_key, []).append((key, fingerprint))
+
+
+class SourceDeduplicator:
+    """Assigns loaded sources unique titles and collapses near-duplicate pages.
+
+    The first source of a group of near duplicates is kept and the URLs of
+    the later ones are recorded as its aliases. A source whose title is
+    already taken by different content is kept under its title followed by
+    its URL. A negative `max_distance` disables near-duplicate detection.
+    Sources with fewer than MIN_SHINGLES shingles are never collapsed.
+    """
+
+    def __init__(self, max_distance=3):
+        self.index = NearDuplicateIndex(max_distance) if max_distance >= 0 else None
+        self.aliases = {}
+        self.collapsed = 0
+
+    def add(self, url, documents):
+        """Return (title, None) for a new source or (None, title) for a duplicate of one."""
+        fingerprint = None
+        if self.index is not None:
+            text_shingles = shingles(" ".join(document.page_content for document in documents))
+            if len(text_shingles) >= MIN_SHINGLES:
+                fingerprint = shingle_hash(text_shingles)
+        if fingerprint is not None:
+            duplicate_of = self.index.find(fingerprint)
+            if duplicate_of is not None:
+                self.aliases[duplicate_of].append(url)
+                self.collapsed += 1
+                return None, duplicate_of
+        title = documents[0].metadata.get("title", url)
+        if title in self.aliases:
+            title = f"{title} ({url})"
+        self.aliases[title] = []
+        if fingerprint is not None:
+            self.index.add(title, fingerprint)
+        return title, None
@@ -0,0 +1,141 @@
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_nomic.embeddings import NomicEmbeddings
+from src.tracing import span
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedder(model="nomic-embed-text-v1.5", device="cpu"):
+    """Return the process-wide local Nomic embedder for a model and device."""
+    return NomicEmbeddings(model=model, inference_mode="local", device=device)
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings(
+    model="nomic-embed-text-v1.5", device="cpu", cache_path=None, batch_size=64
+):
+    """Return the process-wide cached embeddings wrapper around get_embedder."""
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    return CachedEmbeddings(get_embedder(model, device), model, cache, batch_size)
+
+
+class EmbeddingCache:
+    """SQLite store of embedding vectors keyed by model, task and text hash."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self.connection.commit()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys present in the cache."""
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items):
+        """Store an iterable of (key, vector) pairs."""
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes())
+                    for key, vector in items
+                ],
+            )
+            self.connection.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that embeds each distinct text once, in batches.
+
+    Vectors are memoized in memory for the lifetime of the process and, when
+    an EmbeddingCache is given, persisted across runs. `stats` counts
+    persistent-cache hits, misses and the time spent in the embedder.
+    """
+
+    def __init__(self, embedder, model_name, cache=None, batch_size=64):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.memory = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "embedded": 0, "embed_seconds": 0.0}
+
+    def make_key(self, text, task):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{task}:{digest}"
+
+    def embed(self, texts, task):
+        """Return vectors for texts, embedding only those not seen before."""
+        keys = [self.make_key(text, task) for text in texts]
+        with self.lock, span(task, "embedding", texts=len(texts)) as call:
+            missing = {
+                key: text
+                for key, text in zip(keys, texts)
+                if key not in self.memory
+            }
+            if missing and self.cache is not None:
+                cached = self.cache.get_many(list(missing))
+                self.memory.update(cached)
+                self.stats["hits"] += len(cached)
+                for key in cached:
+                    del missing[key]
+            self.stats["misses"] += len(missing)
+            call.set(cache_hit=len(texts) - len(missing))
+            if missing:
+                self.embed_missing(list(missing.items()), task)
+            return [self.memory[key] for key in keys]
+
+    def embed_missing(self, items, task):
+        start = time.perf_counter()
+        for offset in range(0, len(items), self.batch_size):
+            batch = items[offset : offset + self.batch_size]
+            texts = [text for _, text in batch]
+            if task == "query":
+                vectors = [self.embedder.embed_query(text) for text in texts]
+            else:
+                vectors = self.embedder.embed_documents(texts)
+            new = [(key, vector) for (key, _), vector in zip(batch, vectors)]
+            self.memory.update(new)
+            if self.cache is not None:
+                self.cache.put_many(new)
+        self.stats["embedded"] += len(items)
+        self.stats["embed_seconds"] += time.perf_counter() - start
+
+    def embed_documents(self, texts):
+        return self.embed(texts, "document")
+
+    def embed_query(self, text):
+        return self.embed([text], "query")[0]
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def log_stats(self):
+        rate = self.stats["embedded"] / self.stats["embed_seconds"] if self.stats["embed_seconds"] else 0.0
+        logging.info(
+            f"Embedding cache stats: {self.stats}, hit rate {self.hit_rate():.0%}, "
+            f"{rate:.1f} chunks/s"
+        )
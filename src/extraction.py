@@ -0,0 +1,124 @@
+import re
+
+# Elements that never hold main content.
+NON_CONTENT_TAGS = [
+    "script", "style", "noscript", "template", "svg", "iframe", "button", "select", "input", "dialog",
+]
+# Page furniture, removed unless it sits inside an <article> or <main>.
+LAYOUT_TAGS = ["nav", "header", "footer", "aside"]
+# class/id words marking banners, menus and other boilerplate blocks.
+BOILERPLATE_WORDS = {
+    "ad", "ads", "advert", "advertisement", "banner", "breadcrumb", "breadcrumbs",
+    "comments", "consent", "cookie", "cookies", "footer", "gdpr", "menu", "modal",
+    "nav", "navbar", "navigation", "newsletter", "popup", "promo", "related",
+    "share", "sharing", "sidebar", "social", "subscribe",
+}
+CONTENT_TAGS = ["p", "li", "pre", "td", "blockquote", "dd", "h2", "h3"]
+MIN_CONTENT_CHARS = 200
+# Blocks marked as boilerplate are kept when they hold more than this share of the
+# page's paragraph text, e.g. wrappers classed "layout-with-sidebar" or "comments-open".
+MAX_BOILERPLATE_SHARE = 0.5
+
+
+def estimate_tokens(text):
+    """Approximate LLM token count: words and punctuation marks."""
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def is_boilerplate(element):
+    words = set()
+    for attribute in ("id", "class"):
+        value = element.get(attribute) or ""
+        if isinstance(value, list):
+            value = " ".join(value)
+        words.update(re.split(r"[\s_\-]+", value.lower()))
+    return bool(words & BOILERPLATE_WORDS)
+
+
+def block_text(element):
+    """Text of an element, one line per text node with whitespace collapsed."""
+    return "\n".join(" ".join(text.split()) for text in element.stripped_strings)
+
+
+def link_density(element, text):
+    link_chars = sum(len(link.get_text(strip=True)) for link in element.find_all("a"))
+    return link_chars / len(text) if text else 1.0
+
+
+def paragraph_chars(element):
+    """Characters of text in the paragraph-like elements of `element`."""
+    return sum(
+        len(node.get_text(strip=True))
+        for node in element.find_all(CONTENT_TAGS)
+        if not node.find_parent(CONTENT_TAGS)
+    )
+
+
+def remove_boilerplate(soup):
+    """Drop scripts, page furniture and blocks whose class or id marks them as boilerplate.
+
+    A marked block holding most of the page's paragraph text is a wrapper of
+    the content, not boilerplate, and is kept.
+    """
+    for element in soup.find_all(NON_CONTENT_TAGS):
+        element.decompose()
+    for element in soup.find_all(LAYOUT_TAGS):
+        if not element.decomposed and not element.find_parent(["article", "main"]):
+            element.decompose()
+    page_chars = paragraph_chars(soup)
+    for element in soup.find_all(True):
+        if element.decomposed or element.name in ("html", "body"):
+            continue
+        if element.attrs is None or not is_boilerplate(element):
+            continue
+        if page_chars and paragraph_chars(element) > page_chars * MAX_BOILERPLATE_SHARE:
+            continue
+        element.decompose()
+
+
+def best_candidate(soup):
+    """Return the element with the densest main text, readability style.
+
+    Every paragraph-like element adds a score (1, plus its commas, plus up to
+    3 for its length) to its parent, half to its grandparent and a third to
+    the level above. Scores are scaled down by the share of link text.
+    """
+    scores = {}
+    elements = {}
+    for node in soup.find_all(CONTENT_TAGS):
+        text = node.get_text(" ", strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        for level, ancestor in enumerate(node.parents):
+            if level == 3 or ancestor.name in ("html", "[document]"):
+                break
+            scores[id(ancestor)] = scores.get(id(ancestor), 0) + score / (1, 2, 3)[level]
+            elements[id(ancestor)] = ancestor
+    best, best_score = None, 0
+    for key, score in scores.items():
+        element = elements[key]
+        score *= 1 - link_density(element, element.get_text(strip=True))
+        if score > best_score:
+            best, best_score = element, score
+    return best
+
+
+def extract_main_text(soup):
+    """Return the main content text of a parsed page, without navigation, banners and footers.
+
+    Uses a single <main> or <article> when the page has one, otherwise the
+    highest-scoring block of best_candidate. Falls back to all remaining body
+    text when no block holds enough text. The soup is modified.
+    """
+    remove_boilerplate(soup)
+    heading = soup.find("h1")
+    heading = heading.get_text(" ", strip=True) if heading else ""
+    landmarks = soup.find_all("main") or soup.find_all("article")
+    candidate = landmarks[0] if len(landmarks) == 1 else best_candidate(soup)
+    text = block_text(candidate) if candidate is not None else ""
+    if len(text) < MIN_CONTENT_CHARS:
+        text = block_text(soup.body or soup)
+    if heading and heading not in text:
+        text = f"{heading}\n{text}"
+    return text
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+
+import aiohttp
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from src.extraction import MIN_CONTENT_CHARS, estimate_tokens, extract_main_text
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/129.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchResult:
+    """Status, body and headers of a single HTTP response."""
+
+    def __init__(self, url, status, text, headers):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.headers = headers
+
+
+class PageFetcher:
+    """Async HTTP client sharing one connection pool across all page loads of a run.
+
+    Must be used as an async context manager so the underlying aiohttp session
+    is opened and closed on the running event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency=16,
+        max_per_host=4,
+        timeout=20,
+        max_retries=3,
+        backoff_factor=0.5,
+        headers=None,
+    ):
+        """Configure pool size, per-host limit, total timeout (seconds) and retry policy."""
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.headers = headers or DEFAULT_HEADERS
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency, limit_per_host=self.max_per_host
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Return the delay before the next attempt, honouring a numeric Retry-After header."""
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2**attempt) * (1 + random.random() / 2)
+
+    async def fetch(self, url, headers=None):
+        """GET a URL, retrying transient failures with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if (
+                        response.status in RETRY_STATUSES
+                        and attempt < self.max_retries
+                    ):
+                        delay = self.backoff_delay(
+                            attempt, response.headers.get("Retry-After")
+                        )
+                        logging.warning(
+                            f"HTTP {response.status} from {url}, retrying in {delay:.1f}s"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                    if response.status >= 400:
+                        response.raise_for_status()
+                    text = "" if response.status == 304 else await response.text()
+                    return FetchResult(url, response.status, text, response.headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logging.warning(f"Error fetching {url} ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+def build_metadata(soup, url):
+    """Build the same metadata WebBaseLoader attaches to a page."""
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", "No language found.")
+    return metadata
+
+
+def html_to_documents(html, url, extract_content=True):
+    """Convert an HTML page into documents shaped like WebBaseLoader output.
+
+    With `extract_content` the page text is reduced to its main content, see
+    soup_to_documents.
+    """
+    return soup_to_documents(BeautifulSoup(html, "html.parser"), url, extract_content)
+
+
+def soup_to_documents(soup, url, extract_content=True):
+    """Convert a parsed page into documents, optionally keeping only its main content.
+
+    Extraction drops navigation, banners, footers and other boilerplate before
+    the text is chunked, and logs the estimated tokens before and after. The
+    full page text is kept when extraction leaves less than MIN_CONTENT_CHARS.
+    """
+    metadata = build_metadata(soup, url)
+    text = soup.get_text()
+    if extract_content:
+        tokens_before = estimate_tokens(text)
+        main_text = extract_main_text(soup)
+        if len(main_text) < MIN_CONTENT_CHARS:
+            logging.info(f"Extraction left too little text of {url}, keeping the full page")
+        else:
+            text = main_text
+        logging.info(
+            f"Extracted main content of {url}: "
+            f"{tokens_before} -> {estimate_tokens(text)} tokens"
+        )
+    return [Document(page_content=text, metadata=metadata)]
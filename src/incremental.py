@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from src.utils import normalize_url
+
+
+class SeenIndex:
+    """SQLite index of processed sources for incremental runs.
+
+    Each row holds the results of one URL for one questions fingerprint,
+    together with a hash of the content they were computed from, so a later
+    run can tell new and changed sources from those it may reuse.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.stats = {"reused": 0, "changed": 0, "new": 0}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS seen (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                content_hash TEXT,
+                title TEXT,
+                qa TEXT,
+                summary TEXT,
+                llm_summary INTEGER,
+                processed_at REAL
+            )"""
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def fingerprint(content_questions, llm_name, llm_model):
+        """Identify the questions and model results were computed with."""
+        payload = json.dumps([sorted(set(content_questions)), llm_name, llm_model])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(documents):
+        digest = hashlib.sha256()
+        for document in documents:
+            digest.update(document.page_content.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(url, fingerprint):
+        return hashlib.sha256(f"{normalize_url(url)}\0{fingerprint}".encode("utf-8")).hexdigest()
+
+    def get(self, url, fingerprint, documents):
+        """Return the stored record of a source whose content is unchanged, or None."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT content_hash, qa, summary, llm_summary FROM seen WHERE key = ?",
+                (self.make_key(url, fingerprint),),
+            ).fetchone()
+        if row is None:
+            self.stats["new"] += 1
+            return None
+        content_hash, qa, summary, llm_summary = row
+        if content_hash != self.content_hash(documents):
+            self.stats["changed"] += 1
+            return None
+        self.stats["reused"] += 1
+        return {"qa": json.loads(qa), "summary": summary, "llm_summary": bool(llm_summary)}
+
+    def put(self, url, fingerprint, documents, title, qa, summary, llm_summary):
+        """Store the results of a source (with empty `qa` when it answered nothing)."""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO seen VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(url, fingerprint),
+                    url,
+                    self.content_hash(documents),
+                    title,
+                    json.dumps(qa, ensure_ascii=False),
+                    summary,
+                    int(llm_summary),
+                    time.time(),
+                ),
+            )
+            self.connection.commit()
+
+    def log_stats(self):
+        logging.info(f"Seen-URL index stats: {self.stats}")
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """Scale each row of a float32 matrix to unit length, in place."""
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))[:, None]
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class VectorIndex:
+    """Single in-memory cosine index over the chunks of all sources.
+
+    Chunks are stored contiguously per source, so `source_ids[i]` names the
+    source of `chunks[i]` and each source owns one slice of the matrix.
+    """
+
+    def __init__(self, chunks, source_ids, vectors):
+        self.chunks = chunks
+        self.source_ids = source_ids
+        self.vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+        self.slices = {}
+        for position, source_id in enumerate(source_ids):
+            start, _ = self.slices.get(source_id, (position, position))
+            self.slices[source_id] = (start, position + 1)
+
+    @classmethod
+    def from_sources(cls, source_chunks, embeddings):
+        """Embed {source_id: [chunk, ...]} in one batch and index all chunks."""
+        chunks, source_ids = [], []
+        for source_id, doc_chunks in source_chunks.items():
+            chunks.extend(doc_chunks)
+            source_ids.extend([source_id] * len(doc_chunks))
+        vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+        return cls(chunks, source_ids, vectors)
+
+    def search(self, question_vectors, k=3):
+        """Return the top-k chunks of every source for every question.
+
+        Scores come from one matrix product of all questions against all
+        chunks. The result maps source_id to a list with, per question, a
+        list of (chunk, cosine score) pairs sorted best first.
+        """
+        questions = normalize_rows(np.array(question_vectors, dtype=np.float32))
+        scores = questions @ self.vectors.T
+        results = {}
+        for source_id, (start, end) in self.slices.items():
+            block = scores[:, start:end]
+            top = min(k, end - start)
+            if top < block.shape[1]:
+                candidates = np.argpartition(-block, top - 1, axis=1)[:, :top]
+            else:
+                candidates = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+            candidate_scores = np.take_along_axis(block, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind="stable")
+            ranked = np.take_along_axis(candidates, order, axis=1)
+            results[source_id] = [
+                [(self.chunks[start + i], float(block[q, i])) for i in row]
+                for q, row in enumerate(ranked)
+            ]
+        return results
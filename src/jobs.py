@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from src.tracing import Tracer, tracing
+from src.utils import create_output_directory
+
+# ID of the job whose code is running, set by JobManager; read by JobLogFilter.
+_current_job = ContextVar("job", default=None)
+# Finished spans counted as progress: (category, name or None for any) -> label.
+PROGRESS_COUNTERS = {
+    ("search", "query"): "Search queries",
+    ("fetch", "load"): "Pages loaded",
+    ("source", "answer"): "Sources answered",
+    ("source", "summary"): "Sources summarized",
+    ("llm", None): "LLM calls",
+}
+
+
+class ProgressTracer(Tracer):
+    """Tracer that also tracks the stages running and the spans finished so far."""
+
+    def __init__(self):
+        super().__init__()
+        self.running = Counter()
+        self.finished = Counter()
+
+    def open(self, name, category):
+        if category == "stage":
+            with self.lock:
+                self.running[name] += 1
+
+    def record(self, name, category, start, end, attributes):
+        super().record(name, category, start, end, attributes)
+        with self.lock:
+            self.finished[(category, name)] += 1
+            self.finished[(category, None)] += 1
+            if category == "stage":
+                self.running[name] -= 1
+
+    def progress(self):
+        """Return {"stages": running stage names, "counts": {label: finished spans}}."""
+        with self.lock:
+            return {
+                "stages": [name for name, count in self.running.items() if count > 0],
+                "counts": {label: self.finished[key] for key, label in PROGRESS_COUNTERS.items()},
+            }
+
+
+class JobLogFilter(logging.Filter):
+    """Keeps the records logged by the code of one job, in any of its tasks or threads."""
+
+    def __init__(self, job_id):
+        super().__init__()
+        self.job_id = job_id
+
+    def filter(self, record):
+        return _current_job.get() == self.job_id
+
+
+class Job:
+    """One background run: its input, output directory, status, progress and result.
+
+    `status` goes from 'queued' to 'running', then 'done' or 'failed'.
+    """
+
+    def __init__(self, job_id, input_user, output_dir):
+        self.id = job_id
+        self.input_user = input_user
+        self.output_dir = output_dir
+        self.log_path = os.path.join(output_dir, "run.log")
+        self.tracer = ProgressTracer()
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def progress(self):
+        return self.tracer.progress()
+
+    def partial_results(self):
+        """Return the sources written to results.jsonl so far, by the streaming pipeline."""
+        path = os.path.join(self.output_dir, "results.jsonl")
+        if not os.path.exists(path):
+            return []
+        results = []
+        with open(path) as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    break
+                results.append(json.loads(line))
+        return results
+
+
+class JobManager:
+    """Runs jobs in a pool of `max_workers` threads and keeps the last `max_jobs` by ID.
+
+    Jobs submitted while every worker is busy wait in the queue. Each job
+    writes the records it logs to run.log in its output directory.
+    """
+
+    def __init__(self, output_folder, max_workers=2, max_jobs=50):
+        self.output_folder = output_folder
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="wide-search-job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, run, input_user):
+        """Queue `run(job)` for a new job and return the job; its return value is the result."""
+        job_id = uuid.uuid4().hex[:12]
+        job = Job(job_id, input_user, create_output_directory(self.output_folder, job_id))
+        with self.lock:
+            self.jobs[job_id] = job
+            finished = [old for old in self.jobs.values() if old.done]
+            for old in finished[: max(0, len(self.jobs) - self.max_jobs)]:
+                del self.jobs[old.id]
+        self.executor.submit(self.run_job, run, job)
+        logging.info(f"Job {job_id} queued, output in {job.output_dir}")
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def run_job(self, run, job):
+        token = _current_job.set(job.id)
+        handler = logging.FileHandler(job.log_path)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s:%(message)s"))
+        handler.addFilter(JobLogFilter(job.id))
+        logging.getLogger().addHandler(handler)
+        job.started = time.time()
+        job.status = "running"
+        logging.info(f"Job {job.id} started after {job.started - job.submitted:.1f}s in queue")
+        try:
+            with tracing(job.tracer):
+                job.result = run(job)
+            job.status = "done"
+            logging.info(f"Job {job.id} done in {job.elapsed():.1f}s")
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+            logging.exception(f"Job {job.id} failed")
+        finally:
+            job.finished = time.time()
+            logging.getLogger().removeHandler(handler)
+            handler.close()
+            _current_job.reset(token)
@@ -1,17 +1,164 @@
 from langchain_ollama import ChatOllama
 from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessage
+from src.cache import LLMCache
+from src.tracing import annotate, span
+import asyncio
 import logging
 import json
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Counter of the LLM requests of the running code, set by `counting_calls`.
+_run_calls = ContextVar("run_calls", default=None)
+
+
+def is_rate_limit_error(error):
+    """Return True when an exception signals HTTP 429 / rate limiting."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status == 429 or "rate limit" in str(error).lower()
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying, preferring the server's Retry-After header."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return min(2**attempt, 30) * (1 + random.random() / 2)
+
+
+def token_usage(response):
+    """Tokens in and out reported by the provider, when the response carries them."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {"tokens_in": usage.get("input_tokens", 0), "tokens_out": usage.get("output_tokens", 0)}
+
+
+class ProviderLimit:
+    """Caps the requests in flight to a provider across all threads and event loops.
+
+    asyncio.Semaphore belongs to one event loop, while every Streamlit job
+    runs its own loop in a worker thread. Waiters are woken in FIFO order on
+    their own loop, and a released slot passes straight to the next waiter.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    async def acquire(self):
+        with self.lock:
+            if self.active < self.limit and not self.waiters:
+                self.active += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            waiter = (loop, future)
+            self.waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                waiting = waiter in self.waiters
+                if waiting:
+                    self.waiters.remove(waiter)
+            # A slot already granted to a cancelled waiter is passed on.
+            if not waiting and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            if not self.waiters:
+                self.active -= 1
+                return
+            loop, future = self.waiters.popleft()
+        loop.call_soon_threadsafe(self.grant, future)
+
+    def grant(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.release()
+
+
+class CallCounter:
+    """Number of LLM requests made by one run, counted from any task or thread."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def increment(self):
+        with self.lock:
+            self.calls += 1
+
+
+@contextmanager
+def counting_calls():
+    """Count the LLM requests of the code run in the block, and of the tasks and
+    threads it starts with a copy of its context, on a new CallCounter.
+
+    Unlike LLMHandler.calls, the count leaves out the requests of other runs
+    sharing the handler, such as the other configurations of a batch.
+    """
+    counter = CallCounter()
+    token = _run_calls.set(counter)
+    try:
+        yield counter
+    finally:
+        _run_calls.reset(token)
 
 
 class LLMHandler:
     """Handler class to manage LLM initialization and invocation based on selected provider and model."""
 
-    def __init__(self, llm_name="ollama", llm_model="llama3.2:latest"):
-        """Initialize LLM models based on the selected provider and model."""
+    # One ProviderLimit per (provider, max_concurrency), shared by every handler,
+    # thread and event loop of the process.
+    _limits = {}
+    _limits_lock = threading.Lock()
+    # In-flight requests per event loop, keyed by cache key, see single_flight.
+    _inflight = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        llm_name="ollama",
+        llm_model="llama3.2:latest",
+        cache=None,
+        max_concurrency=4,
+        max_retries=5,
+    ):
+        """Initialize LLM models based on the selected provider and model.
+
+        `cache` is an optional LLMCache memoizing responses across calls and runs.
+        `max_concurrency` caps in-flight async requests per provider across the
+        process, whatever the thread or event loop, and
+        `max_retries` bounds retries of rate-limited calls.
+        """
         self.llm = self.get_llm(llm_name, llm_model)
         self.llm_json = self.get_llm_json_mode(llm_name, llm_model)
         self.llm_name = llm_name
+        self.llm_model = llm_model
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.calls = 0
+        self.lock = threading.Lock()
 
     def get_llm(self, llm_name, llm_model):
         """Return the LLM instance based on the provider and model."""
@@ -37,22 +184,166 @@ class LLMHandler:
         else:
             raise ValueError(f"Unknown LLM name: {llm_name}")
 
+    def cache_key(self, mode, message):
+        return LLMCache.make_key(self.llm_name, self.llm_model, mode, message)
+
+    def provider_limit(self):
+        """Return the process-wide limit of requests in flight to the provider."""
+        key = (self.llm_name, self.max_concurrency)
+        with self._limits_lock:
+            if key not in self._limits:
+                self._limits[key] = ProviderLimit(self.max_concurrency)
+            return self._limits[key]
+
+    async def single_flight(self, key, request):
+        """Await `request()` once for concurrent callers asking for the same key.
+
+        Identical prompts sent while the first one is still in flight, e.g. by
+        configs of one batch, share its response instead of calling the model again.
+        """
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        task = inflight.get(key)
+        if task is None:
+            task = inflight[key] = asyncio.ensure_future(request())
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        else:
+            annotate(shared=1)
+        return await asyncio.shield(task)
+
+    def count_call(self):
+        with self.lock:
+            self.calls += 1
+        run_calls = _run_calls.get()
+        if run_calls is not None:
+            run_calls.increment()
+
+    def call(self, llm, message):
+        """Invoke a model, retrying rate-limited calls with backoff."""
+        self.count_call()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = llm.invoke(message)
+                annotate(**token_usage(response))
+                return response
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_delay(e, attempt)
+                logging.warning(f"{self.llm_name} rate limit hit, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def acall(self, llm, message):
+        """Invoke a model asynchronously under the provider limit, retrying rate-limited calls."""
+        self.count_call()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.provider_limit():
+                    response = await llm.ainvoke(message)
+                annotate(**token_usage(response))
+                return response
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_delay(e, attempt)
+                logging.warning(f"{self.llm_name} rate limit hit, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def parse_json_response(self, response):
+        """Return the JSON payload of a JSON-mode response, or None when it does not parse."""
+        if self.llm_name == "groq":
+            return response
+        try:
+            return json.loads(response.content)
+        except json.JSONDecodeError:
+            logging.warning(
+                "LLM output is not a valid JSON. Please check your LLM model or the instructions."
+            )
+            return None
+
     def invoke_text(self, message):
         """Invoke the text-based LLM and return a response."""
-        response = self.llm.invoke(message)
+        with span("text", "llm"):
+            return self._invoke_text(message)
+
+    def _invoke_text(self, message):
+        if self.cache is not None:
+            key = self.cache_key("text", message)
+            content = self.cache.get(key)
+            if content is not None:
+                annotate(cache_hit=1)
+                return AIMessage(content=content)
+        response = self.call(self.llm, message)
+        if self.cache is not None:
+            self.cache.put(key, response.content)
         return response
 
     def invoke_json(self, message):
         """Invoke the JSON-based LLM and return a response."""
-        if self.llm_name == "ollama":
-            response = self.llm_json.invoke(message)
-            try:
-                response = json.loads(response.content)
-            except json.JSONDecodeError:
-                logging.warning(
-                    "LLM output is not a valid JSON. Please check your LLM model or the instructions."
-                )
-                return {"binary_score": "no"}
-        elif self.llm_name == "groq":
-            response = self.llm_json.invoke(message)
+        with span("json", "llm"):
+            return self._invoke_json(message)
+
+    def _invoke_json(self, message):
+        if self.cache is not None:
+            key = self.cache_key("json", message)
+            cached = self.cache.get(key)
+            if cached is not None:
+                annotate(cache_hit=1)
+                return cached
+        response = self.parse_json_response(self.call(self.llm_json, message))
+        if response is None:
+            return {"binary_score": "no"}
+        if self.cache is not None:
+            self.cache.put(key, response)
         return response
+
+    async def ainvoke_text(self, message):
+        """Asynchronously invoke the text-based LLM and return a response."""
+        with span("text", "llm"):
+            return await self._ainvoke_text(message)
+
+    async def _ainvoke_text(self, message):
+        key = self.cache_key("text", message)
+        if self.cache is not None:
+            content = self.cache.get(key)
+            if content is not None:
+                annotate(cache_hit=1)
+                return AIMessage(content=content)
+
+        async def request():
+            response = await self.acall(self.llm, message)
+            if self.cache is not None:
+                self.cache.put(key, response.content)
+            return response
+
+        return await self.single_flight(key, request)
+
+    async def ainvoke_json(self, message):
+        """Asynchronously invoke the JSON-based LLM and return a response."""
+        with span("json", "llm"):
+            return await self._ainvoke_json(message)
+
+    async def _ainvoke_json(self, message):
+        key = self.cache_key("json", message)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                annotate(cache_hit=1)
+                return cached
+
+        async def request():
+            response = self.parse_json_response(await self.acall(self.llm_json, message))
+            if response is None:
+                return {"binary_score": "no"}
+            if self.cache is not None:
+                self.cache.put(key, response)
+            return response
+
+        return await self.single_flight(key, request)
+
+    async def abatch_text(self, messages):
+        """Invoke the text-based LLM on many inputs concurrently, keeping their order."""
+        return await asyncio.gather(*(self.ainvoke_text(message) for message in messages))
+
+    async def abatch_json(self, messages):
+        """Invoke the JSON-based LLM on many inputs concurrently, keeping their order."""
+        return await asyncio.gather(*(self.ainvoke_json(message) for message in messages))
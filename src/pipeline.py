@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from src.dedup import SourceDeduplicator
+from src.llm import counting_calls
+from src.processing import Leaderboard, extractive_summary, result_item
+from src.tracing import span
+
+
+class StreamingPipeline:
+    """Run search, page loading and processing as one stream of sources.
+
+    Each source is chunked, retrieved against, graded and answered as soon as
+    its page is loaded, and written to `results.jsonl` in the output directory
+    when it is done. At most `max_in_flight` sources are processed at a time and
+    loading waits for a free slot, so peak memory follows the number of sources
+    in flight instead of the number of search results. Near-duplicate pages
+    are collapsed as they arrive, the first one loaded being kept.
+
+    Summaries follow the processor's summary_mode. In 'all' mode each source is
+    summarized as soon as it is answered. In 'extractive' mode each source gets
+    an extractive summary, only the documents of the sources currently ranked
+    among the top ones are kept, and those that stay there are summarized at
+    the end.
+    """
+
+    def __init__(self, search_engine, content_processor, output_dir, max_in_flight=4):
+        self.search_engine = search_engine
+        self.content_processor = content_processor
+        self.output_dir = output_dir
+        self.max_in_flight = max_in_flight
+        self.results_path = os.path.join(output_dir, "results.jsonl")
+
+    def run(self, queries, max_sources, time_horizon, content_questions, max_top_sources):
+        """Search, load and process sources as a stream and return ranked items."""
+        urls = self.search_engine.iter_urls(queries, max_sources, time_horizon)
+        return asyncio.run(self.arun(urls, content_questions, max_top_sources))
+
+    async def arun(self, urls, content_questions, max_top_sources):
+        """Process the sources of a URL stream and return {"top_items", "less_relevant_items"}."""
+        processor = self.content_processor
+        with counting_calls() as run_calls:
+            content_questions = list(dict.fromkeys(content_questions))
+            processor.reset_run_stats()
+            leaderboard = Leaderboard(max_top_sources) if processor.early_termination else None
+            self.started = time.perf_counter()
+            self.results = {}
+            self.candidates = {}
+            self.written = 0
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+
+            async def process(position, url, title, documents):
+                try:
+                    await self.aprocess_source(
+                        position,
+                        url,
+                        title,
+                        documents,
+                        content_questions,
+                        leaderboard,
+                        max_top_sources,
+                    )
+                except Exception:
+                    logging.exception(f"Error processing {url}")
+                finally:
+                    semaphore.release()
+
+            with open(self.results_path, "w") as self.results_file:
+                tasks = []
+                deduplicator = SourceDeduplicator(self.search_engine.near_duplicate_distance)
+                sources = self.search_engine.aiter_source_content(urls, max_pending=1)
+                async for position, url, documents in sources:
+                    title, _ = deduplicator.add(url, documents)
+                    if title is None:
+                        continue
+                    await semaphore.acquire()
+                    tasks.append(asyncio.create_task(process(position, url, title, documents)))
+                await asyncio.gather(*tasks)
+
+            ranked_titles = sorted(self.results, key=self.rank_key)
+            await self.asummarize_top(ranked_titles[:max_top_sources])
+            ranked_items = []
+            for title in ranked_titles:
+                result = self.results[title]
+                aliases = self.search_engine.aliases(result["url"], deduplicator.aliases[title])
+                ranked_items.append(
+                    (title, result_item(result["url"], result["summary"], result["qa"], aliases))
+                )
+        processor.log_run_stats(run_calls)
+        top_items = dict(ranked_items[:max_top_sources])
+        less_relevant_items = dict(ranked_items[max_top_sources:])
+        return {"top_items": top_items, "less_relevant_items": less_relevant_items}
+
+    def rank_key(self, title):
+        """Sort key ranking sources by QA count, ties broken by search order."""
+        return -len(self.results[title]["qa"]), self.results[title]["position"]
+
+    def retrieve_source(self, title, documents, content_questions):
+        """Chunk one source and return its retrieved hits per question, or None."""
+        processor = self.content_processor
+        index = processor.create_index({title: processor.split_documents(documents)})
+        if index is None:
+            return None
+        return processor.retrieve(index, content_questions)[title]
+
+    async def aprocess_source(
+        self, position, url, title, documents, content_questions, leaderboard, max_top_sources
+    ):
+        """Answer the questions for one loaded source and record the result."""
+        processor = self.content_processor
+        with span("retrieve", "source", source=url):
+            question_hits = await asyncio.to_thread(
+                self.retrieve_source, title, documents, content_questions
+            )
+        if question_hits is None:
+            return
+        qa_pairs = await processor.aanswer_source(
+            content_questions, question_hits, leaderboard, url
+        )
+        if not qa_pairs:
+            return
+        if processor.summary_mode == "all":
+            summary = await processor.asummarize_source(documents, url)
+        else:
+            summary = extractive_summary(documents)
+        self.results[title] = {"url": url, "summary": summary, "qa": qa_pairs, "position": position}
+        if processor.summary_mode != "all":
+            self.keep_candidate(title, documents, max_top_sources)
+        self.write_result(title, self.results[title])
+
+    def keep_candidate(self, title, documents, max_top_sources):
+        """Keep documents only for the sources currently ranked among the top ones."""
+        self.candidates[title] = (self.results[title]["url"], documents)
+        if len(self.candidates) > max_top_sources:
+            worst = max(self.candidates, key=self.rank_key)
+            del self.candidates[worst]
+
+    async def asummarize_top(self, top_titles):
+        """Replace the provisional summaries of the final top sources with LLM summaries."""
+        if self.content_processor.summary_mode == "all":
+            return
+        summaries = await asyncio.gather(
+            *(
+                self.content_processor.asummarize_source(documents, url)
+                for url, documents in (self.candidates[title] for title in top_titles)
+            )
+        )
+        for title, summary in zip(top_titles, summaries):
+            self.results[title]["summary"] = summary
+        self.candidates = {}
+
+    def write_result(self, title, result):
+        """Append one finished source to results.jsonl."""
+        if self.written == 0:
+            logging.info(f"First result after {time.perf_counter() - self.started:.1f}s")
+        record = {"title": title, **{key: result[key] for key in ("url", "summary", "qa")}}
+        self.results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.results_file.flush()
+        self.written += 1
@@ -1,71 +1,264 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import SKLearnVectorStore
-from langchain_nomic.embeddings import NomicEmbeddings
+import asyncio
+import heapq
+import logging
+import re
+from collections import Counter
+import numpy as np
+from src.chunking import TokenChunker
+from src.embeddings import CachedEmbeddings, get_embeddings
+from src.index import VectorIndex
+from src.llm import counting_calls
+from src.tracing import annotate, span
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.output_parsers import StrOutputParser
+
+SUMMARY_MODES = ("all", "extractive")
+
+
+def extractive_summary(documents, max_sentences=5):
+    """Pick the sentences with the most frequent content words, in document order."""
+    text = " ".join(document.page_content for document in documents)
+    sentences = [
+        sentence.strip()
+        for sentence in re.split(r"(?<=[.!?])\s+|\n+", text)
+        if len(sentence.split()) >= 4
+    ]
+    words = re.findall(r"[a-z0-9+#]+", text.lower())
+    frequencies = Counter(word for word in words if len(word) > 3)
+
+    def score(sentence):
+        tokens = re.findall(r"[a-z0-9+#]+", sentence.lower())
+        return sum(frequencies[token] for token in tokens) / len(tokens) if tokens else 0
+
+    best = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)
+    return " ".join(sentences[i] for i in sorted(best[:max_sentences]))
+
+
+def result_item(url, summary, qa, aliases=None):
+    """Build an output item, listing the source's aliases when it has any."""
+    item = {"url": url, "summary": summary, "qa": qa}
+    if aliases:
+        item["aliases"] = aliases
+    return item
+
+
+class Leaderboard:
+    """Running top-k of the QA counts of fully evaluated sources."""
+
+    def __init__(self, size):
+        self.size = size
+        self.counts = []
+
+    def add(self, count):
+        if len(self.counts) < self.size:
+            heapq.heappush(self.counts, count)
+        elif count > self.counts[0]:
+            heapq.heapreplace(self.counts, count)
+
+    def cutoff(self):
+        """QA count a source must reach to possibly enter the top-k (0 until k sources finished)."""
+        return self.counts[0] if self.size and len(self.counts) == self.size else 0
 
 
 class ContentProcessor:
     """Class to handle content processing logic."""
 
-    def __init__(self, llm_handler, llm_max_tokens):
-        """Initialize with the given LLM and JSON LLM models."""
+    def __init__(
+        self,
+        llm_handler,
+        llm_max_tokens,
+        embeddings=None,
+        batch_grading=False,
+        prefilter=None,
+        calibrate_prefilter=False,
+        stream_summary=False,
+        summary_mode="all",
+        early_termination=False,
+        max_concurrent_sources=4,
+        answer_mode="chain",
+        checkpoint=None,
+        chunker=None,
+    ):
+        """Initialize with the given LLM handler and an optional shared embeddings model.
+
+        With `batch_grading` all retrieved chunks of a question are graded in one LLM call.
+        `prefilter` is an optional (lower, upper) pair of cosine thresholds: retrieved
+        chunks scoring below `lower` are dropped, those at or above `upper` are accepted,
+        and only the band in between is graded by the LLM. With `calibrate_prefilter`
+        the LLM still grades every chunk and the band decisions are only recorded,
+        for prefilter_calibration_report. `stream_summary` starts reducing summaries
+        while map steps are still running. `summary_mode` is 'all' or
+        'extractive', see asummarize_ranked. With `early_termination` sources are
+        evaluated most promising first, at most `max_concurrent_sources` at a time,
+        and a source stops being asked questions once it can no longer reach the
+        top sources; see aanswer_questions_adaptive. `answer_mode` is 'chain' (answer,
+        then check it is meaningful and grounded, three calls) or 'fused' (one call
+        returning the answer and both checks) or 'multi' (all questions of a source
+        answered together, see aanswer_questions_multi; early termination does not
+        apply to it). With a run `checkpoint`, answers and summaries already recorded
+        for a source URL are replayed instead of recomputed. `chunker` is the
+        TokenChunker used for retrieval chunks, summary windows and token counts;
+        by default one with summary windows of llm_max_tokens.
+        """
         self.llm_handler = llm_handler
         self.llm_max_tokens = llm_max_tokens
-
-    def create_retriever(self, documents):
-        """Create a retriever using document embeddings."""
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=1000, chunk_overlap=200
+        self._embeddings = embeddings
+        self.batch_grading = batch_grading
+        self.prefilter = prefilter
+        self.calibrate_prefilter = calibrate_prefilter
+        self.stream_summary = stream_summary
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {summary_mode}")
+        self.summary_mode = summary_mode
+        self.early_termination = early_termination
+        self.max_concurrent_sources = max_concurrent_sources
+        self.answer_mode = answer_mode
+        self.checkpoint = checkpoint
+        self.chunker = chunker or TokenChunker(
+            window_size=llm_max_tokens, window_overlap=llm_max_tokens // 10
         )
-        doc_chunks = text_splitter.split_documents(documents)
-        if len(doc_chunks) == 0:
+        self.question_stats = {}
+        self.band_counts = {"dropped": 0, "llm": 0, "accepted": 0}
+        self.calibration_records = []
+
+    @property
+    def embeddings(self):
+        """Embeddings model, defaulting to the process-wide CPU embedder."""
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def split_documents(self, documents):
+        """Split documents into retrieval chunks."""
+        return self.chunker.retrieval_chunks(documents)
+
+    def split_summary_windows(self, documents):
+        """Split documents into windows that fit the LLM context for summarization."""
+        return self.chunker.summary_windows(documents)
+
+    def split_sources(self, source_items):
+        """Return {title: chunks} for the documents of every source."""
+        return {
+            title: self.split_documents(data["documents"]) for title, data in source_items.items()
+        }
+
+    def create_index(self, source_chunks):
+        """Create one vector index over the chunks of all sources."""
+        source_chunks = {title: chunks for title, chunks in source_chunks.items() if chunks}
+        if not source_chunks:
             return None
-        k = min(len(doc_chunks), 3)
-        vectorstore = SKLearnVectorStore.from_documents(
-            documents=doc_chunks,
-            embedding=NomicEmbeddings(
-                model="nomic-embed-text-v1.5", inference_mode="local", device="nvidia"
-            ),
-        )
+        return VectorIndex.from_sources(source_chunks, self.embeddings)
 
-        retriever = vectorstore.as_retriever(search_kwargs={"k": k})
-        return retriever
+    def retrieve(self, index, questions, k=3):
+        """Return {title: [[(chunk, score), ...] per question]} from a single batched search."""
+        question_vectors = [self.embeddings.embed_query(question) for question in questions]
+        return index.search(question_vectors, k)
 
-    def is_relevant_chunk(self, chunk_text, question):
-        """Determine if a document chunk is relevant to the given question."""
+    def relevance_messages(self, chunk_text, question):
         instructions = """You are a grader assessing the relevance of a document to a user's question.
                         If the document contains keywords or semantic meaning related to the question, grade it as relevant."""
         prompt = f"""Document:\n\n{chunk_text}\n\nQuestion:\n\n{question}\n\nDoes the document contain information relevant to the question?
                     Return JSON with a single key 'binary_score' with value 'yes' or 'no'."""
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    def is_relevant_chunk(self, chunk_text, question):
+        """Determine if a document chunk is relevant to the given question."""
         response = self.llm_handler.invoke_json(
-            [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+            self.relevance_messages(chunk_text, question)
         )
+        return response.get("binary_score", "").lower() == "yes"
 
+    async def ais_relevant_chunk(self, chunk_text, question):
+        """Asynchronous variant of is_relevant_chunk."""
+        response = await self.llm_handler.ainvoke_json(
+            self.relevance_messages(chunk_text, question)
+        )
         return response.get("binary_score", "").lower() == "yes"
 
-    def generate_answer(self, question, relevant_chunks):
-        """Generate an answer based on relevant document chunks."""
+    def batch_relevance_messages(self, chunk_texts, question):
+        instructions = """You are a grader assessing the relevance of several documents to a user's question.
+                        If a document contains keywords or semantic meaning related to the question, grade it as relevant."""
+        documents = "\n\n".join(
+            f"Document {number}:\n\n{text}" for number, text in enumerate(chunk_texts, 1)
+        )
+        prompt = f"""{documents}\n\nQuestion:\n\n{question}\n\nFor each document, does it contain information relevant to the question?
+                    Return JSON with a single key 'scores' holding a list of {len(chunk_texts)} values, 'yes' or 'no', one per document in order."""
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    def parse_batch_scores(self, response, count):
+        """Return one bool per chunk from a batched grading response, or None if malformed."""
+        scores = response.get("scores") if isinstance(response, dict) else None
+        if not isinstance(scores, list) or len(scores) != count:
+            return None
+        grades = [str(score).strip().lower() for score in scores]
+        if any(grade not in ("yes", "no") for grade in grades):
+            return None
+        return [grade == "yes" for grade in grades]
+
+    def grade_chunks(self, chunk_texts, question):
+        """Grade all chunks for a question, in one call when batch grading is enabled."""
+        if self.batch_grading and len(chunk_texts) > 1:
+            response = self.llm_handler.invoke_json(
+                self.batch_relevance_messages(chunk_texts, question)
+            )
+            grades = self.parse_batch_scores(response, len(chunk_texts))
+            if grades is not None:
+                return grades
+            logging.warning("Batched grading output is malformed, grading chunks one by one.")
+        return [self.is_relevant_chunk(text, question) for text in chunk_texts]
+
+    async def agrade_chunks(self, chunk_texts, question):
+        """Asynchronous variant of grade_chunks."""
+        if self.batch_grading and len(chunk_texts) > 1:
+            response = await self.llm_handler.ainvoke_json(
+                self.batch_relevance_messages(chunk_texts, question)
+            )
+            grades = self.parse_batch_scores(response, len(chunk_texts))
+            if grades is not None:
+                return grades
+            logging.warning("Batched grading output is malformed, grading chunks one by one.")
+        return await asyncio.gather(
+            *(self.ais_relevant_chunk(text, question) for text in chunk_texts)
+        )
+
+    def answer_messages(self, question, relevant_chunks):
         context = "\n\n".join([chunk.page_content for chunk in relevant_chunks])
         prompt = f"""You are an assistant for answering questions.
                     Context:\n\n{context}\n\nQuestion:\n\n{question}
                     Provide a concise answer (maximum three sentences) based only on the above context."""
-        response = self.llm_handler.invoke_text([HumanMessage(content=prompt)])
+        return [HumanMessage(content=prompt)]
+
+    def generate_answer(self, question, relevant_chunks):
+        """Generate an answer based on relevant document chunks."""
+        response = self.llm_handler.invoke_text(
+            self.answer_messages(question, relevant_chunks)
+        )
         return response.content.strip()
-    
-    def is_meaningful_answer(self, answer):
-        """Determine if the generated answer provides meaningful information."""
+
+    async def agenerate_answer(self, question, relevant_chunks):
+        """Asynchronous variant of generate_answer."""
+        response = await self.llm_handler.ainvoke_text(
+            self.answer_messages(question, relevant_chunks)
+        )
+        return response.content.strip()
+
+    def meaningful_messages(self, answer):
         instructions = """You are an evaluator tasked with determining whether the following answer provides meaningful information based on the context, or simply states that there is no relevant information.
                             Return JSON with a single key 'binary_score' with value 'yes' if the answer is meaningful, 'no' if it indicates lack of relevant information."""
         prompt = f"""Answer:\n\n{answer}\n\nDoes the answer provide meaningful information based on the context?"""
-        response = self.llm_handler.invoke_json(
-            [SystemMessage(content=instructions), HumanMessage(content=prompt)]
-        )
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    def is_meaningful_answer(self, answer):
+        """Determine if the generated answer provides meaningful information."""
+        response = self.llm_handler.invoke_json(self.meaningful_messages(answer))
         return response.get("binary_score", "").lower() == "yes"
 
-    def check_hallucination(self, answer, relevant_chunks):
-        """Check if the generated answer is grounded in the document facts."""
+    async def ais_meaningful_answer(self, answer):
+        """Asynchronous variant of is_meaningful_answer."""
+        response = await self.llm_handler.ainvoke_json(self.meaningful_messages(answer))
+        return response.get("binary_score", "").lower() == "yes"
+
+    def hallucination_messages(self, answer, relevant_chunks):
         facts = "\n\n".join([chunk.page_content for chunk in relevant_chunks])
         instructions = """You are a teacher grading a student's answer based on provided facts.
                         Criteria:
@@ -73,17 +266,203 @@ class ContentProcessor:
                         2. The student's answer should not contain information outside the scope of the facts.
                         Return JSON with two keys: 'binary_score' ('yes' or 'no') indicating if the answer meets the criteria, and 'explanation' providing reasoning."""
         prompt = f"""Facts:\n\n{facts}\n\nStudent's Answer:\n\n{answer}\n\nIs the student's answer grounded in the facts?"""
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    def check_hallucination(self, answer, relevant_chunks):
+        """Check if the generated answer is grounded in the document facts."""
         response = self.llm_handler.invoke_json(
-            [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+            self.hallucination_messages(answer, relevant_chunks)
+        )
+        return response.get("binary_score", "no")
+
+    async def acheck_hallucination(self, answer, relevant_chunks):
+        """Asynchronous variant of check_hallucination."""
+        response = await self.llm_handler.ainvoke_json(
+            self.hallucination_messages(answer, relevant_chunks)
         )
         return response.get("binary_score", "no")
 
+    def fused_messages(self, question, relevant_chunks):
+        context = "\n\n".join([chunk.page_content for chunk in relevant_chunks])
+        instructions = """You are an assistant for answering questions who also checks their own answer.
+                        Return JSON with three keys:
+                        'answer': a concise answer (maximum three sentences) based only on the context,
+                        'meaningful': 'yes' if the answer provides meaningful information, 'no' if it indicates lack of relevant information,
+                        'grounded': 'yes' if the answer is grounded in the context and contains no information outside of it, otherwise 'no'."""
+        prompt = f"""Context:\n\n{context}\n\nQuestion:\n\n{question}\n\nAnswer the question and grade your answer."""
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    def parse_fused_response(self, response):
+        """Return (answer, meaningful, grounded) from a fused response, or None if malformed."""
+        if not isinstance(response, dict):
+            return None
+        answer = response.get("answer")
+        flags = [str(response.get(key, "")).strip().lower() for key in ("meaningful", "grounded")]
+        if not isinstance(answer, str) or not answer.strip():
+            return None
+        if any(flag not in ("yes", "no", "true", "false") for flag in flags):
+            return None
+        meaningful, grounded = (flag in ("yes", "true") for flag in flags)
+        return answer.strip(), meaningful, grounded
+
+    async def aanswer_chain(self, question, relevant_chunks):
+        """Answer, then check the answer is meaningful and grounded, in three calls."""
+        answer = await self.agenerate_answer(question, relevant_chunks)
+        if not await self.ais_meaningful_answer(answer):
+            return None
+        if (await self.acheck_hallucination(answer, relevant_chunks)).lower() == "yes":
+            return answer
+        return None
+
+    async def aanswer_fused(self, question, relevant_chunks):
+        """Answer and verify in one JSON call, falling back to aanswer_chain if it is malformed."""
+        response = await self.llm_handler.ainvoke_json(
+            self.fused_messages(question, relevant_chunks)
+        )
+        parsed = self.parse_fused_response(response)
+        if parsed is None:
+            logging.warning("Fused answer output is malformed, using the three-call chain.")
+            return await self.aanswer_chain(question, relevant_chunks)
+        answer, meaningful, grounded = parsed
+        return answer if meaningful and grounded else None
+
+    def multi_question_messages(self, questions, chunks):
+        context = "\n\n".join([chunk.page_content for chunk in chunks])
+        numbered = "\n".join(f"{number}. {question}" for number, question in enumerate(questions, 1))
+        instructions = """You are an assistant for answering several questions about one document.
+                        Answer each question concisely (maximum three sentences) using only the context.
+                        If the context does not contain the information a question asks for, use null as its answer."""
+        prompt = f"""Context:\n\n{context}\n\nQuestions:\n\n{numbered}\n\nReturn JSON with a single key 'answers' holding an object that maps each question number, as a string such as "1", to its answer or null."""
+        return [SystemMessage(content=instructions), HumanMessage(content=prompt)]
+
+    @staticmethod
+    def multi_answer_question(key, questions):
+        """Return the question an answer key refers to, or None.
+
+        Keys are question numbers ("1", "1.") as asked, but models also echo the
+        numbered question ("1. Is Python required?") or the question alone.
+        """
+        key = str(key).strip()
+        if key in questions:
+            return key
+        match = re.match(r"(\d+)[.):]?\s*(.*)$", key, re.DOTALL)
+        if match is None:
+            return None
+        number, text = int(match.group(1)), match.group(2).strip()
+        if 1 <= number <= len(questions) and (not text or text == questions[number - 1]):
+            return questions[number - 1]
+        return text if text in questions else None
+
+    def parse_multi_answers(self, response, questions):
+        """Return {question: answer or None} from a multi-question response, or None if malformed.
+
+        A response none of whose keys refers to a question is malformed.
+        """
+        answers = response.get("answers") if isinstance(response, dict) else None
+        if not isinstance(answers, dict):
+            return None
+        by_question = {}
+        for key, answer in answers.items():
+            question = self.multi_answer_question(key, questions)
+            if question is not None:
+                by_question[question] = answer
+        if not by_question:
+            return None
+        parsed = {}
+        for question in questions:
+            answer = by_question.get(question)
+            if isinstance(answer, str) and answer.strip() and answer.strip().lower() != "null":
+                parsed[question] = answer.strip()
+            else:
+                parsed[question] = None
+        return parsed
+
+    def union_chunks(self, question_hits):
+        """Deduplicate the retrieved chunks of all questions, best cosine score first.
+
+        With a prefilter set, chunks in its 'dropped' band are left out.
+        """
+        best = {}
+        for hits in question_hits:
+            for chunk, score in hits:
+                if self.prefilter is not None and self.prefilter_band(score) == "dropped":
+                    continue
+                if id(chunk) not in best or score > best[id(chunk)][1]:
+                    best[id(chunk)] = (chunk, score)
+        return [chunk for chunk, _ in sorted(best.values(), key=lambda hit: hit[1], reverse=True)]
+
+    def pack_context_batches(self, chunks, questions):
+        """Pack chunks into batches whose prompts fit in llm_max_tokens."""
+        count_tokens = self.chunker.count_tokens
+        reserved = count_tokens("\n".join(questions)) + 50 * len(questions)
+        budget = max(self.llm_max_tokens - reserved, 1)
+        batches, current, current_tokens = [], [], 0
+        for chunk in chunks:
+            chunk_tokens = count_tokens(chunk.page_content)
+            if current and current_tokens + chunk_tokens > budget:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(chunk)
+            current_tokens += chunk_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def aanswer_questions_multi(self, content_questions, question_hits, source=None):
+        """Answer all questions for one source together; return its QA pairs.
+
+        The union of the chunks retrieved for every question is sent with all
+        questions in one JSON call. Pages too long for one call are split into
+        batches, and each following batch only gets the questions still
+        unanswered. If a response is malformed, the remaining questions go
+        through the per-question path.
+        """
+        answers = {}
+        remaining = list(content_questions)
+        if self.checkpoint is not None and source is not None:
+            for question in content_questions:
+                found, answer = self.checkpoint.get_answer(source, question)
+                if found:
+                    remaining.remove(question)
+                    if answer is not None:
+                        answers[question] = answer
+        asked = list(remaining)
+        for chunks in self.pack_context_batches(self.union_chunks(question_hits), remaining):
+            if not remaining:
+                break
+            response = await self.llm_handler.ainvoke_json(
+                self.multi_question_messages(remaining, chunks)
+            )
+            parsed = self.parse_multi_answers(response, remaining)
+            if parsed is None:
+                logging.warning("Multi-question output is malformed, answering questions one by one.")
+                hits_by_question = dict(zip(content_questions, question_hits))
+                answers.update(
+                    await self.aanswer_questions(
+                        remaining, [hits_by_question[q] for q in remaining], source
+                    )
+                )
+                break
+            answers.update({q: answer for q, answer in parsed.items() if answer is not None})
+            remaining = [q for q in remaining if q not in answers]
+        if self.checkpoint is not None and source is not None:
+            for question in asked:
+                self.checkpoint.put_answer(source, question, answers.get(question))
+        return {q: answers[q] for q in content_questions if q in answers}
+
     def summarize_documents_map_reduce(self, documents):
         """Summarize documents using a map-reduce approach."""
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=self.llm_max_tokens, chunk_overlap=self.llm_max_tokens // 10
-        )
-        doc_chunks = text_splitter.split_documents(documents)
+        return asyncio.run(self.asummarize_documents_map_reduce(documents))
+
+    async def asummarize_documents_map_reduce(self, documents):
+        """Summarize documents using a map-reduce approach.
+
+        All map steps run as one concurrent batch and every reduce level reduces
+        its groups in parallel. Token counts are memoized by the chunker. With
+        `stream_summary`, the first reduce level starts as soon as enough map
+        outputs have arrived in order to fill a group.
+        """
+        doc_chunks = self.split_summary_windows(documents)
 
         map_template = "You are an expert content summarizer. Combine your understanding of the following into a detailed nested bullet point summary:\n\n{context}"
         map_prompt = ChatPromptTemplate.from_messages([("human", map_template)])
@@ -95,71 +474,480 @@ class ContentProcessor:
         """
         reduce_prompt = ChatPromptTemplate.from_messages([("human", reduce_template)])
 
-        map_chain = map_prompt | self.llm_handler.llm | StrOutputParser()
-        reduce_chain = reduce_prompt | self.llm_handler.llm | StrOutputParser()
+        async def reduce(summaries):
+            messages = reduce_prompt.format_messages(docs="\n\n".join(summaries))
+            response = await self.llm_handler.ainvoke_text(messages)
+            return response.content
+
+        count_tokens = self.chunker.count_tokens
+        map_messages = [
+            map_prompt.format_messages(context=chunk.page_content) for chunk in doc_chunks
+        ]
+        if self.stream_summary:
+            summaries = await self.amap_streaming(map_messages, count_tokens, reduce)
+        else:
+            responses = await self.llm_handler.abatch_text(map_messages)
+            summaries = [response.content for response in responses]
+
+        while sum(count_tokens(summary) for summary in summaries) > self.llm_max_tokens:
+            groups = self.group_summaries(summaries, count_tokens)
+            summaries = await asyncio.gather(*(reduce(group) for group in groups))
+
+        final_summary = await reduce(summaries)
+
+        return final_summary
+
+    def group_summaries(self, summaries, count_tokens):
+        """Greedily pack consecutive summaries into groups of at most llm_max_tokens."""
+        groups, current_group, current_tokens = [], [], 0
+        for summary in summaries:
+            summary_tokens = count_tokens(summary)
+            if current_group and current_tokens + summary_tokens > self.llm_max_tokens:
+                groups.append(current_group)
+                current_group, current_tokens = [], 0
+            current_group.append(summary)
+            current_tokens += summary_tokens
+        if current_group:
+            groups.append(current_group)
+        return groups
 
-        summaries = [map_chain.invoke(chunk.page_content) for chunk in doc_chunks]
+    async def amap_streaming(self, map_messages, count_tokens, reduce):
+        """Run all map steps and reduce each full group as soon as its outputs are in.
 
-        def calculate_total_tokens(summaries):
-            return sum(
-                self.llm_handler.llm.get_num_tokens(summary) for summary in summaries
+        Map outputs are consumed in order, so groups are identical to those of
+        group_summaries. Returns the map summaries when they fit the context
+        window, otherwise the first level of reduced summaries.
+        """
+        map_tasks = [
+            asyncio.ensure_future(self.llm_handler.ainvoke_text(messages))
+            for messages in map_messages
+        ]
+        summaries, reduce_tasks = [], []
+        current_group, current_tokens = [], 0
+        for task in map_tasks:
+            summary = (await task).content
+            summaries.append(summary)
+            summary_tokens = count_tokens(summary)
+            if current_group and current_tokens + summary_tokens > self.llm_max_tokens:
+                reduce_tasks.append(asyncio.ensure_future(reduce(current_group)))
+                current_group, current_tokens = [], 0
+            current_group.append(summary)
+            current_tokens += summary_tokens
+        if not reduce_tasks:
+            return summaries
+        reduce_tasks.append(asyncio.ensure_future(reduce(current_group)))
+        return await asyncio.gather(*reduce_tasks)
+
+    def prefilter_band(self, score):
+        """Return the prefilter band of a cosine score: 'dropped', 'llm' or 'accepted'."""
+        lower, upper = self.prefilter
+        if score < lower:
+            return "dropped"
+        if score >= upper:
+            return "accepted"
+        return "llm"
+
+    async def arelevant_chunks(self, question, hits):
+        """Return the retrieved chunks judged relevant, applying the prefilter when set."""
+        if self.prefilter is None:
+            bands = ["llm"] * len(hits)
+        else:
+            bands = [self.prefilter_band(score) for _, score in hits]
+            for band in bands:
+                self.band_counts[band] += 1
+        if self.calibrate_prefilter:
+            graded = list(range(len(hits)))
+        else:
+            graded = [i for i, band in enumerate(bands) if band == "llm"]
+        grades = await self.agrade_chunks([hits[i][0].page_content for i in graded], question)
+        llm_grades = dict(zip(graded, grades))
+        if self.calibrate_prefilter and self.prefilter is not None:
+            self.calibration_records.extend(
+                (score, band, llm_grades[i])
+                for i, ((_, score), band) in enumerate(zip(hits, bands))
             )
+        relevant_chunks = []
+        for i, ((chunk, _), band) in enumerate(zip(hits, bands)):
+            relevant = llm_grades[i] if i in llm_grades else band == "accepted"
+            if relevant:
+                relevant_chunks.append(chunk)
+        return relevant_chunks
 
-        def split_summaries_into_chunks(summaries, max_tokens):
-            chunks, current_chunk, current_tokens = [], [], 0
-            for summary in summaries:
-                summary_tokens = self.llm_handler.llm.get_num_tokens(summary)
-                if current_tokens + summary_tokens <= max_tokens:
-                    current_chunk.append(summary)
-                    current_tokens += summary_tokens
-                else:
-                    chunks.append(current_chunk)
-                    current_chunk, current_tokens = [summary], summary_tokens
-            if current_chunk:
-                chunks.append(current_chunk)
-            return chunks
+    def prefilter_calibration_report(self):
+        """Compare prefilter band decisions with LLM grades recorded in calibration mode."""
+        report = {}
+        for band, expected in (("dropped", False), ("llm", None), ("accepted", True)):
+            grades = [grade for _, record_band, grade in self.calibration_records if record_band == band]
+            entry = {"chunks": len(grades), "llm_relevant": sum(grades)}
+            if expected is not None:
+                agreeing = sum(grade == expected for grade in grades)
+                entry["agreement"] = round(agreeing / len(grades), 3) if grades else None
+            report[band] = entry
+        report["llm_calls_saved"] = report["dropped"]["chunks"] + report["accepted"]["chunks"]
+        for label, relevant in (("relevant", True), ("irrelevant", False)):
+            scores = [score for score, _, grade in self.calibration_records if grade == relevant]
+            report[f"{label}_score_percentiles"] = (
+                {p: round(float(np.percentile(scores, p)), 3) for p in (10, 50, 90)}
+                if scores
+                else None
+            )
+        return report
 
-        while calculate_total_tokens(summaries) > self.llm_max_tokens:
-            chunks = split_summaries_into_chunks(summaries, self.llm_max_tokens)
-            summaries = [reduce_chain.invoke("\n\n".join(chunk)) for chunk in chunks]
+    async def aanswer_question(self, question, hits, source=None):
+        """Grade retrieved chunks, answer and verify one question; return the answer or None.
 
-        final_summary = reduce_chain.invoke("\n\n".join(summaries))
+        `source` is the URL the hits come from, used as the checkpoint key.
+        """
+        if self.checkpoint is not None and source is not None:
+            found, answer = self.checkpoint.get_answer(source, question)
+            if found:
+                return answer
+        answer = await self.agrade_and_answer(question, hits)
+        if self.checkpoint is not None and source is not None:
+            self.checkpoint.put_answer(source, question, answer)
+        return answer
 
-        return final_summary
+    async def agrade_and_answer(self, question, hits):
+        """Grade retrieved chunks, answer and verify one question, without the checkpoint."""
+        relevant_chunks = await self.arelevant_chunks(question, hits)
+        if not relevant_chunks:
+            return None
+        if self.answer_mode == "fused":
+            return await self.aanswer_fused(question, relevant_chunks)
+        return await self.aanswer_chain(question, relevant_chunks)
+
+    async def aanswer_questions(self, content_questions, question_hits, source=None):
+        """Answer all questions for one source concurrently; return its QA pairs."""
+        answers = await asyncio.gather(
+            *(
+                self.aanswer_question(question, hits, source)
+                for question, hits in zip(content_questions, question_hits)
+            )
+        )
+        qa_pairs = {}
+        for question, answer in zip(content_questions, answers):
+            if answer is not None:
+                qa_pairs[question] = answer
+        return qa_pairs
+
+    def hit_rate(self, question):
+        """Observed share of sources for which a question produced an answer."""
+        asked, hits = self.question_stats.get(question, (0, 0))
+        return (hits + 1) / (asked + 2)
+
+    async def aanswer_questions_adaptive(
+        self, content_questions, question_hits, leaderboard, source=None
+    ):
+        """Answer questions one at a time, stopping when the source cannot reach the top.
+
+        Questions run in ascending order of observed hit rate, so a weak source's
+        best possible count (answers so far plus questions left) drops fastest.
+        A source is dropped only when that bound is strictly below the leaderboard
+        cutoff, which keeps the top sources identical to exhaustive evaluation.
+        Returns the QA pairs in the original question order and whether the source
+        was pruned.
+        """
+        hits_by_question = dict(zip(content_questions, question_hits))
+        ordered = sorted(content_questions, key=self.hit_rate)
+        qa_pairs = {}
+        for position, question in enumerate(ordered):
+            if len(qa_pairs) + len(ordered) - position < leaderboard.cutoff():
+                return {q: qa_pairs[q] for q in content_questions if q in qa_pairs}, True
+            answer = await self.aanswer_question(question, hits_by_question[question], source)
+            asked, hits = self.question_stats.get(question, (0, 0))
+            self.question_stats[question] = (asked + 1, hits + (answer is not None))
+            if answer is not None:
+                qa_pairs[question] = answer
+        leaderboard.add(len(qa_pairs))
+        return {q: qa_pairs[q] for q in content_questions if q in qa_pairs}, False
+
+    async def aanswer_sources_adaptive(
+        self, titles, content_questions, retrieved, max_top_sources, urls=None
+    ):
+        """Evaluate sources with early termination; return their QA pairs in `titles` order.
+
+        `urls` optionally maps titles to the source URLs used as checkpoint keys.
+        """
+        urls = urls or {}
+        leaderboard = Leaderboard(max_top_sources)
+        semaphore = asyncio.Semaphore(self.max_concurrent_sources)
+
+        def promise(title):
+            return sum(hits[0][1] for hits in retrieved[title] if hits)
+
+        async def evaluate(title):
+            async with semaphore:
+                with span("answer", "source", source=urls.get(title)):
+                    return await self.aanswer_questions_adaptive(
+                        content_questions, retrieved[title], leaderboard, urls.get(title)
+                    )
+
+        scheduled = sorted(titles, key=promise, reverse=True)
+        tasks = {title: asyncio.ensure_future(evaluate(title)) for title in scheduled}
+        results = {title: await task for title, task in tasks.items()}
+        pruned = sum(was_pruned for _, was_pruned in results.values())
+        logging.info(f"Early termination pruned {pruned} of {len(titles)} sources")
+        return [results[title][0] for title in titles]
+
+    async def asummarize_source(self, documents, source=None):
+        """Map-reduce summary of one source, replayed from the checkpoint when recorded."""
+        with span("summary", "source", source=source):
+            if self.checkpoint is not None and source is not None:
+                summary = self.checkpoint.get_summary(source)
+                if summary is not None:
+                    annotate(cache_hit=1)
+                    return summary
+            summary = await self.asummarize_documents_map_reduce(documents)
+            if self.checkpoint is not None and source is not None:
+                self.checkpoint.put_summary(source, summary)
+            return summary
+
+    def estimate_summary_calls(self, documents):
+        """Lower bound of LLM calls a map-reduce summary of documents costs."""
+        return len(self.split_summary_windows(documents)) + 1
+
+    async def asummarize_ranked(self, source_items, ranked_titles, max_top_sources):
+        """Summarize ranked sources according to summary_mode; return {title: summary}.
+
+        In 'all' mode every source gets a map-reduce summary. In 'extractive'
+        mode only the top sources do, and the rest get an extractive summary.
+        """
+        if self.summary_mode == "all":
+            eager_titles = ranked_titles
+        else:
+            eager_titles = ranked_titles[:max_top_sources]
+        llm_summaries = await asyncio.gather(
+            *(
+                self.asummarize_source(
+                    source_items[title]["documents"], source_items[title]["url"]
+                )
+                for title in eager_titles
+            )
+        )
+        summaries = dict(zip(eager_titles, llm_summaries))
+        skipped_titles = ranked_titles[len(eager_titles) :]
+        saved_calls = 0
+        for title in skipped_titles:
+            documents = source_items[title]["documents"]
+            saved_calls += self.estimate_summary_calls(documents)
+            summaries[title] = extractive_summary(documents)
+        if skipped_titles:
+            logging.info(
+                f"Lazy summarization skipped {len(skipped_titles)} sources, "
+                f"saving at least {saved_calls} LLM calls"
+            )
+        return summaries
 
     def process_content(self, source_items, content_questions, max_top_sources):
         """Main method to process content using the LLM and return processed items."""
-        processed_items = {}
-        for title, data in source_items.items():
-            documents = data["documents"]
-            retriever = self.create_retriever(documents)
-            if retriever is None:
-                continue
-            qa_pairs = {}
-            for question in content_questions:
-                relevant_chunks = retriever.get_relevant_documents(question)
-                relevant_chunks = [
-                    chunk
-                    for chunk in relevant_chunks
-                    if self.is_relevant_chunk(chunk.page_content, question)
-                ]
-                if not relevant_chunks:
-                    continue
-                answer = self.generate_answer(question, relevant_chunks)
-                if not self.is_meaningful_answer(answer):
-                    continue
-                if self.check_hallucination(answer, relevant_chunks).lower() == "yes":
-                    qa_pairs[question] = answer
-            if qa_pairs:
-                summary = self.summarize_documents_map_reduce(documents)
-                processed_items[title] = {
-                    "url": data["url"],
-                    "summary": summary,
-                    "qa": qa_pairs,
-                }
-        ranked_items = sorted(
-            processed_items.items(), key=lambda x: len(x[1]["qa"]), reverse=True
+        return asyncio.run(
+            self.aprocess_content(source_items, content_questions, max_top_sources)
+        )
+
+    def reset_run_stats(self):
+        """Reset the per-run prefilter statistics."""
+        self.band_counts = {"dropped": 0, "llm": 0, "accepted": 0}
+        self.calibration_records = []
+
+    def log_run_stats(self, run_calls):
+        """Log the LLM calls counted by `run_calls`, prefilter bands and cache statistics."""
+        logging.info(f"LLM calls this run: {run_calls.calls}")
+        if self.prefilter is not None:
+            logging.info(f"Prefilter band counts: {self.band_counts}")
+        if isinstance(self.embeddings, CachedEmbeddings):
+            self.embeddings.log_stats()
+        if self.llm_handler.cache is not None:
+            self.llm_handler.cache.log_stats()
+        if self.checkpoint is not None:
+            self.checkpoint.log_stats()
+        self.chunker.log_stats()
+
+    async def aanswer_source(
+        self, content_questions, question_hits, leaderboard=None, source=None
+    ):
+        """Answer the questions for one source with the configured answer mode.
+
+        With early termination and a `leaderboard`, the source is evaluated by
+        aanswer_questions_adaptive. `source` is the URL of the source.
+        """
+        with span("answer", "source", source=source):
+            if self.answer_mode == "multi":
+                return await self.aanswer_questions_multi(
+                    content_questions, question_hits, source
+                )
+            if self.early_termination and leaderboard is not None:
+                qa_pairs, _ = await self.aanswer_questions_adaptive(
+                    content_questions, question_hits, leaderboard, source
+                )
+                return qa_pairs
+            return await self.aanswer_questions(content_questions, question_hits, source)
+
+    async def aprocess_content(
+        self, source_items, content_questions, max_top_sources, early_termination=None
+    ):
+        """Process all sources and questions concurrently and return ranked items.
+
+        `early_termination` overrides the processor's setting for this run.
+        """
+        if early_termination is None:
+            early_termination = self.early_termination
+        with counting_calls() as run_calls:
+            content_questions = list(dict.fromkeys(content_questions))
+            self.reset_run_stats()
+            # Chunking and embedding are CPU-bound; threads keep the event loop, and
+            # the other runs of a batch sharing it, responsive meanwhile.
+            with span("chunk"):
+                source_chunks = await asyncio.to_thread(self.split_sources, source_items)
+            with span("index"):
+                index = await asyncio.to_thread(self.create_index, source_chunks)
+            with span("retrieve"):
+                retrieved = {}
+                if index is not None:
+                    retrieved = await asyncio.to_thread(self.retrieve, index, content_questions)
+            titles = [title for title in source_items if title in retrieved]
+            with span("answer"):
+                if early_termination and self.answer_mode != "multi":
+                    answers = await self.aanswer_sources_adaptive(
+                        titles,
+                        content_questions,
+                        retrieved,
+                        max_top_sources,
+                        {title: source_items[title]["url"] for title in titles},
+                    )
+                else:
+                    answers = await asyncio.gather(
+                        *(
+                            self.aanswer_source(
+                                content_questions,
+                                retrieved[title],
+                                source=source_items[title]["url"],
+                            )
+                            for title in titles
+                        )
+                    )
+            qa_by_title = {title: qa for title, qa in zip(titles, answers) if qa}
+            ranked_titles = sorted(
+                qa_by_title, key=lambda title: len(qa_by_title[title]), reverse=True
+            )
+            with span("summarize"):
+                summaries = await self.asummarize_ranked(
+                    source_items, ranked_titles, max_top_sources
+                )
+            ranked_items = [
+                (
+                    title,
+                    result_item(
+                        source_items[title]["url"],
+                        summaries[title],
+                        qa_by_title[title],
+                        source_items[title].get("aliases"),
+                    ),
+                )
+                for title in ranked_titles
+            ]
+        self.log_run_stats(run_calls)
+        top_items = dict(ranked_items[:max_top_sources])
+        less_relevant_items = dict(ranked_items[max_top_sources:])
+        return {"top_items": top_items, "less_relevant_items": less_relevant_items}
+
+    def process_incremental(self, source_items, content_questions, max_top_sources, seen_index):
+        """Process only new or changed sources, merging stored results of the others."""
+        return asyncio.run(
+            self.aprocess_incremental(
+                source_items, content_questions, max_top_sources, seen_index
+            )
+        )
+
+    async def aprocess_incremental(
+        self, source_items, content_questions, max_top_sources, seen_index
+    ):
+        """Process new or changed sources and merge in the stored results of the others.
+
+        A source is reused when `seen_index` holds results for its URL, computed
+        from the same content with the same questions and model. Results of the
+        processed sources are stored back. Stored sources that rank among the
+        top sources but only have an extractive or no summary get an LLM summary.
+        Early termination does not apply to the new or changed sources.
+        """
+        content_questions = list(dict.fromkeys(content_questions))
+        fingerprint = seen_index.fingerprint(
+            content_questions, self.llm_handler.llm_name, self.llm_handler.llm_model
+        )
+        stored, changed = {}, {}
+        for title, item in source_items.items():
+            record = seen_index.get(item["url"], fingerprint, item["documents"])
+            if record is None:
+                changed[title] = item
+            else:
+                stored[title] = record
+        logging.info(
+            f"Incremental run: {len(changed)} new or changed sources, {len(stored)} reused"
         )
+
+        # Early termination would store the partial QA pairs of pruned sources as
+        # final, and later runs would reuse them; the subset is answered in full.
+        processed = await self.aprocess_content(
+            changed, content_questions, max_top_sources, early_termination=False
+        )
+        results = {}
+        for key, items in processed.items():
+            for title, item in items.items():
+                llm_summary = self.summary_mode == "all" or key == "top_items"
+                results[title] = dict(item, llm_summary=llm_summary)
+        for title, item in changed.items():
+            result = results.get(title, {"summary": None, "qa": {}, "llm_summary": False})
+            seen_index.put(
+                item["url"],
+                fingerprint,
+                item["documents"],
+                title,
+                result["qa"],
+                result["summary"],
+                result["llm_summary"],
+            )
+        for title, record in stored.items():
+            if record["qa"]:
+                results[title] = record
+
+        ranked_titles = sorted(
+            (title for title in source_items if title in results),
+            key=lambda title: len(results[title]["qa"]),
+            reverse=True,
+        )
+        unsummarized = [
+            title for title in ranked_titles[:max_top_sources] if not results[title]["llm_summary"]
+        ]
+        summaries = await asyncio.gather(
+            *(
+                self.asummarize_source(source_items[title]["documents"], source_items[title]["url"])
+                for title in unsummarized
+            )
+        )
+        for title, summary in zip(unsummarized, summaries):
+            results[title].update(summary=summary, llm_summary=True)
+            seen_index.put(
+                source_items[title]["url"],
+                fingerprint,
+                source_items[title]["documents"],
+                title,
+                results[title]["qa"],
+                summary,
+                True,
+            )
+        seen_index.log_stats()
+
+        ranked_items = [
+            (
+                title,
+                result_item(
+                    source_items[title]["url"],
+                    results[title]["summary"],
+                    results[title]["qa"],
+                    source_items[title].get("aliases"),
+                ),
+            )
+            for title in ranked_titles
+        ]
         top_items = dict(ranked_items[:max_top_sources])
         less_relevant_items = dict(ranked_items[max_top_sources:])
         return {"top_items": top_items, "less_relevant_items": less_relevant_items}
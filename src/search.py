@@ -1,4 +1,12 @@
 from abc import ABC, abstractmethod
+import asyncio
+import contextvars
+import html
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_google_community import GoogleSearchAPIWrapper
 import os
@@ -6,110 +14,635 @@ from googleapiclient.discovery import build
 from youtube_transcript_api import YouTubeTranscriptApi
 from langchain_core.documents import Document
 from datetime import datetime, timedelta
+from src.fetching import PageFetcher, html_to_documents, soup_to_documents
+from src.dedup import SourceDeduplicator
+from src.tracing import annotate, span
+from src.utils import canonical_url
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing call starts to at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may start its next call."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+async def iterate_in_thread(iterable):
+    """Iterate a blocking iterable without blocking the running event loop."""
+    iterator = iter(iterable)
+    done = object()
+    while (item := await asyncio.to_thread(next, iterator, done)) is not done:
+        yield item
 
 
 class BaseSearchEngine(ABC):
     """Base class for common search engine logic."""
 
+    def __init__(
+        self,
+        max_concurrency=8,
+        query_workers=4,
+        query_rate=5.0,
+        cache=None,
+        checkpoint=None,
+        near_duplicate_distance=3,
+    ):
+        """Set source loading concurrency, the parallelism and rate (per second) of
+        search queries, an optional DocumentCache for loaded documents, an
+        optional run Checkpoint recording them and the SimHash distance up to
+        which loaded pages count as near duplicates (negative to disable)."""
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.near_duplicate_distance = near_duplicate_distance
+        self.url_aliases = {}
+        self.query_workers = query_workers
+        self.rate_limiter = RateLimiter(query_rate)
+        self._local = threading.local()
+        self.query_results = None
+        self.loading = None
+        self.shared_session = None
+        self.query_lock = threading.Lock()
+        self.shared_stats = {"queries": 0, "reused_queries": 0, "loads": 0, "reused_loads": 0}
+
     @abstractmethod
-    def fetch_urls(self, queries, max_sources, time_horizon):
-        """Method to fetch unique URLs. Must be implemented by subclasses."""
+    def search_query(self, query, max_sources, time_horizon):
+        """Method to return the result URLs of a single query. Must be implemented by subclasses."""
         pass
 
+    def iter_urls(self, queries, max_sources, time_horizon):
+        """Yield the unique result URLs of all queries, see search_urls.
+
+        With a run checkpoint, the URLs of a completed search are replayed
+        instead of querying again, and a new search is recorded.
+        """
+        if self.checkpoint is None:
+            yield from self.search_urls(queries, max_sources, time_horizon)
+            return
+        urls = self.checkpoint.urls()
+        if urls is None:
+            urls = self.checkpoint.record_urls(
+                self.search_urls(queries, max_sources, time_horizon)
+            )
+        yield from urls
+
+    def search_urls(self, queries, max_sources, time_horizon):
+        """Run all queries in parallel and yield unique URLs in stable query order.
+
+        URLs of a query are yielded as soon as it and every query before it have
+        returned, so page loading can start before the slowest query finishes.
+        URLs are unique by canonical_url; the variants skipped are recorded in
+        `url_aliases` under the URL yielded.
+        """
+
+        def run_query(query):
+            with span("query", "search", query=query):
+                if self.query_results is not None:
+                    return self.shared_query(query, max_sources, time_horizon)
+                self.rate_limiter.wait()
+                try:
+                    return self.search_query(query, max_sources, time_horizon)
+                except Exception as e:
+                    print(f"Error searching for {query!r}: {e}")
+                    return []
+
+        seen = {}
+        with ThreadPoolExecutor(max_workers=self.query_workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run_query, query)
+                for query in queries
+            ]
+            for future in futures:
+                for url in future.result():
+                    key = canonical_url(url)
+                    if key not in seen:
+                        seen[key] = url
+                        yield url
+                    elif url != seen[key]:
+                        aliases = self.url_aliases.setdefault(seen[key], [])
+                        if url not in aliases:
+                            aliases.append(url)
+
+    def fetch_urls(self, queries, max_sources, time_horizon):
+        """Method to fetch unique URLs for all queries."""
+        return list(self.iter_urls(queries, max_sources, time_horizon))
+
+    def shared_query(self, query, max_sources, time_horizon):
+        """Run a query once per shared_work block; concurrent callers wait for the first."""
+        key = (query, max_sources, time_horizon)
+        with self.query_lock:
+            future = self.query_results.get(key)
+            owner = future is None
+            if owner:
+                future = self.query_results[key] = Future()
+            self.shared_stats["queries" if owner else "reused_queries"] += 1
+        if not owner:
+            annotate(shared=1)
+            return future.result()
+        self.rate_limiter.wait()
+        try:
+            urls = self.search_query(query, max_sources, time_horizon)
+        except Exception as e:
+            print(f"Error searching for {query!r}: {e}")
+            urls = []
+        future.set_result(urls)
+        return urls
+
+    @asynccontextmanager
+    async def shared_work(self):
+        """Share work between all runs started inside the block on the running loop.
+
+        Each distinct query is sent once, each URL is loaded once, and all loads
+        go through one session and therefore one connection budget.
+        """
+        self.query_results, self.loading = {}, {}
+        try:
+            async with self.open_session() as session:
+                self.shared_session = session
+                yield
+        finally:
+            self.query_results = self.loading = self.shared_session = None
+            logging.info(f"Shared search work: {self.shared_stats}")
+
+    @asynccontextmanager
+    async def run_session(self):
+        """Yield the shared session inside shared_work, otherwise open one for this run."""
+        if self.shared_session is not None:
+            yield self.shared_session
+        else:
+            async with self.open_session() as session:
+                yield session
+
+    async def aload_shared(self, url, session):
+        """Load a URL once per shared_work block; concurrent runs await the same load."""
+        if self.loading is None:
+            return await self.aload_source(url, session)
+        task = self.loading.get(url)
+        self.shared_stats["reused_loads" if task else "loads"] += 1
+        if task is None:
+            task = self.loading[url] = asyncio.ensure_future(self.aload_source(url, session))
+            return await asyncio.shield(task)
+        with span("load", "fetch", url=url, shared=1):
+            return await asyncio.shield(task)
+
     @abstractmethod
     def load_documents(self, url):
         """Method to load documents based on the URL. Must be implemented by subclasses."""
         pass
 
+    @asynccontextmanager
+    async def open_session(self):
+        """Yield a resource shared by all loads of one run. Subclasses may override."""
+        yield None
+
+    async def aload_documents(self, url, session):
+        """Load documents asynchronously; defaults to running load_documents in a thread."""
+        return await asyncio.to_thread(self.load_documents, url)
+
+    async def aload_with_validators(self, url, session, entry=None):
+        """Load documents and return them with their cache validators.
+
+        `entry` is the stale CacheEntry for the URL, if any. Subclasses that can
+        revalidate it return (None, {}) when the cached documents are still current.
+        """
+        return await self.aload_documents(url, session), {}
+
+    async def aload_cached(self, url, session):
+        """Load documents for a URL through the document cache, when one is set."""
+        if self.cache is None:
+            return await self.aload_documents(url, session)
+        entry = self.cache.get(url)
+        if entry is not None and entry.fresh:
+            annotate(cache_hit=1)
+            return entry.documents
+        documents, validators = await self.aload_with_validators(url, session, entry)
+        if documents is None:
+            annotate(cache_hit=1)
+            self.cache.refresh(url)
+            return entry.documents
+        self.cache.put(url, documents, **validators)
+        return documents
+
+    async def aload_source(self, url, session):
+        """Load documents for a URL, replaying them from the run checkpoint when recorded."""
+        with span("load", "fetch", url=url):
+            if self.checkpoint is None:
+                return await self.aload_cached(url, session)
+            documents = self.checkpoint.get_documents(url)
+            if documents is None:
+                documents = await self.aload_cached(url, session)
+                if documents:
+                    self.checkpoint.put_documents(url, documents)
+            else:
+                annotate(cache_hit=1)
+            return documents
+
     def load_source_content(self, urls):
-        """Method to load the content from a list of URLs using subclass's load_documents."""
+        """Method to load the content from URLs using subclass's load_documents.
+
+        `urls` may be any iterable, including the stream returned by iter_urls.
+        """
+        return asyncio.run(self.aload_source_content(urls))
+
+    async def aload_source_content(self, urls_iterable):
+        """Load URLs concurrently as they arrive, keeping their order in the returned items."""
+        with span("load"):
+            loaded = [item async for item in self.aiter_source_content(urls_iterable)]
+        deduplicator = SourceDeduplicator(self.near_duplicate_distance)
         source_items = {}
-        for url in urls:
-            try:
-                documents = self.load_documents(url)
-                title = documents[0].metadata.get("title", url)
+        for _, url, documents in sorted(loaded, key=lambda item: item[0]):
+            title, _ = deduplicator.add(url, documents)
+            if title is not None:
                 source_items[title] = {"url": url, "documents": documents, "qa": {}}
-            except Exception as e:
-                print(f"Error loading documents from {url}: {e}")
-                continue
+        for title, item in source_items.items():
+            item["aliases"] = self.aliases(item["url"], deduplicator.aliases[title])
+        if deduplicator.collapsed:
+            logging.info(f"Collapsed {deduplicator.collapsed} near-duplicate sources")
         return source_items
 
+    def aliases(self, url, duplicate_urls):
+        """Return the URL variants and near-duplicate URLs recorded for a kept source."""
+        aliases = list(self.url_aliases.get(url, []))
+        for duplicate_url in duplicate_urls:
+            aliases += [duplicate_url, *self.url_aliases.get(duplicate_url, [])]
+        return aliases
+
+    async def aiter_source_content(self, urls_iterable, max_pending=None):
+        """Yield (position, url, documents) for every URL as soon as it is loaded.
+
+        `position` is the URL's index in the stream. At most max_concurrency loads
+        run at once and at most `max_pending` (default max_concurrency) loaded
+        sources wait for the consumer, so a slow consumer holds loading back
+        instead of piling documents up in memory. URLs that fail to load or have
+        no documents are skipped.
+        """
+        urls = asyncio.Queue()
+        loaded = asyncio.Queue(max_pending or self.max_concurrency)
+        done = object()
+
+        async def feed():
+            try:
+                position = 0
+                async for url in iterate_in_thread(urls_iterable):
+                    urls.put_nowait((position, url))
+                    position += 1
+            finally:
+                for _ in range(self.max_concurrency):
+                    urls.put_nowait(done)
+
+        async def work(session):
+            while (item := await urls.get()) is not done:
+                position, url = item
+                try:
+                    documents = await self.aload_shared(url, session)
+                except Exception as e:
+                    print(f"Error loading documents from {url}: {e}")
+                    documents = None
+                await loaded.put((position, url, documents))
+            await loaded.put(done)
+
+        async with self.run_session() as session:
+            feeder = asyncio.create_task(feed())
+            workers = [
+                asyncio.create_task(work(session)) for _ in range(self.max_concurrency)
+            ]
+            try:
+                finished = 0
+                while finished < len(workers):
+                    item = await loaded.get()
+                    if item is done:
+                        finished += 1
+                    elif item[2]:
+                        yield item
+                await feeder
+            finally:
+                for task in [feeder, *workers]:
+                    task.cancel()
+                await asyncio.gather(feeder, *workers, return_exceptions=True)
+        if self.cache is not None:
+            self.cache.log_stats()
+
 
 class GoogleSearchEngine(BaseSearchEngine):
     """Search engine class for Google."""
 
-    def fetch_urls(self, queries, max_sources, time_horizon):
-        search_wrapper = GoogleSearchAPIWrapper()
-        unique_urls = set()
-
-        for query in queries:
-            results = search_wrapper.results(
-                query,
-                max_sources,
-                search_params={"dateRestrict": f"d{time_horizon}", "gl": "EN"},
-            )
-            urls = [item["link"] for item in results]
-            unique_urls.update(urls)
+    def __init__(
+        self,
+        max_concurrency=16,
+        max_per_host=4,
+        timeout=20,
+        max_retries=3,
+        query_workers=4,
+        query_rate=5.0,
+        cache=None,
+        checkpoint=None,
+        near_duplicate_distance=3,
+        extract_content=True,
+    ):
+        """Configure the query dispatcher and the pooled HTTP fetcher used to load result pages.
+
+        With `extract_content` only the main content of each page is kept.
+        """
+        super().__init__(
+            max_concurrency,
+            query_workers,
+            query_rate,
+            cache,
+            checkpoint,
+            near_duplicate_distance,
+        )
+        self.max_per_host = max_per_host
+        self.extract_content = extract_content
+        self.timeout = timeout
+        self.max_retries = max_retries
 
-        return list(unique_urls)
+    @property
+    def search_wrapper(self):
+        """Per-thread API wrapper, as googleapiclient's transport is not thread-safe."""
+        wrapper = getattr(self._local, "search_wrapper", None)
+        if wrapper is None:
+            wrapper = self._local.search_wrapper = GoogleSearchAPIWrapper()
+        return wrapper
+
+    def search_query(self, query, max_sources, time_horizon):
+        """Return result links of a single Google Custom Search query."""
+        results = self.search_wrapper.results(
+            query,
+            max_sources,
+            search_params={"dateRestrict": f"d{time_horizon}", "gl": "EN"},
+        )
+        return [item["link"] for item in results]
 
     def load_documents(self, url):
         """Load documents using WebBaseLoader for Google URLs."""
         loader = WebBaseLoader(url)
-        return loader.load()
+        return soup_to_documents(loader.scrape(), url, self.extract_content)
+
+    @asynccontextmanager
+    async def open_session(self):
+        """Open one pooled HTTP session for all pages loaded in a run."""
+        async with PageFetcher(
+            max_concurrency=self.max_concurrency,
+            max_per_host=self.max_per_host,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+        ) as fetcher:
+            yield fetcher
+
+    async def aload_documents(self, url, fetcher):
+        """Fetch a page through the shared fetcher and parse it like WebBaseLoader."""
+        documents, _ = await self.aload_with_validators(url, fetcher)
+        return documents
+
+    async def aload_with_validators(self, url, fetcher, entry=None):
+        """Fetch a page, sending a conditional request when a stale cache entry exists."""
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        result = await fetcher.fetch(url, headers=headers or None)
+        if result.status == 304 and entry is not None:
+            return None, {}
+        documents = await asyncio.to_thread(
+            html_to_documents, result.text, url, self.extract_content
+        )
+        validators = {
+            "etag": result.headers.get("ETag"),
+            "last_modified": result.headers.get("Last-Modified"),
+        }
+        return documents, validators
+
+
+class TitleBatcher:
+    """Collects video title lookups of one event loop into batched API calls.
+
+    Lookups requested within `delay` seconds of each other are sent together,
+    at most `batch_size` IDs per call, through `lookup(video_ids)` run in a
+    thread. Each caller gets the title of its video, or None if the API does
+    not return it.
+    """
+
+    def __init__(self, lookup, batch_size=50, delay=0.05):
+        self.lookup = lookup
+        self.batch_size = batch_size
+        self.delay = delay
+        self.pending = {}
+        self.timer = None
+        self.tasks = set()
+
+    async def title(self, video_id):
+        loop = asyncio.get_running_loop()
+        future = self.pending.get(video_id)
+        if future is None:
+            future = self.pending[video_id] = loop.create_future()
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            elif self.timer is None:
+                self.timer = loop.call_later(self.delay, self.flush)
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Send the pending lookups as one batch."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, {}
+        if batch:
+            task = asyncio.ensure_future(self.resolve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def resolve(self, batch):
+        try:
+            titles = await asyncio.to_thread(self.lookup, list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for video_id, future in batch.items():
+            if not future.done():
+                future.set_result(titles.get(video_id))
+
+
+class YouTubeSession:
+    """Resources shared by the loads of one run: a bounded transcript thread pool
+    and a TitleBatcher."""
+
+    def __init__(self, transcript_workers, lookup_titles):
+        self.executor = ThreadPoolExecutor(max_workers=transcript_workers)
+        self.titles = TitleBatcher(lookup_titles)
 
 
 class YouTubeSearchEngine(BaseSearchEngine):
-    """Search engine class for YouTube."""
+    """Search engine class for YouTube.
 
-    def __init__(self):
+    Video titles come from the snippets of the search results. Titles that
+    are not known from a search, such as those of URLs replayed from a
+    checkpoint, are looked up in batches of up to 50 IDs per videos().list
+    call. Transcripts are fetched concurrently by `transcript_workers` threads.
+    """
+
+    def __init__(
+        self,
+        max_concurrency=8,
+        query_workers=4,
+        query_rate=5.0,
+        cache=None,
+        checkpoint=None,
+        near_duplicate_distance=3,
+        transcript_workers=8,
+    ):
+        super().__init__(
+            max_concurrency,
+            query_workers,
+            query_rate,
+            cache,
+            checkpoint,
+            near_duplicate_distance,
+        )
+        self.transcript_workers = transcript_workers
+        self.video_titles = {}
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY environment variable is not set")
-        self.youtube = self.authenticate_youtube()
 
     def authenticate_youtube(self):
         return build("youtube", "v3", developerKey=self.api_key)
 
-    def fetch_urls(self, queries, max_sources, time_horizon):
-        unique_urls = set()
-
-        for query in queries:
-            response = (
-                self.youtube.search()
-                .list(
-                    q=query,
-                    part="snippet",
-                    maxResults=max_sources,
-                    type="video",
-                    publishedAfter=(
-                        datetime.now() - timedelta(days=time_horizon)
-                    ).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                )
-                .execute()
+    @property
+    def youtube(self):
+        """Per-thread API client, as googleapiclient's transport is not thread-safe."""
+        client = getattr(self._local, "youtube", None)
+        if client is None:
+            client = self._local.youtube = self.authenticate_youtube()
+        return client
+
+    @staticmethod
+    def video_id(url):
+        return url.split("watch?v=")[-1]
+
+    def search_query(self, query, max_sources, time_horizon):
+        """Return video URLs of a single YouTube search query, keeping their titles."""
+        response = (
+            self.youtube.search()
+            .list(
+                q=query,
+                part="snippet",
+                maxResults=max_sources,
+                type="video",
+                publishedAfter=(
+                    datetime.now() - timedelta(days=time_horizon)
+                ).strftime("%Y-%m-%dT%H:%M:%SZ"),
             )
+            .execute()
+        )
+        urls = []
+        for item in response["items"]:
+            video_id = item["id"]["videoId"]
+            self.video_titles[video_id] = html.unescape(item["snippet"]["title"])
+            urls.append(f"https://www.youtube.com/watch?v={video_id}")
+        return urls
 
-            for item in response["items"]:
-                video_id = item["id"]["videoId"]
-                url = f"https://www.youtube.com/watch?v={video_id}"
-                unique_urls.add(url)
+    def lookup_titles(self, video_ids):
+        """Return {video_id: title} for up to 50 videos with one videos().list call.
 
-        return list(unique_urls)
+        maxResults is not supported together with `id`; all listed IDs are returned.
+        """
+        response = self.youtube.videos().list(part="snippet", id=",".join(video_ids)).execute()
+        titles = {item["id"]: html.unescape(item["snippet"]["title"]) for item in response["items"]}
+        self.video_titles.update(titles)
+        return titles
+
+    @staticmethod
+    def transcript_documents(url, transcript, title):
+        content = " ".join([entry["text"] for entry in transcript])
+        metadata = {"url": url} if title is None else {"title": title, "url": url}
+        return [Document(page_content=content, metadata=metadata)]
 
     def load_documents(self, url):
         """Load documents by fetching YouTube transcripts."""
-        video_id = url.split("watch?v=")[-1]
+        video_id = self.video_id(url)
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        content = " ".join([entry["text"] for entry in transcript])
-        response = self.youtube.videos().list(part="snippet", id=video_id).execute()
-        title = response["items"][0]["snippet"]["title"]
-        return [Document(page_content=content, metadata={"title": title, "url": url})]
+        title = self.video_titles.get(video_id)
+        if title is None:
+            title = self.lookup_titles([video_id]).get(video_id)
+        return self.transcript_documents(url, transcript, title)
+
+    @asynccontextmanager
+    async def open_session(self):
+        """Open the transcript pool and title batcher shared by all loads of a run."""
+        session = YouTubeSession(self.transcript_workers, self.lookup_titles)
+        try:
+            yield session
+        finally:
+            session.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aload_documents(self, url, session):
+        """Fetch the transcript in the run's pool while the title is looked up if needed."""
+        video_id = self.video_id(url)
+        loop = asyncio.get_running_loop()
+        transcript = loop.run_in_executor(
+            session.executor, YouTubeTranscriptApi.get_transcript, video_id
+        )
+        title = self.video_titles.get(video_id)
+        if title is None:
+            try:
+                title = await session.titles.title(video_id)
+            except Exception:
+                transcript.cancel()
+                raise
+        return self.transcript_documents(url, await transcript, title)
 
 
-def get_search_engine(platform):
+def get_search_engine(
+    platform,
+    max_concurrency=8,
+    max_per_host=4,
+    timeout=20,
+    max_retries=3,
+    query_workers=4,
+    query_rate=5.0,
+    cache=None,
+    checkpoint=None,
+    near_duplicate_distance=3,
+    extract_content=True,
+    transcript_workers=8,
+):
     if platform == "google":
-        return GoogleSearchEngine()
+        return GoogleSearchEngine(
+            max_concurrency,
+            max_per_host,
+            timeout,
+            max_retries,
+            query_workers,
+            query_rate,
+            cache,
+            checkpoint,
+            near_duplicate_distance,
+            extract_content,
+        )
     elif platform == "youtube":
-        return YouTubeSearchEngine()
+        return YouTubeSearchEngine(
+            max_concurrency,
+            query_workers,
+            query_rate,
+            cache,
+            checkpoint,
+            near_duplicate_distance,
+            transcript_workers,
+        )
     else:
         raise ValueError("Invalid platform. Choose 'google' or 'youtube'.")
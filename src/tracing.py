@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Tracer of the running code, set by `tracing`; spans are no-ops without one.
+_tracer = ContextVar("tracer", default=None)
+# Innermost open span, annotated by `annotate`.
+_current_span = ContextVar("current_span", default=None)
+# Span attributes added up in the summary table.
+SUMMED_ATTRIBUTES = ("tokens_in", "tokens_out", "cache_hit", "shared")
+
+
+class Tracer:
+    """Records the spans of one run: name, category, start, duration and attributes.
+
+    The summary table aggregates them per (category, name); chrome_trace
+    exports them in the Chrome trace event format, viewable in
+    chrome://tracing or Perfetto.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def open(self, name, category):
+        """Called when a span starts; subclasses can follow runs in progress with it."""
+
+    def record(self, name, category, start, end, attributes):
+        with self.lock:
+            self.spans.append((name, category, start - self.origin, end - start, attributes))
+
+    def summary_rows(self):
+        """Return one dict per (category, name), most total time first."""
+        rows = {}
+        for name, category, _, duration, attributes in self.spans:
+            row = rows.setdefault(
+                (category, name),
+                {"category": category, "name": name, "count": 0, "total": 0.0, "max": 0.0,
+                 **{key: 0 for key in SUMMED_ATTRIBUTES}},
+            )
+            row["count"] += 1
+            row["total"] += duration
+            row["max"] = max(row["max"], duration)
+            for key in SUMMED_ATTRIBUTES:
+                row[key] += attributes.get(key) or 0
+        return sorted(rows.values(), key=lambda row: row["total"], reverse=True)
+
+    def summary_table(self):
+        """Per-stage table of span counts, durations, tokens and cache hits.
+
+        Durations of concurrent spans add up, so totals can exceed the wall time.
+        """
+        wall = max((start + duration for _, _, start, duration, _ in self.spans), default=0.0)
+        lines = [
+            f"Wall time {wall:.2f}s, {len(self.spans)} spans",
+            f"{'category':<10} {'name':<14} {'count':>6} {'total s':>9} {'mean ms':>9} "
+            f"{'max ms':>9} {'tokens in':>10} {'tokens out':>10} {'cache hits':>10} {'shared':>6}",
+        ]
+        for row in self.summary_rows():
+            lines.append(
+                f"{row['category']:<10} {row['name']:<14} {row['count']:>6} {row['total']:>9.2f} "
+                f"{row['total'] / row['count'] * 1000:>9.1f} {row['max'] * 1000:>9.1f} "
+                f"{row['tokens_in']:>10} {row['tokens_out']:>10} {row['cache_hit']:>10} "
+                f"{row['shared']:>6}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Return the spans as Chrome trace events, one lane per overlapping span."""
+        events, lanes = [], {}
+        for name, category, start, duration, attributes in sorted(
+            self.spans, key=lambda span: span[2]
+        ):
+            ends = lanes.setdefault(category, [])
+            lane = next((i for i, end in enumerate(ends) if end <= start), len(ends))
+            if lane == len(ends):
+                ends.append(0.0)
+                events.append(
+                    {"name": "thread_name", "ph": "M", "pid": 1, "tid": f"{category} {lane}",
+                     "args": {"name": f"{category} {lane}"}}
+                )
+            ends[lane] = start + duration
+            events.append(
+                {"name": name, "cat": category, "ph": "X", "pid": 1, "tid": f"{category} {lane}",
+                 "ts": start * 1e6, "dur": duration * 1e6, "args": attributes}
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, output_dir, chrome_trace=False):
+        """Write trace_summary.txt (and trace.json with `chrome_trace`) into the run directory."""
+        table = self.summary_table()
+        logging.info(f"Run trace summary:\n{table}")
+        with open(os.path.join(output_dir, "trace_summary.txt"), "w") as file:
+            file.write(table + "\n")
+        if chrome_trace:
+            with open(os.path.join(output_dir, "trace.json"), "w") as file:
+                json.dump(self.chrome_trace(), file, ensure_ascii=False, default=str)
+
+
+class Span:
+    """Times a `with` block and records it on exit; `set` adds attributes."""
+
+    __slots__ = ("tracer", "name", "category", "attributes", "start", "token")
+
+    def __init__(self, tracer, name, category, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.token = _current_span.set(self)
+        self.tracer.open(self.name, self.category)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.category, self.start, end, self.attributes)
+        return False
+
+
+class NullSpan:
+    """Span used when tracing is disabled; does nothing."""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name, category="stage", **attributes):
+    """Return a span timing a `with` block, or NULL_SPAN when no tracer is active."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, category, attributes)
+
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+@contextmanager
+def tracing(tracer):
+    """Record the spans of the code run in the block, and of tasks and threads it
+    starts with a copy of its context, on `tracer` (None disables tracing)."""
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
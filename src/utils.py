@@ -1,11 +1,12 @@
 import os
 import yaml
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
-def create_output_directory(base_path):
+def create_output_directory(base_path, suffix=None):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_dir = os.path.join(base_path, timestamp)
+    output_dir = os.path.join(base_path, f"{timestamp}_{suffix}" if suffix else timestamp)
     os.makedirs(output_dir, exist_ok=True)
     return output_dir
 
@@ -19,6 +20,54 @@ def save_results(processed_items, output_dir):
         yaml.dump(less_relevant_items, f, default_flow_style=False, sort_keys=False)
 
 
+def save_yaml(data, output_dir, file_name):
+    with open(os.path.join(output_dir, file_name), "w") as f:
+        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+
+
 def load_config(file_path):
     with open(file_path, "r") as file:
         return yaml.safe_load(file)
+
+
+def normalize_url(url):
+    """Return a canonical form of a URL for use as a cache or dedup key."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ""
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+TRACKING_PARAMETERS = {
+    "gclid", "fbclid", "msclkid", "dclid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "ref", "ref_src", "trk", "trackingid", "refid",
+}
+MOBILE_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+
+def canonical_url(url):
+    """Return the key under which URL variants of one page are considered the same.
+
+    On top of normalize_url it treats http as https and drops tracking
+    parameters (utm_* and the common click identifiers), www/mobile host
+    prefixes and trailing slashes.
+    """
+    parts = urlsplit(normalize_url(url))
+    netloc = parts.netloc
+    for prefix in MOBILE_HOST_PREFIXES:
+        if netloc.startswith(prefix):
+            netloc = netloc[len(prefix) :]
+            break
+    query = urlencode(
+        [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMETERS
+        ]
+    )
+    path = parts.path.rstrip("/") or "/"
+    scheme = "https" if parts.scheme == "http" else parts.scheme
+    return urlunsplit((scheme, netloc, path, query, ""))
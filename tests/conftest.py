@@ -3,3 +3,64 @@ import os
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from langchain_core.documents import Document
+from benchmarks.fakes import FakeChatModel, HashEmbeddings, WordEncoding
+from src.chunking import TokenChunker
+from src.llm import LLMHandler
+from src.processing import ContentProcessor
+
+
+@pytest.fixture
+def fake_llm_handler():
+    """LLMHandler whose text and JSON models are one shared FakeChatModel."""
+    llm_handler = LLMHandler("ollama", "fake-model")
+    llm_handler.llm = llm_handler.llm_json = FakeChatModel()
+    return llm_handler
+
+
+def split_paragraphs(documents):
+    """Tokenizer-free stand-in for the tiktoken splitters: one chunk per paragraph."""
+    return [
+        Document(page_content=paragraph, metadata=document.metadata)
+        for document in documents
+        for paragraph in document.page_content.split("\n\n")
+        if paragraph.strip()
+    ]
+
+
+@pytest.fixture
+def make_processor(fake_llm_handler):
+    """Build ContentProcessors on the fake LLM with hash embeddings, paragraph chunks
+    and word-count tokens."""
+
+    def make(**kwargs):
+        kwargs.setdefault("chunker", TokenChunker(WordEncoding()))
+        processor = ContentProcessor(fake_llm_handler, 7500, HashEmbeddings(), **kwargs)
+        processor.split_documents = split_paragraphs
+        processor.split_summary_windows = split_paragraphs
+        return processor
+
+    return make
+
+
+@pytest.fixture
+def job_sources():
+    """Five job-offer-like sources with a few paragraphs each."""
+    topics = ["Python and Docker", "SQL and Pandas", "remote work", "PyTorch", "Git and CI/CD"]
+    return {
+        f"Offer {i}": {
+            "url": f"https://jobs.example/{i}",
+            "documents": [
+                Document(
+                    page_content="\n\n".join(
+                        f"Offer {i} requires {topic} experience." for topic in topics[: i + 1]
+                    ),
+                    metadata={"title": f"Offer {i}"},
+                )
+            ],
+            "qa": {},
+        }
+        for i in range(5)
+    }
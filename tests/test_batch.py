@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+import yaml
+from benchmarks.fakes import FakeSearchEngine, default_responder
+from main_multiple_configs import arun_batch
+from src.cache import LLMCache
+
+
+def make_config(questions):
+    return {
+        "PLATFORM": "google",
+        "SEARCH_QUERIES": ["data engineer jobs", "python jobs"],
+        "MAX_SOURCES_PER_SEARCH_QUERY": 10,
+        "TIME_HORIZON_DAYS": 7,
+        "CONTENT_QUESTIONS": questions,
+        "MAX_TOP_SOURCES": 2,
+    }
+
+
+def test_batch_shares_queries_loads_and_llm_calls(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    prompts = []
+
+    def recording_responder(messages):
+        prompts.append(str(messages[-1].content))
+        return default_responder(messages)
+
+    fake_llm_handler.llm.responder = recording_responder
+    fake_llm_handler.cache = LLMCache()
+    configs = {
+        "python": make_config(["Is Python required?", "Is SQL required?"]),
+        "sql": make_config(["Is SQL required?", "Is Git required?"]),
+    }
+    engine = FakeSearchEngine(job_sources, delay=0.01)
+
+    asyncio.run(
+        arun_batch(
+            configs,
+            str(tmp_path),
+            {"google": engine},
+            lambda checkpoint: make_processor(checkpoint=checkpoint),
+        )
+    )
+
+    assert engine.loaded == len(job_sources)
+    assert engine.shared_stats["queries"] == 2
+    assert engine.shared_stats["reused_queries"] == 2
+    assert len(prompts) == len(set(prompts))
+    for name, config in configs.items():
+        with open(os.path.join(tmp_path, name, "top_items.yaml")) as file:
+            top_items = yaml.safe_load(file)
+        expected = make_processor().process_content(
+            job_sources, config["CONTENT_QUESTIONS"], 2
+        )
+        assert top_items == expected["top_items"]
+
+
+def test_embedding_does_not_block_other_runs_on_the_loop(make_processor, job_sources):
+    processor = make_processor()
+    processor.embeddings.latency = 0.2
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        ticker = asyncio.create_task(tick())
+        await processor.aprocess_content(job_sources, ["Is Python required?"], 2)
+        ticker.cancel()
+
+    asyncio.run(run())
+
+    assert len(ticks) > 10
+
+
+def test_concurrent_runs_log_their_own_llm_calls(
+    fake_llm_handler, make_processor, job_sources, caplog
+):
+    questions = {"python": ["Is Python required?"], "sql": ["Is SQL required?", "Is Git required?"]}
+
+    async def run_all():
+        await asyncio.gather(
+            *(make_processor().aprocess_content(job_sources, q, 2) for q in questions.values())
+        )
+
+    with caplog.at_level(logging.INFO):
+        asyncio.run(run_all())
+
+    counts = [
+        int(record.getMessage().rsplit(" ", 1)[1])
+        for record in caplog.records
+        if record.getMessage().startswith("LLM calls this run")
+    ]
+    assert len(counts) == 2
+    assert sum(counts) == fake_llm_handler.calls
+    assert min(counts) < max(counts)
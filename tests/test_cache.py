@@ -0,0 +1,71 @@
+import time
+import pytest
+from langchain_core.documents import Document
+from benchmarks.fakes import make_page, serve_pages
+from src.cache import DocumentCache
+from src.search import GoogleSearchEngine
+from src.utils import normalize_url
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "documents.sqlite")
+
+
+def test_normalize_url():
+    assert (
+        normalize_url("HTTPS://Example.com:443/offer?b=2&a=1#apply")
+        == "https://example.com/offer?a=1&b=2"
+    )
+    assert normalize_url("http://example.com") == "http://example.com/"
+
+
+def test_get_put_and_counters(cache_path):
+    cache = DocumentCache(cache_path)
+    assert cache.get("https://example.com/a") is None
+    cache.put("https://example.com/a", [Document("text", metadata={"title": "A"})])
+
+    entry = DocumentCache(cache_path).get("https://EXAMPLE.com/a#top")
+    assert entry.fresh
+    assert entry.documents[0].page_content == "text"
+    assert entry.documents[0].metadata == {"title": "A"}
+    assert cache.stats["misses"] == 1
+
+
+def test_ttl_marks_entries_stale(cache_path):
+    cache = DocumentCache(cache_path, ttl=0.05)
+    cache.put("https://example.com/a", [Document("text")])
+    time.sleep(0.1)
+    assert not cache.get("https://example.com/a").fresh
+    assert cache.stats["stale"] == 1
+
+
+def test_lru_eviction(cache_path):
+    cache = DocumentCache(cache_path, max_bytes=250)
+    cache.put("https://example.com/a", [Document("a" * 50)])
+    cache.put("https://example.com/b", [Document("b" * 50)])
+    cache.get("https://example.com/a")
+    cache.put("https://example.com/c", [Document("c" * 50)])
+
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/a") is not None
+    assert cache.get("https://example.com/c") is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_load_source_content_uses_cache_and_revalidates(cache_path):
+    pages = {"/offer/0": make_page(0)}
+    request_log = []
+    with serve_pages(pages, request_log=request_log) as base_url:
+        urls = [base_url + "/offer/0"]
+        cache = DocumentCache(cache_path, ttl=60)
+        engine = GoogleSearchEngine(cache=cache)
+        first = engine.load_source_content(urls)
+        second = engine.load_source_content(urls)
+        cache.ttl = 0
+        third = engine.load_source_content(urls)
+
+    assert first.keys() == second.keys() == third.keys() == {"Offer 0"}
+    assert request_log == [("/offer/0", 200), ("/offer/0", 304)]
+    assert cache.stats["hits"] == 1
+    assert cache.stats["revalidated"] == 1
@@ -0,0 +1,66 @@
+import pytest
+from langchain_core.documents import Document
+from benchmarks.fakes import FakeSearchEngine
+from src.checkpoint import Checkpoint
+
+QUESTIONS = ["Is Python required?", "Is SQL required?"]
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path))
+    urls = checkpoint.record_urls(iter(["https://a.example", "https://b.example"]))
+    next(urls)
+    assert checkpoint.urls() is None
+    list(urls)
+    checkpoint.put_documents("https://a.example", [Document("text", metadata={"title": "A"})])
+    checkpoint.put_answer("https://a.example", QUESTIONS[0], "Yes.")
+    checkpoint.put_answer("https://a.example", QUESTIONS[1], None)
+    checkpoint.put_summary("https://a.example", "Summary.")
+
+    reopened = Checkpoint(str(tmp_path))
+
+    assert reopened.urls() == ["https://a.example", "https://b.example"]
+    assert reopened.get_documents("https://a.example") == [
+        Document("text", metadata={"title": "A"})
+    ]
+    assert reopened.get_documents("https://b.example") is None
+    assert reopened.get_answer("https://a.example", QUESTIONS[0]) == (True, "Yes.")
+    assert reopened.get_answer("https://a.example", QUESTIONS[1]) == (True, None)
+    assert reopened.get_answer("https://b.example", QUESTIONS[0]) == (False, None)
+    assert reopened.get_summary("https://a.example") == "Summary."
+
+
+@pytest.mark.parametrize("answer_mode", ["chain", "multi"])
+def test_resumed_run_replays_recorded_work(
+    fake_llm_handler, make_processor, job_sources, tmp_path, answer_mode
+):
+    def run():
+        checkpoint = Checkpoint(str(tmp_path))
+        engine = FakeSearchEngine(job_sources, checkpoint=checkpoint)
+        processor = make_processor(answer_mode=answer_mode, checkpoint=checkpoint)
+        source_items = engine.load_source_content(engine.iter_urls(["jobs"], 10, 7))
+        return engine, processor.process_content(source_items, QUESTIONS, 2)
+
+    first_engine, first = run()
+    calls = fake_llm_handler.calls
+    resumed_engine, resumed = run()
+
+    assert resumed == first
+    assert fake_llm_handler.calls == calls
+    assert first_engine.loaded == len(job_sources)
+    assert resumed_engine.loaded == 0
+
+
+def test_interrupted_run_only_redoes_missing_answers(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    checkpoint = Checkpoint(str(tmp_path))
+    complete = make_processor().process_content(job_sources, QUESTIONS, 2)
+    calls_per_run = fake_llm_handler.calls
+    for item in complete["top_items"].values():
+        checkpoint.put_answer(item["url"], QUESTIONS[0], item["qa"][QUESTIONS[0]])
+
+    resumed = make_processor(checkpoint=checkpoint).process_content(job_sources, QUESTIONS, 2)
+
+    assert resumed == complete
+    assert fake_llm_handler.calls - calls_per_run < calls_per_run
@@ -0,0 +1,50 @@
+from langchain_core.documents import Document
+from benchmarks.fakes import WordEncoding
+from src.chunking import TokenChunker
+
+
+def transcript(words):
+    return " ".join(f"word{i}" for i in range(words))
+
+
+def test_retrieval_chunks_and_summary_windows_share_one_encoding():
+    encoding = WordEncoding()
+    chunker = TokenChunker(
+        encoding, chunk_size=100, chunk_overlap=20, window_size=400, window_overlap=40
+    )
+    documents = [Document(page_content=transcript(1000), metadata={"title": "Talk"})]
+
+    chunks = chunker.retrieval_chunks(documents)
+    windows = chunker.summary_windows(documents)
+
+    assert encoding.encodes == 1
+    assert chunker.stats["encoded"] == 1 and chunker.stats["reused"] == 1
+    assert [len(chunk.page_content.split()) for chunk in chunks] == [100] * 12 + [40]
+    assert chunks[1].page_content.split()[0] == "word80"
+    assert chunks[-1].page_content.split()[-1] == "word999"
+    assert [len(window.page_content.split()) for window in windows] == [400, 400, 280]
+    assert all(chunk.metadata == {"title": "Talk"} for chunk in chunks + windows)
+    assert chunker.stats["retrieval_tokens"] == 1240
+    assert chunker.stats["summary_tokens"] == 1080
+
+
+def test_chunks_end_at_paragraph_breaks():
+    paragraphs = [transcript(30), transcript(30), transcript(30)]
+    chunker = TokenChunker(WordEncoding(), chunk_size=50, chunk_overlap=0)
+
+    chunks = chunker.retrieval_chunks([Document(page_content="\n\n".join(paragraphs))])
+
+    assert [chunk.page_content for chunk in chunks] == paragraphs
+
+
+def test_count_tokens_is_memoized_and_reuses_chunk_counts():
+    encoding = WordEncoding()
+    chunker = TokenChunker(encoding, chunk_size=10, chunk_overlap=0)
+    chunks = chunker.retrieval_chunks([Document(page_content=transcript(25))])
+    encodes = encoding.encodes
+
+    assert [chunker.count_tokens(chunk.page_content) for chunk in chunks] == [10, 10, 5]
+    assert chunker.count_tokens("a short summary") == 3
+    assert chunker.count_tokens("a short summary") == 3
+    assert encoding.encodes == encodes + 1
+    assert chunker.stats["counted_tokens"] == 3
@@ -0,0 +1,131 @@
+import os
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from benchmarks.fakes import FakeSearchEngine, make_page, serve_pages
+from src.dedup import NearDuplicateIndex, SourceDeduplicator, hamming_distance, simhash
+from src.extraction import extract_main_text
+from src.search import GoogleSearchEngine
+from src.utils import canonical_url
+
+OFFER = (
+    "Senior Data Engineer at Example Corp. You will build batch and streaming pipelines "
+    "with Python, Spark and Airflow, maintain our warehouse on BigQuery and work with "
+    "analysts on data models. Your responsibilities include designing ingestion from "
+    "dozens of operational databases, owning data quality checks, reviewing pull "
+    "requests, mentoring two junior engineers and planning the migration of legacy cron "
+    "jobs to a managed orchestrator. We expect at least five years of experience with "
+    "SQL, solid knowledge of distributed processing, familiarity with Terraform and "
+    "Docker, and clear written communication in English. Nice to have are dbt, Kafka, "
+    "Looker and experience in e-commerce or logistics. We offer remote work within the "
+    "European Union, flexible hours, a yearly training budget, private health care, a "
+    "modern laptop of your choice and two team offsites per year in Lisbon or Krakow. "
+    "The recruitment process has three steps: a short call with a recruiter, a technical "
+    "interview with a case study and a final conversation with the head of data."
+)
+
+
+def test_canonical_url_collapses_tracking_and_mobile_variants():
+    canonical = canonical_url("https://example.com/jobs/1?id=7")
+    for variant in (
+        "https://example.com/jobs/1/?id=7&utm_source=board&utm_medium=feed",
+        "http://www.example.com/jobs/1?gclid=abc&id=7",
+        "https://m.example.com/jobs/1?id=7#apply",
+    ):
+        assert canonical_url(variant) == canonical
+    assert canonical_url("https://example.com/jobs/1?id=8") != canonical
+    assert canonical_url("https://example.com/jobs/2?id=7") != canonical
+
+
+def test_simhash_separates_near_duplicates_from_different_pages():
+    copy = OFFER.replace("Example Corp.", "Example Corp") + " Apply via JobBoard."
+    other = make_page(1)
+
+    assert hamming_distance(simhash(OFFER), simhash(copy)) <= 3
+    assert hamming_distance(simhash(OFFER), simhash(other)) > 3
+    index = NearDuplicateIndex(3)
+    index.add("offer", simhash(OFFER))
+    assert index.find(simhash(copy)) == "offer"
+    assert index.find(simhash(other)) is None
+
+
+def test_deduplicator_records_aliases_and_keeps_title_collisions_apart():
+    deduplicator = SourceDeduplicator(3)
+    offer = [Document(OFFER, metadata={"title": "Data Engineer"})]
+    different = [Document(make_page(1), metadata={"title": "Data Engineer"})]
+
+    assert deduplicator.add("https://a.example/1", offer) == ("Data Engineer", None)
+    assert deduplicator.add("https://b.example/9", offer) == (None, "Data Engineer")
+    assert deduplicator.add("https://c.example/2", different) == (
+        "Data Engineer (https://c.example/2)",
+        None,
+    )
+    assert deduplicator.aliases["Data Engineer"] == ["https://b.example/9"]
+
+
+def test_deduplicator_keeps_offers_differing_in_seniority_and_salary():
+    path = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "html")
+    with open(os.path.join(path, "job_offer.html"), encoding="utf-8") as file:
+        offer = extract_main_text(BeautifulSoup(file.read(), "html.parser"))
+    senior = (
+        offer.replace("Data Engineer", "Senior Data Engineer")
+        .replace("three years", "five years")
+        .replace("65,000 and 80,000", "85,000 and 100,000")
+    )
+    deduplicator = SourceDeduplicator()
+
+    for url, text in (("https://a.example/1", offer), ("https://a.example/2", senior)):
+        title, duplicate_of = deduplicator.add(url, [Document(text, metadata={"title": url})])
+        assert (title, duplicate_of) == (url, None)
+
+
+def test_deduplicator_never_collapses_short_pages():
+    deduplicator = SourceDeduplicator()
+
+    for title, text in (("A", ""), ("B", ""), ("C", "Job closed.")):
+        assert deduplicator.add(title, [Document(text, metadata={"title": title})]) == (title, None)
+    assert deduplicator.collapsed == 0
+
+
+class VariantSearchEngine(FakeSearchEngine):
+    def search_query(self, query, max_sources, time_horizon):
+        return [f"{url}?utm_source={query}" for url in self.pages] + list(self.pages)
+
+
+def test_search_urls_skip_canonical_variants_and_record_them():
+    engine = VariantSearchEngine(
+        {"a": {"url": "https://jobs.example/a", "documents": []}},
+    )
+
+    urls = engine.fetch_urls(["feed", "mail"], 10, 7)
+
+    assert urls == ["https://jobs.example/a?utm_source=feed"]
+    assert engine.url_aliases[urls[0]] == [
+        "https://jobs.example/a",
+        "https://jobs.example/a?utm_source=mail",
+    ]
+
+
+def test_load_source_content_collapses_syndicated_copies():
+    original = f"<html><head><title>Data Engineer</title></head><body><p>{OFFER}</p></body></html>"
+    pages = {
+        "/offer": original,
+        "/syndicated": original.replace("</p>", " Apply via JobBoard.</p>"),
+        "/other": make_page(1).replace("Offer 1</title>", "Data Engineer</title>"),
+    }
+    with serve_pages(pages) as base_url:
+        urls = [base_url + path for path in pages]
+        source_items = GoogleSearchEngine().load_source_content(urls)
+
+    assert list(source_items) == ["Data Engineer", f"Data Engineer ({urls[2]})"]
+    assert source_items["Data Engineer"]["aliases"] == [urls[1]]
+    assert source_items[f"Data Engineer ({urls[2]})"]["aliases"] == []
+
+
+def test_processed_items_list_aliases(make_processor, job_sources):
+    job_sources["Offer 4"]["aliases"] = ["https://m.jobs.example/4", "https://board.example/77"]
+
+    result = make_processor().process_content(job_sources, ["Is Python required?"], 2)
+
+    items = {**result["top_items"], **result["less_relevant_items"]}
+    assert items["Offer 4"]["aliases"] == job_sources["Offer 4"]["aliases"]
+    assert "aliases" not in items["Offer 0"]
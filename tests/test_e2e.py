@@ -0,0 +1,31 @@
+from argparse import Namespace
+from benchmarks.bench_e2e import regressions, run_main, run_process
+
+ARGS = Namespace(
+    llm_latency=0.0,
+    llm_concurrency=4,
+    summary_words=50,
+    fetch_latency=0.0,
+    query_latency=0.0,
+    max_tokens=7500,
+)
+
+
+def test_main_flow_runs_offline_like_process_content(tmp_path):
+    main_calls, main_sources = run_main(8, ARGS, str(tmp_path))
+    process_calls, process_sources = run_process(8, ARGS, str(tmp_path))
+
+    assert main_sources == process_sources > 0
+    assert main_calls == process_calls > 0
+    run_dir = next((tmp_path / "runs").iterdir())
+    assert (run_dir / "top_items.yaml").exists()
+    assert (run_dir / "trace_summary.txt").exists()
+
+
+def test_regressions_flag_slower_bigger_or_chattier_runs():
+    baseline = [{"flow": "main", "scale": 10, "wall_s": 1.0, "llm_calls": 100, "peak_rss_mb": 200}]
+    same = [dict(baseline[0], wall_s=1.2)]
+    worse = [dict(baseline[0], wall_s=1.5, llm_calls=101, peak_rss_mb=300)]
+
+    assert regressions(same, baseline, 0.25) == []
+    assert len(regressions(worse, baseline, 0.25)) == 3
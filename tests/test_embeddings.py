@@ -0,0 +1,48 @@
+import pytest
+from benchmarks.fakes import HashEmbeddings
+from src.embeddings import CachedEmbeddings, EmbeddingCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "embeddings.sqlite")
+
+
+def test_embeds_each_distinct_text_once():
+    embedder = HashEmbeddings()
+    embeddings = CachedEmbeddings(embedder, "fake", batch_size=2)
+
+    vectors = embeddings.embed_documents(["a", "b", "a", "c"])
+    embeddings.embed_documents(["b", "c"])
+
+    assert vectors[0] == vectors[2]
+    assert embedder.calls == 2
+    assert embeddings.stats["embedded"] == 3
+
+
+def test_persistent_cache_is_shared_across_instances(cache_path):
+    CachedEmbeddings(HashEmbeddings(), "fake", EmbeddingCache(cache_path)).embed_documents(
+        ["python", "docker"]
+    )
+
+    embedder = HashEmbeddings()
+    embeddings = CachedEmbeddings(embedder, "fake", EmbeddingCache(cache_path))
+    vectors = embeddings.embed_documents(["python", "docker", "sql"])
+
+    assert vectors[0] == pytest.approx(HashEmbeddings().vector("python"))
+    assert embeddings.stats["hits"] == 2
+    assert embeddings.stats["misses"] == 1
+    assert embeddings.hit_rate() == pytest.approx(2 / 3)
+
+
+def test_cache_key_includes_model_and_task(cache_path):
+    CachedEmbeddings(HashEmbeddings(), "model-a", EmbeddingCache(cache_path)).embed_documents(
+        ["python"]
+    )
+
+    embeddings = CachedEmbeddings(HashEmbeddings(), "model-b", EmbeddingCache(cache_path))
+    embeddings.embed_documents(["python"])
+    embeddings.embed_query("python")
+
+    assert embeddings.stats["hits"] == 0
+    assert embeddings.stats["misses"] == 2
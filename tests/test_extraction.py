@@ -0,0 +1,102 @@
+import logging
+import os
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.fakes import serve_pages
+from src.extraction import estimate_tokens, extract_main_text
+from src.fetching import html_to_documents
+from src.search import GoogleSearchEngine
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "html")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def test_extract_main_text_drops_boilerplate():
+    text = extract_main_text(BeautifulSoup(read_fixture("job_offer.html"), "html.parser"))
+
+    assert text.startswith("Data Engineer (m/f/d)")
+    assert "Very good knowledge of Python, Docker and SQL" in text
+    assert "65,000 and 80,000 EUR" in text
+    for boilerplate in ("cookies", "Candidate login", "Similar jobs", "Imprint", "Share on"):
+        assert boilerplate not in text
+
+
+def test_extract_main_text_scores_pages_without_landmarks():
+    text = extract_main_text(BeautifulSoup(read_fixture("forum_thread.html"), "html.parser"))
+
+    assert text.startswith("Erfahrungen mit Wärmepumpe im Altbau?")
+    assert "Jahresarbeitszahl von 3,0 bis 3,5" in text
+    for boilerplate in ("Anmelden", "Sanitär", "Heizungsangebote", "Impressum"):
+        assert boilerplate not in text
+
+
+def test_extract_main_text_falls_back_to_body_for_short_pages():
+    html = "<html><body><nav><a href='/'>Home</a></nav><div>Only a short note.</div></body></html>"
+
+    assert extract_main_text(BeautifulSoup(html, "html.parser")) == "Only a short note."
+
+
+PARAGRAPHS = "".join(
+    f"<p>Paragraph {i} of the offer: you build data pipelines with Python, SQL and Airflow, "
+    f"and work with analysts on reporting.</p>"
+    for i in range(4)
+)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        f"<form id='aspnetForm'><div class='menu'><a href='/'>Home</a></div>{PARAGRAPHS}</form>",
+        f"<div class='page layout-with-sidebar'><div>{PARAGRAPHS}</div>"
+        f"<div class='sidebar'><a href='/a'>Other offers</a></div></div>",
+        f"<div class='post comments-open'><h2>Data Engineer</h2>{PARAGRAPHS}</div>",
+    ],
+    ids=["form-wrapper", "sidebar-layout-wrapper", "comments-open-post"],
+)
+def test_extract_main_text_keeps_content_in_boilerplate_named_wrappers(body):
+    text = extract_main_text(BeautifulSoup(f"<html><body>{body}</body></html>", "html.parser"))
+
+    assert "Paragraph 0 of the offer" in text
+    assert "Paragraph 3 of the offer" in text
+    assert "Home" not in text and "Other offers" not in text
+
+
+def test_html_to_documents_keeps_full_page_when_extraction_leaves_too_little():
+    html = "<html><body><nav><a href='/'>Home</a></nav><div>Only a short note.</div></body></html>"
+
+    documents = html_to_documents(html, "https://short.example")
+
+    assert "Home" in documents[0].page_content
+    assert "Only a short note." in documents[0].page_content
+
+
+def test_html_to_documents_reports_tokens_and_keeps_metadata(caplog):
+    html = read_fixture("news_article.html")
+    raw = html_to_documents(html, "https://news.example/a", extract_content=False)
+    with caplog.at_level(logging.INFO):
+        extracted = html_to_documents(html, "https://news.example/a")
+
+    assert extracted[0].metadata == raw[0].metadata
+    before = estimate_tokens(raw[0].page_content)
+    after = estimate_tokens(extracted[0].page_content)
+    assert after < before * 0.75
+    assert f"https://news.example/a: {before} -> {after} tokens" in caplog.text
+
+
+def test_engine_loads_extracted_content():
+    pages = {"/job": read_fixture("job_offer.html")}
+    with serve_pages(pages) as base_url:
+        items = GoogleSearchEngine().load_source_content([base_url + "/job"])
+        raw_items = GoogleSearchEngine(extract_content=False).load_source_content(
+            [base_url + "/job"]
+        )
+
+    content = items["Data Engineer (m/f/d) - Berlin | Acme Careers"]["documents"][0].page_content
+    raw_content = raw_items["Data Engineer (m/f/d) - Berlin | Acme Careers"]["documents"][0]
+    assert "Python, Docker and SQL" in content
+    assert "Accept all" not in content
+    assert "Accept all" in raw_content.page_content
@@ -1,4 +1,102 @@
+import time
+from unittest.mock import patch
 import pytest
+from benchmarks.fakes import make_page, serve_pages
+from src.search import GoogleSearchEngine
+
 
 def test_template():
-    pass
\ No newline at end of file
+    pass
+
+
+def test_load_source_content_keeps_output_shape():
+    pages = {f"/offer/{i}": make_page(i) for i in range(5)}
+    with serve_pages(pages) as base_url:
+        urls = [base_url + path for path in pages] + [base_url + "/missing"]
+        source_items = GoogleSearchEngine().load_source_content(urls)
+
+    assert list(source_items) == [f"Offer {i}" for i in range(5)]
+    item = source_items["Offer 0"]
+    assert item["url"] == urls[0]
+    assert item["qa"] == {}
+    assert "Python, Docker and SQL" in item["documents"][0].page_content
+    assert item["documents"][0].metadata["language"] == "en"
+
+
+def test_load_source_content_retries_transient_errors():
+    pages = {"/offer/0": make_page(0)}
+    with serve_pages(pages, failures={"/offer/0": 2}) as base_url:
+        engine = GoogleSearchEngine(max_retries=2)
+        source_items = engine.load_source_content([base_url + "/offer/0"])
+
+    assert list(source_items) == ["Offer 0"]
+
+
+def test_fetch_urls_runs_queries_in_parallel_with_stable_order():
+    delays = {"slow": 0.3, "fast": 0.0, "medium": 0.1}
+
+    def results(query, max_sources, search_params):
+        time.sleep(delays[query])
+        return [{"link": f"https://{query}.example/{i}"} for i in range(2)] + [
+            {"link": "https://shared.example/"}
+        ]
+
+    with patch("src.search.GoogleSearchAPIWrapper") as wrapper_cls:
+        wrapper_cls.return_value.results.side_effect = results
+        engine = GoogleSearchEngine(query_workers=3, query_rate=0)
+        start = time.perf_counter()
+        urls = engine.fetch_urls(["slow", "fast", "medium"], 2, 30)
+        elapsed = time.perf_counter() - start
+
+    assert urls == [
+        "https://slow.example/0",
+        "https://slow.example/1",
+        "https://shared.example/",
+        "https://fast.example/0",
+        "https://fast.example/1",
+        "https://medium.example/0",
+        "https://medium.example/1",
+    ]
+    assert elapsed < 0.35
+
+
+def test_iter_urls_streams_before_slow_queries_finish():
+    def results(query, max_sources, search_params):
+        if query == "slow":
+            time.sleep(0.5)
+        return [{"link": f"https://{query}.example/"}]
+
+    with patch("src.search.GoogleSearchAPIWrapper") as wrapper_cls:
+        wrapper_cls.return_value.results.side_effect = results
+        engine = GoogleSearchEngine(query_workers=2, query_rate=0)
+        start = time.perf_counter()
+        stream = engine.iter_urls(["fast", "slow"], 1, 30)
+        assert next(stream) == "https://fast.example/"
+        assert time.perf_counter() - start < 0.3
+        assert list(stream) == ["https://slow.example/"]
+
+
+def test_rate_limiter_spaces_query_starts():
+    with patch("src.search.GoogleSearchAPIWrapper") as wrapper_cls:
+        wrapper_cls.return_value.results.return_value = []
+        engine = GoogleSearchEngine(query_workers=4, query_rate=20)
+        start = time.perf_counter()
+        engine.fetch_urls([f"q{i}" for i in range(5)], 1, 30)
+        elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.19
+
+
+def test_load_source_content_consumes_url_stream():
+    pages = {f"/offer/{i}": make_page(i) for i in range(3)}
+    with serve_pages(pages) as base_url, patch(
+        "src.search.GoogleSearchAPIWrapper"
+    ) as wrapper_cls:
+        wrapper_cls.return_value.results.side_effect = lambda query, *args, **kwargs: [
+            {"link": base_url + query}
+        ]
+        engine = GoogleSearchEngine(query_rate=0)
+        urls = engine.iter_urls(list(pages), 1, 30)
+        source_items = engine.load_source_content(urls)
+
+    assert list(source_items) == ["Offer 0", "Offer 1", "Offer 2"]
@@ -0,0 +1,113 @@
+import copy
+import os
+from langchain_core.documents import Document
+import main
+from benchmarks.fakes import FakeSearchEngine, keyword_responder
+from src.incremental import SeenIndex
+
+QUESTIONS = ["Is Python required?", "Is SQL required?", "Is Git required?"]
+
+
+def test_unchanged_sources_are_reused(fake_llm_handler, make_processor, job_sources, tmp_path):
+    fake_llm_handler.llm.responder = keyword_responder
+    seen_index = SeenIndex(os.path.join(tmp_path, "seen.sqlite"))
+    first = make_processor().process_incremental(job_sources, QUESTIONS, 2, seen_index)
+    calls = fake_llm_handler.calls
+
+    second = make_processor().process_incremental(job_sources, QUESTIONS, 2, seen_index)
+
+    assert fake_llm_handler.calls == calls
+    assert second == first == make_processor().process_content(job_sources, QUESTIONS, 2)
+    assert seen_index.stats["reused"] == len(job_sources)
+
+
+def test_only_new_and_changed_sources_are_processed(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    fake_llm_handler.llm.responder = keyword_responder
+    seen_index = SeenIndex(os.path.join(tmp_path, "seen.sqlite"))
+    make_processor().process_incremental(job_sources, QUESTIONS, 2, seen_index)
+
+    today = copy.deepcopy(job_sources)
+    today["Offer 0"]["documents"] = [
+        Document("Offer 0 requires Python, SQL and Git experience.", metadata={"title": "Offer 0"})
+    ]
+    today["Offer 5"] = {
+        "url": "https://jobs.example/5",
+        "documents": [Document("Offer 5 requires Git experience.", metadata={"title": "Offer 5"})],
+        "qa": {},
+    }
+    prompts = []
+
+    def recording_responder(messages):
+        prompts.append(str(messages[-1].content))
+        return keyword_responder(messages)
+
+    fake_llm_handler.llm.responder = recording_responder
+    merged = make_processor().process_incremental(today, QUESTIONS, 2, seen_index)
+
+    fake_llm_handler.llm.responder = keyword_responder
+    assert merged == make_processor().process_content(today, QUESTIONS, 2)
+    assert all("Offer 1" not in prompt and "Offer 2" not in prompt for prompt in prompts)
+    assert list(merged["top_items"])[0] == "Offer 0"
+
+
+def test_stored_source_entering_the_top_gets_an_llm_summary(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    fake_llm_handler.llm.responder = keyword_responder
+    seen_index = SeenIndex(os.path.join(tmp_path, "seen.sqlite"))
+    processor = make_processor(summary_mode="extractive")
+    first = processor.process_incremental(job_sources, QUESTIONS, 1, seen_index)
+    runner_up = list(first["less_relevant_items"])[0]
+
+    fewer_sources = {title: item for title, item in job_sources.items() if title not in first["top_items"]}
+    second = processor.process_incremental(fewer_sources, QUESTIONS, 1, seen_index)
+
+    assert list(second["top_items"]) == [runner_up]
+    eager = make_processor().process_content(fewer_sources, QUESTIONS, 1)
+    assert second["top_items"] == eager["top_items"]
+
+
+def test_incremental_runs_answer_sources_in_full_with_early_termination(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    fake_llm_handler.llm.responder = keyword_responder
+    seen_index = SeenIndex(os.path.join(tmp_path, "seen.sqlite"))
+    processor = make_processor(early_termination=True)
+    processor.process_incremental(job_sources, QUESTIONS, 1, seen_index)
+
+    first_offers = {title: job_sources[title] for title in ("Offer 0", "Offer 1", "Offer 2")}
+    merged = processor.process_incremental(first_offers, QUESTIONS, 1, seen_index)
+
+    exhaustive = make_processor().process_content(first_offers, QUESTIONS, 1)
+    assert merged == exhaustive
+    assert len(merged["top_items"]) + len(merged["less_relevant_items"]) == 3
+
+
+def test_run_search_uses_the_incremental_path_when_streaming_is_requested(
+    fake_llm_handler, make_processor, job_sources, tmp_path, monkeypatch
+):
+    fake_llm_handler.llm.responder = keyword_responder
+    monkeypatch.setattr(main, "INCREMENTAL", True)
+    monkeypatch.setattr(main, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        main, "build_search_engine", lambda *args, **kwargs: FakeSearchEngine(job_sources)
+    )
+    monkeypatch.setattr(
+        main, "build_content_processor", lambda *args, **kwargs: make_processor()
+    )
+    config = {
+        "SEARCH_QUERIES": ["data engineer"],
+        "CONTENT_QUESTIONS": QUESTIONS,
+        "MAX_TOP_SOURCES": 2,
+        "MAX_SOURCES_PER_SEARCH_QUERY": 10,
+        "TIME_HORIZON_DAYS": 7,
+        "PLATFORM": "google",
+    }
+    resources = {"document_cache": None, "llm_handler": fake_llm_handler, "embeddings": None}
+
+    main.run_search(config, str(tmp_path), resources, streaming=True)
+
+    assert (tmp_path / "cache" / "seen.sqlite").exists()
+    assert not (tmp_path / "results.jsonl").exists()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from langchain_community.vectorstores import SKLearnVectorStore
+from langchain_core.documents import Document
+from benchmarks.fakes import HashEmbeddings
+from src.index import VectorIndex
+
+WORDS = "python docker sql remote pytorch pandas git fastapi salary office team cloud".split()
+QUESTIONS = ["Is Python required?", "Is Docker required?", "Is this a remote job offer?"]
+
+
+@pytest.fixture
+def source_chunks():
+    rng = np.random.default_rng(0)
+    return {
+        f"source {s}": [
+            Document(" ".join(rng.choice(WORDS, size=6)) + f" chunk {s}-{c}")
+            for c in range(int(rng.integers(1, 8)))
+        ]
+        for s in range(6)
+    }
+
+
+def test_search_matches_per_source_sklearn_top3(source_chunks):
+    embeddings = HashEmbeddings()
+    index = VectorIndex.from_sources(source_chunks, embeddings)
+    results = index.search([embeddings.embed_query(q) for q in QUESTIONS], k=3)
+
+    for source_id, chunks in source_chunks.items():
+        k = min(len(chunks), 3)
+        retriever = SKLearnVectorStore.from_documents(chunks, embeddings).as_retriever(
+            search_kwargs={"k": k}
+        )
+        for question, hits in zip(QUESTIONS, results[source_id]):
+            expected = retriever.invoke(question)
+            assert len(hits) == k
+            assert sorted(chunk.page_content for chunk, _ in hits) == sorted(
+                chunk.page_content for chunk in expected
+            )
+
+
+def test_search_returns_scores_best_first(source_chunks):
+    embeddings = HashEmbeddings()
+    index = VectorIndex.from_sources(source_chunks, embeddings)
+    results = index.search([embeddings.embed_query("python docker")], k=3)
+
+    for hits in results.values():
+        scores = [score for _, score in hits[0]]
+        assert scores == sorted(scores, reverse=True)
+        assert all(-1.0 <= score <= 1.0 + 1e-6 for score in scores)
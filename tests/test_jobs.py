@@ -0,0 +1,72 @@
+import json
+import logging
+import threading
+import time
+from src.jobs import JobManager
+from src.tracing import span
+
+
+def wait(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_jobs_report_progress_and_partial_results_while_running(tmp_path):
+    release = threading.Event()
+    written = threading.Event()
+
+    def run(job):
+        with span("answer"):
+            for index in range(2):
+                with span("answer", "source", source=f"https://{index}.example"):
+                    pass
+            with open(f"{job.output_dir}/results.jsonl", "w") as file:
+                file.write(json.dumps({"title": "First", "qa": {}}) + "\n")
+                file.write('{"title": "Unfin')
+                file.flush()
+                written.set()
+                release.wait(5)
+        return {"top_items": {"First": {}}}
+
+    jobs = JobManager(str(tmp_path), max_workers=1)
+    job = jobs.submit(run, {"PLATFORM": "google"})
+    assert jobs.get(job.id) is job
+    assert written.wait(5)
+
+    progress = job.progress()
+    assert job.status == "running"
+    assert progress["stages"] == ["answer"]
+    assert progress["counts"]["Sources answered"] == 2
+    assert job.partial_results() == [{"title": "First", "qa": {}}]
+
+    release.set()
+    assert wait(job).status == "done"
+    assert job.result == {"top_items": {"First": {}}}
+    assert job.progress()["stages"] == []
+
+
+def test_concurrent_jobs_log_apart_and_failures_are_kept(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    both_started = threading.Barrier(2)
+
+    def run(job):
+        both_started.wait(5)
+        logging.info(f"working on {job.input_user['name']}")
+        if job.input_user["name"] == "broken":
+            raise ValueError("no results")
+        return {}
+
+    jobs = JobManager(str(tmp_path), max_workers=2)
+    good = jobs.submit(run, {"name": "good"})
+    broken = jobs.submit(run, {"name": "broken"})
+
+    assert wait(good).status == "done"
+    assert wait(broken).status == "failed"
+    assert isinstance(broken.error, ValueError)
+    assert good.output_dir != broken.output_dir
+    good_log = open(good.log_path).read()
+    broken_log = open(broken.log_path).read()
+    assert "working on good" in good_log and "broken" not in good_log
+    assert "working on broken" in broken_log and "no results" in broken_log
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from langchain_core.messages import HumanMessage, SystemMessage
+from src.cache import LLMCache
+
+GRADING_PROMPT = [
+    SystemMessage(content="You are a grader."),
+    HumanMessage(content="Is this a job offer page? Return JSON."),
+]
+
+
+def test_invoke_json_is_memoized(fake_llm_handler):
+    fake_llm_handler.cache = LLMCache()
+    first = fake_llm_handler.invoke_json(GRADING_PROMPT)
+    second = fake_llm_handler.invoke_json(GRADING_PROMPT)
+
+    assert first == second == {"binary_score": "yes"}
+    assert fake_llm_handler.llm.calls == 1
+    assert fake_llm_handler.cache.stats == {"hits": 1, "disk_hits": 0, "misses": 1}
+
+
+def test_cache_key_separates_modes_and_messages(fake_llm_handler):
+    fake_llm_handler.cache = LLMCache()
+    fake_llm_handler.invoke_text(GRADING_PROMPT)
+    fake_llm_handler.invoke_json(GRADING_PROMPT)
+    answer = fake_llm_handler.invoke_text([HumanMessage(content="Another question")])
+
+    assert answer.content == "Yes, the context mentions it."
+    assert fake_llm_handler.llm.calls == 3
+
+
+def test_invalid_json_is_not_cached(fake_llm_handler):
+    fake_llm_handler.cache = LLMCache()
+    fake_llm_handler.llm.responder = lambda messages: "not json"
+    assert fake_llm_handler.invoke_json(GRADING_PROMPT) == {"binary_score": "no"}
+    fake_llm_handler.invoke_json(GRADING_PROMPT)
+
+    assert fake_llm_handler.llm.calls == 2
+
+
+def test_disk_level_survives_restart(fake_llm_handler, tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    fake_llm_handler.cache = LLMCache(path)
+    first = fake_llm_handler.invoke_text(GRADING_PROMPT)
+
+    fake_llm_handler.cache = LLMCache(path)
+    second = fake_llm_handler.invoke_text(GRADING_PROMPT)
+
+    assert second.content == first.content
+    assert fake_llm_handler.llm.calls == 1
+    assert fake_llm_handler.cache.stats["disk_hits"] == 1
+
+
+def test_lru_size_cap_and_ttl():
+    cache = LLMCache(max_entries=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("c") is None
+
+
+def test_concurrent_identical_prompts_share_one_call(fake_llm_handler):
+    fake_llm_handler.llm.latency = 0.05
+
+    async def ask():
+        return await asyncio.gather(
+            *(fake_llm_handler.ainvoke_json(GRADING_PROMPT) for _ in range(5)),
+            fake_llm_handler.ainvoke_text(GRADING_PROMPT),
+        )
+
+    responses = asyncio.run(ask())
+
+    assert responses[:5] == [{"binary_score": "yes"}] * 5
+    assert fake_llm_handler.llm.calls == 2
+
+
+def test_provider_limit_holds_across_threads_and_event_loops(fake_llm_handler):
+    fake_llm_handler.llm.latency = 0.1
+    fake_llm_handler.max_concurrency = 2
+
+    def run_job(job):
+        prompts = [[HumanMessage(content=f"Job {job}, question {i}")] for i in range(4)]
+        asyncio.run(fake_llm_handler.abatch_text(prompts))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_job, args=(job,)) for job in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 8 requests, at most 2 in flight: 4 rounds of 0.1s in the whole process.
+    assert time.perf_counter() - start >= 0.4
+    assert fake_llm_handler.calls == fake_llm_handler.llm.calls == 8
+
+
+def test_cancelled_waiters_do_not_leak_provider_slots(fake_llm_handler):
+    fake_llm_handler.llm.latency = 0.05
+    fake_llm_handler.max_concurrency = 1
+
+    async def ask():
+        prompts = [[HumanMessage(content=f"Question {i}")] for i in range(3)]
+        waiting = asyncio.ensure_future(fake_llm_handler.abatch_text(prompts))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0.1)
+        return await fake_llm_handler.ainvoke_text([HumanMessage(content="After")])
+
+    assert asyncio.run(asyncio.wait_for(ask(), 1)).content
+    assert fake_llm_handler.provider_limit().active == 0
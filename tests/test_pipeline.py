@@ -0,0 +1,47 @@
+import json
+import os
+import pytest
+from benchmarks.fakes import FakeSearchEngine, keyword_responder
+from src.pipeline import StreamingPipeline
+
+QUESTIONS = ["Is Python required?", "Is SQL required?", "Is Git required?"]
+
+
+@pytest.mark.parametrize("summary_mode", ["all", "extractive"])
+def test_streaming_pipeline_matches_batch_processing(
+    fake_llm_handler, make_processor, job_sources, tmp_path, summary_mode
+):
+    fake_llm_handler.llm.responder = keyword_responder
+    batch = make_processor(summary_mode=summary_mode).process_content(job_sources, QUESTIONS, 2)
+
+    pipeline = StreamingPipeline(
+        FakeSearchEngine(job_sources), make_processor(summary_mode=summary_mode), tmp_path, 2
+    )
+    streamed = pipeline.run(["jobs"], 10, 7, QUESTIONS, 2)
+
+    assert streamed == batch
+    with open(os.path.join(tmp_path, "results.jsonl")) as file:
+        records = [json.loads(line) for line in file]
+    answered = {**batch["top_items"], **batch["less_relevant_items"]}
+    assert {record["title"]: record["qa"] for record in records} == {
+        title: item["qa"] for title, item in answered.items()
+    }
+
+
+def test_streaming_pipeline_writes_results_before_loading_finishes(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    engine = FakeSearchEngine(job_sources, delay=0.1, max_concurrency=1)
+    pipeline = StreamingPipeline(engine, make_processor(), tmp_path, 1)
+    loaded_at_write = []
+    write_result = pipeline.write_result
+
+    def record_write(title, result):
+        loaded_at_write.append(engine.loaded)
+        write_result(title, result)
+
+    pipeline.write_result = record_write
+    pipeline.run(["jobs"], 10, 7, QUESTIONS, 2)
+
+    assert len(loaded_at_write) == len(job_sources)
+    assert loaded_at_write[0] < len(job_sources)
@@ -1,6 +1,11 @@
+import asyncio
+import json
+import time
 import pytest
 from unittest.mock import MagicMock
 from src.processing import ContentProcessor
+from benchmarks.fakes import default_responder, keyword_responder
+from langchain_core.documents import Document as LangChainDocument
 
 CONTENT_QUESTIONS = ["What is the main topic?", "What are the key points?"]
 MAX_TOP_SOURCES = 2
@@ -45,3 +50,288 @@ def test_generate_answer(mock_llm_handler, sample_documents):
     answer = processor.generate_answer(CONTENT_QUESTIONS[0], sample_documents)
     assert answer == "Mocked response"
 
+
+
+def test_process_content_runs_llm_calls_concurrently(
+    fake_llm_handler, make_processor, job_sources
+):
+    questions = ["Is Python required?", "Is SQL required?", "Is this a remote job offer?"]
+    fake_llm_handler.llm.latency = 0.02
+    prompts = []
+
+    def recording_responder(messages):
+        prompts.append(str(messages[-1].content))
+        return default_responder(messages)
+
+    fake_llm_handler.llm.responder = recording_responder
+
+    fake_llm_handler.max_concurrency = 1
+    start = time.perf_counter()
+    sequential = make_processor().process_content(job_sources, questions, 2)
+    sequential_time = time.perf_counter() - start
+    calls = fake_llm_handler.llm.calls
+    sequential_prompts, prompts = prompts, []
+
+    fake_llm_handler.max_concurrency = 16
+    start = time.perf_counter()
+    concurrent = make_processor().process_content(job_sources, questions, 2)
+    concurrent_time = time.perf_counter() - start
+
+    assert concurrent == sequential
+    assert list(concurrent["top_items"]) == ["Offer 0", "Offer 1"]
+    assert set(prompts) == set(sequential_prompts)
+    assert sequential_time >= calls * 0.02
+    assert concurrent_time < sequential_time / 4
+
+
+def batch_responder(messages):
+    prompt = messages[-1].content
+    if "'scores'" in prompt:
+        count = prompt.count("Document ")
+        return json.dumps({"scores": ["yes"] * count})
+    return default_responder(messages)
+
+
+def test_batch_grading_reduces_llm_calls(fake_llm_handler, make_processor, job_sources):
+    questions = ["Is Python required?", "Is SQL required?"]
+    fake_llm_handler.llm.responder = batch_responder
+
+    per_chunk = make_processor().process_content(job_sources, questions, 2)
+    per_chunk_calls = fake_llm_handler.calls
+    batched = make_processor(batch_grading=True).process_content(job_sources, questions, 2)
+    batched_calls = fake_llm_handler.calls - per_chunk_calls
+
+    assert batched == per_chunk
+    assert batched_calls < per_chunk_calls
+
+
+def test_batch_grading_falls_back_on_malformed_output(fake_llm_handler, make_processor):
+    fake_llm_handler.llm.responder = lambda messages: '{"scores": ["yes"]}'
+    processor = make_processor(batch_grading=True)
+
+    grades = asyncio.run(processor.agrade_chunks(["a", "b", "c"], "Is Python required?"))
+
+    assert grades == [False, False, False]
+    assert fake_llm_handler.calls == 4
+
+
+def make_hits(scores):
+    return [(LangChainDocument(f"chunk scored {score}"), score) for score in scores]
+
+
+def test_prefilter_only_grades_ambiguous_band(fake_llm_handler, make_processor):
+    processor = make_processor(prefilter=(0.2, 0.8))
+    hits = make_hits([0.9, 0.5, 0.1])
+
+    relevant = asyncio.run(processor.arelevant_chunks("Is Python required?", hits))
+
+    assert [chunk.page_content for chunk in relevant] == ["chunk scored 0.9", "chunk scored 0.5"]
+    assert fake_llm_handler.calls == 1
+    assert processor.band_counts == {"dropped": 1, "llm": 1, "accepted": 1}
+
+
+def test_prefilter_calibration_grades_everything_and_reports(fake_llm_handler, make_processor):
+    fake_llm_handler.llm.responder = lambda messages: (
+        '{"binary_score": "no"}' if "0.1" in messages[-1].content else '{"binary_score": "yes"}'
+    )
+    processor = make_processor(prefilter=(0.3, 0.8), calibrate_prefilter=True)
+    hits = make_hits([0.9, 0.5, 0.2, 0.1])
+
+    relevant = asyncio.run(processor.arelevant_chunks("Is Python required?", hits))
+    report = processor.prefilter_calibration_report()
+
+    assert len(relevant) == 3
+    assert fake_llm_handler.calls == 4
+    assert report["dropped"] == {"chunks": 2, "llm_relevant": 1, "agreement": 0.5}
+    assert report["accepted"] == {"chunks": 1, "llm_relevant": 1, "agreement": 1.0}
+    assert report["llm_calls_saved"] == 3
+
+
+def test_streaming_summary_matches_tree_summary(fake_llm_handler, make_processor):
+    fake_llm_handler.llm.responder = lambda messages: " ".join(
+        str(messages[-1].content).split()[-40:]
+    )
+    documents = [
+        LangChainDocument("\n\n".join(f"paragraph {i} " + "word " * 50 for i in range(12)))
+    ]
+
+    results = []
+    for stream in (False, True):
+        processor = make_processor(stream_summary=stream)
+        processor.llm_max_tokens = 100
+        calls_before = fake_llm_handler.calls
+        summary = processor.summarize_documents_map_reduce(documents)
+        results.append((summary, fake_llm_handler.calls - calls_before))
+
+    assert results[0] == results[1]
+    assert results[0][1] > 13
+
+
+def test_group_summaries_packs_consecutive_summaries(make_processor):
+    processor = make_processor()
+    processor.llm_max_tokens = 5
+
+    groups = processor.group_summaries(
+        ["a b c d e f", "a b", "c d", "e f g"], lambda summary: len(summary.split())
+    )
+
+    assert groups == [["a b c d e f"], ["a b", "c d"], ["e f g"]]
+
+
+def test_extractive_summary_mode_only_summarizes_top_items(
+    fake_llm_handler, make_processor, job_sources
+):
+    questions = ["Is Python required?"]
+    eager = make_processor().process_content(job_sources, questions, 2)
+    eager_calls = fake_llm_handler.calls
+
+    lazy = make_processor(summary_mode="extractive").process_content(job_sources, questions, 2)
+    lazy_calls = fake_llm_handler.calls - eager_calls
+
+    assert lazy["top_items"] == eager["top_items"]
+    assert list(lazy["less_relevant_items"]) == list(eager["less_relevant_items"])
+    assert lazy_calls < eager_calls
+    for title, item in lazy["less_relevant_items"].items():
+        assert item["summary"].startswith(title)
+    with pytest.raises(ValueError):
+        make_processor(summary_mode="top")
+
+
+def test_early_termination_keeps_top_items(fake_llm_handler, make_processor, job_sources):
+    questions = [
+        "Is Python required?",
+        "Is SQL required?",
+        "Is remote work possible?",
+        "Is PyTorch needed?",
+        "Is Git required?",
+        "Is Python required?",
+    ]
+    fake_llm_handler.llm.responder = keyword_responder
+
+    exhaustive = make_processor().process_content(job_sources, questions, 2)
+    exhaustive_calls = fake_llm_handler.calls
+    processor = make_processor(early_termination=True, max_concurrent_sources=1)
+    adaptive = processor.process_content(job_sources, questions, 2)
+    adaptive_calls = fake_llm_handler.calls - exhaustive_calls
+
+    assert list(exhaustive["top_items"]) == ["Offer 4", "Offer 3"]
+    assert adaptive["top_items"] == exhaustive["top_items"]
+    assert adaptive_calls < exhaustive_calls
+    assert processor.question_stats["Is Python required?"][0] <= len(job_sources)
+
+
+def test_fused_answers_match_chain_with_fewer_calls(fake_llm_handler, make_processor, job_sources):
+    questions = ["Is Python required?", "Is SQL required?", "Is Scala required?"]
+    fake_llm_handler.llm.responder = keyword_responder
+
+    chain = make_processor().process_content(job_sources, questions, 2)
+    chain_calls = fake_llm_handler.calls
+    fused = make_processor(answer_mode="fused").process_content(job_sources, questions, 2)
+    fused_calls = fake_llm_handler.calls - chain_calls
+
+    for key in ("top_items", "less_relevant_items"):
+        assert {t: i["qa"] for t, i in fused[key].items()} == {
+            t: i["qa"] for t, i in chain[key].items()
+        }
+    assert fused_calls < chain_calls
+
+
+def test_fused_answer_falls_back_to_chain_on_malformed_output(fake_llm_handler, make_processor):
+    def responder(messages):
+        if "'grounded'" in str(messages[0].content):
+            return json.dumps({"answer": "", "meaningful": "maybe"})
+        return default_responder(messages)
+
+    fake_llm_handler.llm.responder = responder
+    processor = make_processor(answer_mode="fused")
+    chunks = [LangChainDocument(page_content="Python is required.")]
+
+    answer = asyncio.run(processor.aanswer_fused("Is Python required?", chunks))
+
+    assert answer == "Yes, the context mentions it."
+    assert fake_llm_handler.calls == 4
+
+
+def test_multi_question_mode_makes_one_call_per_source(fake_llm_handler, make_processor, job_sources):
+    questions = ["Is Python required?", "Is SQL required?", "Is Git required?", "Is Scala required?"]
+    fake_llm_handler.llm.responder = keyword_responder
+    chain = make_processor().process_content(job_sources, questions, 2)
+    chain_calls = fake_llm_handler.calls
+    prompts = []
+
+    def recording_responder(messages):
+        prompts.append(str(messages[-1].content))
+        return keyword_responder(messages)
+
+    fake_llm_handler.llm.responder = recording_responder
+    result = make_processor(answer_mode="multi").process_content(job_sources, questions, 2)
+    answering_calls = sum("'answers'" in prompt for prompt in prompts)
+
+    assert list(result["top_items"]) == list(chain["top_items"])
+    for title, item in result["top_items"].items():
+        assert set(item["qa"]) == set(chain["top_items"][title]["qa"])
+    assert answering_calls == len(job_sources)
+    assert fake_llm_handler.calls - chain_calls < chain_calls
+
+
+def test_multi_question_mode_batches_long_pages(fake_llm_handler, make_processor):
+    fake_llm_handler.llm.responder = keyword_responder
+    processor = make_processor(answer_mode="multi")
+    processor.llm_max_tokens = 300
+    chunks = [
+        LangChainDocument(page_content=f"{topic} " + "filler " * 100)
+        for topic in ("Python", "Docker", "SQL")
+    ]
+    questions = ["Is Python required?", "Is SQL required?"]
+    hits = [[(chunk, 0.5) for chunk in chunks]] * len(questions)
+
+    qa = asyncio.run(processor.aanswer_questions_multi(questions, hits))
+
+    assert list(qa) == questions
+    assert fake_llm_handler.calls == 3
+
+
+def test_multi_question_mode_falls_back_on_malformed_output(fake_llm_handler, make_processor):
+    def responder(messages):
+        if "'answers'" in str(messages[-1].content):
+            return json.dumps({"answers": ["Yes"]})
+        return default_responder(messages)
+
+    fake_llm_handler.llm.responder = responder
+    processor = make_processor(answer_mode="multi")
+    chunk = LangChainDocument(page_content="Python is required.")
+    questions = ["Is Python required?", "Is Docker required?"]
+
+    qa = asyncio.run(processor.aanswer_questions_multi(questions, [[(chunk, 0.9)]] * 2))
+
+    assert qa == {question: "Yes, the context mentions it." for question in questions}
+
+
+def test_multi_question_answers_accept_echoed_question_keys(make_processor):
+    processor = make_processor(answer_mode="multi")
+    questions = ["Is Python required?", "Is SQL required?", "Is Git required?"]
+    response = {
+        "answers": {"1. Is Python required?": "Yes.", "2": "No mention.", "Is Git required?": None}
+    }
+
+    assert processor.parse_multi_answers(response, questions) == {
+        "Is Python required?": "Yes.",
+        "Is SQL required?": "No mention.",
+        "Is Git required?": None,
+    }
+
+
+def test_multi_question_mode_falls_back_when_no_key_matches(fake_llm_handler, make_processor):
+    def responder(messages):
+        if "'answers'" in str(messages[-1].content):
+            return json.dumps({"answers": {"Python": "Yes", "Docker": "Yes"}})
+        return default_responder(messages)
+
+    fake_llm_handler.llm.responder = responder
+    processor = make_processor(answer_mode="multi")
+    chunk = LangChainDocument(page_content="Python is required.")
+    questions = ["Is Python required?", "Is Docker required?"]
+
+    qa = asyncio.run(processor.aanswer_questions_multi(questions, [[(chunk, 0.9)]] * 2))
+
+    assert qa == {question: "Yes, the context mentions it." for question in questions}
@@ -0,0 +1,55 @@
+import json
+import time
+from src.cache import LLMCache
+from src.tracing import NULL_SPAN, Tracer, span, tracing
+
+QUESTIONS = ["Is Python required?", "Is SQL required?"]
+
+
+def test_process_content_records_stage_source_and_llm_spans(
+    fake_llm_handler, make_processor, job_sources, tmp_path
+):
+    fake_llm_handler.cache = LLMCache()
+    make_processor().process_content(job_sources, QUESTIONS, 2)
+    calls = fake_llm_handler.llm.calls
+
+    tracer = Tracer()
+    with tracing(tracer):
+        make_processor().process_content(job_sources, QUESTIONS, 2)
+    tracer.save(tmp_path, chrome_trace=True)
+
+    rows = {(row["category"], row["name"]): row for row in tracer.summary_rows()}
+    for stage in ("chunk", "index", "retrieve", "answer", "summarize"):
+        assert rows[("stage", stage)]["count"] == 1
+    assert rows[("source", "answer")]["count"] == len(job_sources)
+    llm_rows = [row for (category, _), row in rows.items() if category == "llm"]
+    assert sum(row["count"] for row in llm_rows) == sum(row["cache_hit"] for row in llm_rows)
+    assert fake_llm_handler.llm.calls == calls
+
+    summary = (tmp_path / "trace_summary.txt").read_text()
+    assert summary.startswith("Wall time")
+    assert "summarize" in summary
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {event["name"] for event in events if event["ph"] == "X"} >= {"chunk", "text", "json"}
+
+
+def test_llm_spans_record_provider_tokens(fake_llm_handler, make_processor, job_sources):
+    tracer = Tracer()
+    with tracing(tracer):
+        make_processor().process_content(job_sources, QUESTIONS, 2)
+
+    llm_rows = [row for row in tracer.summary_rows() if row["category"] == "llm"]
+    requests = sum(row["count"] - row["shared"] for row in llm_rows)
+    assert requests == fake_llm_handler.llm.calls
+    assert all(row["tokens_in"] > 0 and row["tokens_out"] > 0 for row in llm_rows)
+    assert sum(row["cache_hit"] for row in llm_rows) == 0
+
+
+def test_spans_are_free_without_a_tracer():
+    assert span("answer", "source", source="https://a.example") is NULL_SPAN
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        with span("text", "llm") as call:
+            call.set(cache_hit=1)
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,101 @@
+import time
+from unittest.mock import MagicMock, patch
+import pytest
+from src.search import YouTubeSearchEngine
+
+
+@pytest.fixture
+def youtube_client(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    client = MagicMock()
+
+    def search_list(q, **kwargs):
+        request = MagicMock()
+        request.execute.return_value = {
+            "items": [
+                {"id": {"videoId": f"{q}-{i}"}, "snippet": {"title": f"{q} video {i}"}}
+                for i in range(kwargs["maxResults"])
+            ]
+            + [{"id": {"videoId": "shared"}, "snippet": {"title": "Shared video"}}]
+        }
+        return request
+
+    client.search.return_value.list.side_effect = search_list
+    with patch("src.search.build", return_value=client):
+        yield client
+
+
+def test_fetch_urls_deduplicates_in_query_order(youtube_client):
+    engine = YouTubeSearchEngine(query_workers=2, query_rate=0)
+    urls = engine.fetch_urls(["a", "b"], 2, 30)
+
+    assert urls == [
+        "https://www.youtube.com/watch?v=a-0",
+        "https://www.youtube.com/watch?v=a-1",
+        "https://www.youtube.com/watch?v=shared",
+        "https://www.youtube.com/watch?v=b-0",
+        "https://www.youtube.com/watch?v=b-1",
+    ]
+    assert youtube_client.search.return_value.list.call_count == 2
+
+
+def fake_transcript(delay=0.0):
+    def get_transcript(video_id):
+        time.sleep(delay)
+        return [{"text": f"Transcript of {video_id}"}]
+
+    return get_transcript
+
+
+def test_load_source_content_uses_search_titles(youtube_client):
+    engine = YouTubeSearchEngine(query_rate=0)
+    urls = engine.fetch_urls(["a"], 2, 30)
+    with patch("src.search.YouTubeTranscriptApi.get_transcript", side_effect=fake_transcript()):
+        source_items = engine.load_source_content(urls)
+
+    assert list(source_items) == ["a video 0", "a video 1", "Shared video"]
+    assert source_items["a video 0"]["documents"][0].page_content == "Transcript of a-0"
+    youtube_client.videos.assert_not_called()
+
+
+def test_unknown_titles_are_looked_up_in_batches(youtube_client):
+    def videos_list(part, id):
+        request = MagicMock()
+        request.execute.return_value = {
+            "items": [
+                {"id": video_id, "snippet": {"title": f"Title &amp; {video_id}"}}
+                for video_id in id.split(",")
+            ]
+        }
+        return request
+
+    youtube_client.videos.return_value.list.side_effect = videos_list
+    engine = YouTubeSearchEngine(max_concurrency=60, query_rate=0)
+    urls = [f"https://www.youtube.com/watch?v=v{i}" for i in range(60)]
+    with patch("src.search.YouTubeTranscriptApi.get_transcript", side_effect=fake_transcript()):
+        source_items = engine.load_source_content(urls)
+
+    assert list(source_items) == [f"Title & v{i}" for i in range(60)]
+    batches = [
+        call.kwargs["id"].split(",")
+        for call in youtube_client.videos.return_value.list.call_args_list
+    ]
+    assert len(batches) == 2
+    assert sorted(video_id for batch in batches for video_id in batch) == sorted(
+        f"v{i}" for i in range(60)
+    )
+    assert max(len(batch) for batch in batches) == 50
+
+
+def test_transcripts_are_fetched_concurrently(youtube_client):
+    engine = YouTubeSearchEngine(query_rate=0, transcript_workers=4)
+    urls = engine.fetch_urls(["a", "b"], 2, 30)
+    with patch(
+        "src.search.YouTubeTranscriptApi.get_transcript", side_effect=fake_transcript(0.2)
+    ):
+        start = time.perf_counter()
+        source_items = engine.load_source_content(urls)
+        elapsed = time.perf_counter() - start
+
+    assert len(source_items) == 5
+    assert 0.35 < elapsed < 0.6